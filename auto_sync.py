@@ -10,10 +10,13 @@ import os
 import time
 from datetime import datetime
 
+from git_sync import fetch_state, sync_files
+from sync_daemon import SYNC_FILES
+
 def sync_json_files():
     """Sync JSON files to GitHub"""
     try:
-        json_files = ['game_state.json', 'player_actions.json', 'control_commands.json']
+        json_files = list(SYNC_FILES)  # the game state only; commands go the other way
         
         # Check if files exist
         existing_files = [f for f in json_files if os.path.exists(f)]
@@ -23,19 +26,13 @@ def sync_json_files():
         
         print(f"🔄 Syncing {len(existing_files)} files to GitHub...")
         
-        # Add JSON files to git
-        for file in existing_files:
-            subprocess.run(['git', 'add', file], check=True)
-            print(f"✅ Added {file}")
-        
-        # Commit changes
+        # One commit built straight from the files, then one push
         commit_message = f"Auto-sync game state - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        subprocess.run(['git', 'commit', '-m', commit_message], check=True)
-        print("✅ Committed changes")
-        
-        # Push to GitHub
-        subprocess.run(['git', 'push', 'origin', 'main'], check=True)
-        print("✅ Pushed to GitHub")
+        commit = sync_files(existing_files, commit_message)
+        if commit is None:
+            print("ℹ️ No changes to commit")
+            return True
+        print(f"✅ Committed and pushed {commit[:7]}")
         
         print(f"🎉 Successfully synced {len(existing_files)} files to GitHub!")
         return True
@@ -47,7 +44,8 @@ def pull_from_github():
     """Pull latest changes from GitHub"""
     try:
         print("🔄 Pulling latest changes from GitHub...")
-        subprocess.run(['git', 'pull', 'origin', 'main'], check=True)
+        # Only the state branch's latest commit: the same cost however long the game ran
+        fetch_state(SYNC_FILES)
         print("✅ Pulled latest changes from GitHub")
         return True
     except Exception as e:
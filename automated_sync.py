@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 """
 Automated Sync for Streamlit Cloud + Local Game
-This script automatically syncs JSON files between local game and Streamlit Cloud
+This script automatically syncs JSON files between local game and Streamlit Cloud.
+Changes are pushed as they happen by sync_daemon.py: a burst of writes becomes
+one commit, and nothing is committed while the game is idle.
 """
 
-import json
 import os
 import time
 import subprocess
@@ -12,11 +13,14 @@ import shutil
 from datetime import datetime
 import threading
 
+from git_sync import fetch_state, sync_files
+from sync_daemon import SYNC_FILES, GitTransport, SyncDaemon
+
 class GameSync:
     def __init__(self):
-        self.json_files = ['game_state.json', 'player_actions.json', 'control_commands.json']
-        self.sync_interval = 5  # seconds
+        self.json_files = list(SYNC_FILES)
         self.running = False
+        self.daemon = None
         
     def check_git_status(self):
         """Check if git is initialized"""
@@ -47,16 +51,11 @@ class GameSync:
             if not self.check_git_status():
                 return False
             
-            # Add JSON files to git
-            for file in self.json_files:
-                if os.path.exists(file):
-                    subprocess.run(['git', 'add', file], check=True)
-            
-            # Commit changes
-            subprocess.run(['git', 'commit', '-m', f'Auto-sync - {datetime.now()}'], check=True)
-            
-            # Push to GitHub
-            subprocess.run(['git', 'push', 'origin', 'main'], check=True)
+            # One commit built from the files without git add/commit, one push
+            files = [file for file in self.json_files if os.path.exists(file)]
+            if sync_files(files, f'Auto-sync - {datetime.now()}') is None:
+                print("ℹ️ No changes to sync")
+                return True
             
             print(f"✅ Synced to GitHub at {datetime.now()}")
             return True
@@ -70,8 +69,8 @@ class GameSync:
             if not self.check_git_status():
                 return False
             
-            # Pull latest changes
-            subprocess.run(['git', 'pull', 'origin', 'main'], check=True)
+            # Latest commit of the state branch only
+            fetch_state(self.json_files)
             
             print(f"✅ Synced from GitHub at {datetime.now()}")
             return True
@@ -80,25 +79,30 @@ class GameSync:
             return False
     
     def start_auto_sync(self):
-        """Start automatic sync"""
+        """Start automatic sync: each burst of changes is pushed as one commit"""
+        if not self.check_git_status():
+            return
         self.running = True
         print("🔄 Starting automatic sync...")
         
-        while self.running:
-            try:
-                # Sync to GitHub
-                self.sync_to_github()
-                
-                # Wait for next sync
-                time.sleep(self.sync_interval)
-            except KeyboardInterrupt:
-                print("\n🛑 Stopping automatic sync...")
-                self.running = False
-                break
+        self.daemon = SyncDaemon(GitTransport(remote='origin'), files=self.json_files)
+        self.daemon.start()
+        try:
+            while self.running:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("\n🛑 Stopping automatic sync...")
+        finally:
+            self.stop_auto_sync()
     
     def stop_auto_sync(self):
         """Stop automatic sync"""
         self.running = False
+        if self.daemon is not None:
+            self.daemon.stop()
+            metrics = self.daemon.metrics()
+            print(f"📊 {metrics['syncs']} syncs, lag {metrics['lag_ms']}")
+            self.daemon = None
         print("🛑 Automatic sync stopped")
 
 def main():
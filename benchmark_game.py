@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""
+Performance Benchmarks for the Pygame Monopoly Game
+This script times the hot paths of main.py (game loop, rendering, undo history,
+mystery wheel and sound synthesis) with the dummy SDL drivers, so it runs on any
+laptop or CI box without opening a window.
+
+Usage:
+    python benchmark_game.py --save        # record benchmark_baseline.json
+    python benchmark_game.py               # compare against the saved baseline
+    python benchmark_game.py -k draw       # only run benchmarks matching "draw"
+    python benchmark_game.py --codecs      # size and speed of the state formats
+"""
+
+import os
+
+# The dummy drivers must be selected before pygame is imported anywhere
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import contextlib
+import json
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pygame
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import main
+import state_codec
+from frame_stream import FRAME_STREAM_FILE, FrameStreamer
+from main import Game
+
+BASELINE_FILE = "benchmark_baseline.json"
+BOARD_IMAGE = "monopoly board.jpg"
+DEFAULT_THRESHOLD = 1.25  # flag benchmarks whose median got 25% slower
+
+# name -> (setup(game), run(game)); setup runs before every timed call
+BENCHMARKS = {}
+
+
+def benchmark(name, setup=None):
+    """Register a benchmark function under the given name"""
+    def decorator(fn):
+        BENCHMARKS[name] = (setup, fn)
+        return fn
+    return decorator
+
+
+def create_benchmark_game(workdir, autosave=False):
+    """Create a Game in an isolated working directory with a realistic board"""
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    board_image = os.path.join(source_dir, BOARD_IMAGE)
+    if os.path.exists(board_image):
+        shutil.copy(board_image, workdir)
+
+    os.chdir(workdir)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        game = Game(autosave_path=main.AUTOSAVE_FILE if autosave else None)
+    populate_game(game)
+    return game
+
+
+def populate_game(game):
+    """Give the game a mid-event shape: owned properties, trails and history"""
+    owners = {1: "T1", 3: "T1", 5: "T2", 7: "T2", 9: "T3", 11: "T3",
+              13: "T4", 15: "T4", 17: "T5", 19: "T5", 21: "T1", 23: "T2"}
+    for index, owner in owners.items():
+        game._set_owner(index, owner)
+
+    for step, team in enumerate(game.teams):
+        team.pos = (step * 5 + 1) % main.BOARD_SPACES
+        game.token_trail[team.team_id] = [(team.pos + i) % main.BOARD_SPACES for i in range(15)]
+
+    game.current_idx = 0
+    game.chance_card = game.chance_cards[0]
+    game.mystery_card = game.mystery_cards[0]
+    game.selected_mystery = game.mystery_cards[0]
+    game.trading_seller = 0
+    game.trading_property = 1
+    game.trading_offer_amounts = {t.team_id: 1_500_000 for t in game.teams[1:]}
+    game.trading_offers = dict(game.trading_offer_amounts)
+    game.mystery_feedback = "Moved to Free Parking!"
+    game.feedback_timer = 120
+
+
+def fill_history(game):
+    """Fill the undo history up to its configured limit"""
+    while len(game.game_history) < game.max_history_size:
+        game._save_state()
+
+
+def reset_frame(game):
+    """Clear the per-frame click areas so overlay draws do not accumulate"""
+    game.click_areas = []
+
+
+# Game loop
+
+def _setup_update_bridge(game):
+    game.streamlit_enabled = True
+    game.moving = False
+
+
+@benchmark("update.bridge", setup=_setup_update_bridge)
+def bench_update_bridge(game):
+    game._update()
+
+
+def _setup_update_moving(game):
+    game.streamlit_enabled = True
+    game.moving = True
+    game.move_steps = 3
+    game.move_progress = 0.5
+    game.from_pos_idx = game.teams[game.current_idx].pos
+    game.to_pos_idx = (game.from_pos_idx + 1) % main.BOARD_SPACES
+
+
+@benchmark("update.bridge_moving", setup=_setup_update_moving)
+def bench_update_moving(game):
+    game._update()
+
+
+# Rendering
+
+@benchmark("draw.board", setup=reset_frame)
+def bench_draw_board(game):
+    game._draw_board()
+
+
+@benchmark("draw.houses", setup=reset_frame)
+def bench_draw_houses(game):
+    game._draw_houses()
+
+
+@benchmark("draw.house_icon", setup=reset_frame)
+def bench_draw_house_icon(game):
+    game._draw_house_icon(200, 200, game.teams[0].color)
+
+
+@benchmark("draw.tokens", setup=reset_frame)
+def bench_draw_tokens(game):
+    game._draw_tokens()
+
+
+@benchmark("draw.ui", setup=reset_frame)
+def bench_draw_ui(game):
+    game._draw_ui()
+
+
+@benchmark("draw.button_icon", setup=reset_frame)
+def bench_draw_button_icon(game):
+    for label, rect, _ in game._ui_buttons():
+        game._draw_button_icon(label, rect)
+
+
+@benchmark("draw.property_card", setup=reset_frame)
+def bench_draw_property_card(game):
+    game._draw_property_card()
+
+
+def _setup_chance(game):
+    reset_frame(game)
+    game.show_chance = True
+
+
+@benchmark("draw.chance_overlay", setup=_setup_chance)
+def bench_draw_chance_overlay(game):
+    game._draw_chance_overlay()
+
+
+def _setup_chance_confirm(game):
+    reset_frame(game)
+    game.show_chance_confirm = True
+
+
+@benchmark("draw.chance_confirm_overlay", setup=_setup_chance_confirm)
+def bench_draw_chance_confirm_overlay(game):
+    game._draw_chance_confirm_overlay()
+
+
+def _setup_mystery(game):
+    reset_frame(game)
+    game.show_mystery = True
+    game.spinning = False
+    game.spin_angle = 137.0
+
+
+@benchmark("draw.mystery_overlay", setup=_setup_mystery)
+def bench_draw_mystery_overlay(game):
+    game._draw_mystery_overlay()
+
+
+@benchmark("draw.spin_wheel", setup=_setup_mystery)
+def bench_draw_spin_wheel(game):
+    br = game.board_rect
+    game._draw_spin_wheel(br.centerx, br.centery, min(200, br.width // 3))
+
+
+def _setup_sell(game):
+    reset_frame(game)
+    game.show_sell_property = True
+
+
+@benchmark("draw.sell_property_overlay", setup=_setup_sell)
+def bench_draw_sell_property_overlay(game):
+    game._draw_sell_property_overlay()
+
+
+def _setup_trading(game):
+    reset_frame(game)
+    game.show_trading = True
+    game.trading_phase = 'collect_offers'
+
+
+@benchmark("draw.trading_overlay", setup=_setup_trading)
+def bench_draw_trading_overlay(game):
+    game._draw_trading_overlay()
+
+
+@benchmark("draw.feedback_popup", setup=reset_frame)
+def bench_draw_feedback_popup(game):
+    game._draw_feedback_popup()
+
+
+def _setup_full_frame(game):
+    reset_frame(game)
+    game.show_chance = False
+    game.show_chance_confirm = False
+    game.show_mystery = False
+    game.show_sell_property = False
+    game.show_trading = False
+
+
+@benchmark("draw.frame", setup=_setup_full_frame)
+def bench_draw_frame(game):
+    game._draw()
+
+
+# Undo history
+
+def _setup_save_state(game):
+    fill_history(game)
+
+
+@benchmark("history.save_state_full", setup=_setup_save_state)
+def bench_save_state(game):
+    game._save_state()
+
+
+def _setup_undo_state(game):
+    fill_history(game)
+
+
+@benchmark("history.undo_state_full", setup=_setup_undo_state)
+def bench_undo_state(game):
+    game._undo_state()
+
+
+@benchmark("autosave.snapshot")
+def bench_autosave_snapshot(game):
+    game._autosave_state()
+
+
+# Frame streaming
+
+def _setup_frame_capture(game):
+    if game.frame_streamer is None:
+        game.frame_streamer = FrameStreamer(FRAME_STREAM_FILE)
+        game.frame_streamer.capture(game.screen)  # the keyframe
+    game.frame_streamer.last_capture = float("-inf")  # skip the frame-rate cap
+
+
+@benchmark("frames.capture_unchanged", setup=_setup_frame_capture)
+def bench_frame_capture_unchanged(game):
+    game.frame_streamer.capture(game.screen)
+
+
+# Rent
+
+def _setup_rent_landing(game):
+    team = game.teams[2]
+    team.pos = 21  # T1's property
+    team.balance = 10_000_000
+
+
+@benchmark("rent.collect_landing", setup=_setup_rent_landing)
+def bench_collect_rent(game):
+    game._collect_rent(game.teams[2])
+
+
+# Mystery wheel
+
+def _setup_mystery_pick(game):
+    game.spin_angle = game.spin_angle + 73.0
+    game.used_mysteries = []
+
+
+@benchmark("mystery.determine_selected", setup=_setup_mystery_pick)
+def bench_determine_selected_mystery(game):
+    game._determine_selected_mystery()
+
+
+# Sound synthesis
+
+@benchmark("sound.beep")
+def bench_beep_sound(game):
+    game._create_beep_sound(440, 0.1)
+
+
+@benchmark("sound.sweep")
+def bench_sweep_sound(game):
+    game._create_sweep_sound(200, 800, 0.5)
+
+
+@benchmark("sound.chord")
+def bench_chord_sound(game):
+    game._create_chord_sound([523, 659, 784], 0.3)
+
+
+def time_benchmark(game, setup, fn, min_time=0.5, min_rounds=5, max_rounds=2000):
+    """Time one benchmark, excluding its setup, and return summary statistics"""
+    samples = []
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        while len(samples) < max_rounds:
+            if setup:
+                setup(game)
+            t0 = time.perf_counter()
+            fn(game)
+            samples.append(time.perf_counter() - t0)
+            if len(samples) >= min_rounds and time.perf_counter() - started >= min_time:
+                break
+
+    return {
+        "rounds": len(samples),
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.mean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def run_benchmarks(pattern=None, min_time=0.5):
+    """Run all registered benchmarks (optionally filtered) and return the results"""
+    original_cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="monopoly_bench_")
+    game = None
+    try:
+        game = create_benchmark_game(workdir)
+        results = {}
+        for name, (setup, fn) in BENCHMARKS.items():
+            if pattern and pattern not in name:
+                continue
+            populate_game(game)
+            results[name] = time_benchmark(game, setup, fn, min_time=min_time)
+            print(f"  {name:<32} median {results[name]['median'] * 1000:9.3f} ms"
+                  f"  ({results[name]['rounds']} rounds)")
+        return {
+            "meta": {
+                "created": datetime.now().isoformat(),
+                "python": platform.python_version(),
+                "pygame": pygame.version.ver,
+                "platform": platform.platform(),
+                "machine": platform.machine(),
+                "video_driver": os.environ.get("SDL_VIDEODRIVER"),
+            },
+            "benchmarks": results,
+        }
+    finally:
+        if game is not None:
+            game.state_manager.close()  # releases its shared-memory snapshot
+        os.chdir(original_cwd)
+        pygame.quit()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def codec_payloads(game):
+    """What the game serializes: the Streamlit state, an undo entry and the event log"""
+    game._last_streamlit_state = None
+    game.save_streamlit_state()
+    game._save_state()
+    events = [{"timestamp": datetime(2024, 1, 1, 10, minute).isoformat(),
+               "message": f"{game.teams[minute % len(game.teams)].name} paid rent of ₹{(minute + 1) * 25_000:,}"}
+              for minute in range(50)]
+    return {
+        "streamlit_state": game._last_streamlit_state,
+        "history_entry": game.game_history[-1],
+        "event_log": events,
+    }
+
+
+def codec_variants():
+    """name -> (encode, decode); the first one is what the game used to write"""
+    variants = {
+        "json indent=2": (lambda data: json.dumps(data, indent=2).encode('utf-8'), json.loads),
+        "json": (lambda data: json.dumps(data, separators=(',', ':')).encode('utf-8'), json.loads),
+    }
+    if state_codec.orjson is not None:
+        variants["orjson"] = (state_codec.dumps_json, state_codec.loads_json)
+    variants["binary"] = (state_codec.dumps_binary, state_codec.loads_binary)
+    return variants
+
+
+def run_codec_report(min_time=0.2):
+    """Size, encode and decode time of every format for each payload"""
+    original_cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="monopoly_bench_")
+    game = None
+    try:
+        game = create_benchmark_game(workdir)
+        rows = []
+        for payload_name, payload in codec_payloads(game).items():
+            for codec_name, (encode, decode) in codec_variants().items():
+                blob = encode(payload)
+                rows.append({
+                    "payload": payload_name,
+                    "codec": codec_name,
+                    "bytes": len(blob),
+                    "encode": time_benchmark(None, None, lambda _: encode(payload), min_time=min_time)["median"],
+                    "decode": time_benchmark(None, None, lambda _: decode(blob), min_time=min_time)["median"],
+                    "roundtrip": decode(blob) == json.loads(json.dumps(payload)),
+                })
+                row = rows[-1]
+                print(f"  {payload_name:<16} {codec_name:<14} {row['bytes']:8,d} B"
+                      f"  encode {row['encode'] * 1e6:8.1f} µs  decode {row['decode'] * 1e6:8.1f} µs")
+        return rows
+    finally:
+        if game is not None:
+            game.state_manager.close()  # releases its shared-memory snapshot
+        os.chdir(original_cwd)
+        pygame.quit()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare_results(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return the benchmarks whose median regressed beyond the threshold"""
+    regressions = []
+    for name, result in current["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if not previous or previous["median"] <= 0:
+            continue
+        ratio = result["median"] / previous["median"]
+        if ratio > threshold:
+            regressions.append((name, previous["median"], result["median"], ratio))
+    return regressions
+
+
+def main_cli(argv=None):
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark the Monopoly game hot paths")
+    parser.add_argument("--save", action="store_true", help=f"write the results to {BASELINE_FILE}")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON file to compare against")
+    parser.add_argument("--output", help="also write the raw results to this JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown ratio that counts as a regression (default 1.25)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds to spend per benchmark")
+    parser.add_argument("-k", dest="pattern", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--codecs", action="store_true", help="compare the state serialization formats instead")
+    args = parser.parse_args(argv)
+
+    if args.codecs:
+        print("⏱️ Arthvidya Monopoly - State Format Comparison")
+        print("=" * 50)
+        run_codec_report(min_time=args.min_time)
+        return 0
+
+    baseline_path = os.path.abspath(args.baseline)
+    output_path = os.path.abspath(args.output) if args.output else None
+
+    print("⏱️ Arthvidya Monopoly - Performance Benchmarks")
+    print("=" * 50)
+    results = run_benchmarks(pattern=args.pattern, min_time=args.min_time)
+
+    if output_path:
+        with open(output_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save:
+        with open(baseline_path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Baseline saved to {baseline_path}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f"ℹ️ No baseline at {baseline_path}; run with --save to create one")
+        return 0
+
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+
+    regressions = compare_results(results, baseline, args.threshold)
+    if not regressions:
+        print(f"✅ No regressions beyond {args.threshold:.2f}x the baseline")
+        return 0
+
+    print(f"❌ {len(regressions)} benchmark(s) regressed:")
+    for name, before, after, ratio in regressions:
+        print(f"  {name:<32} {before * 1000:9.3f} ms -> {after * 1000:9.3f} ms  ({ratio:.2f}x)")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
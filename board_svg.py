@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Vector (SVG) Board View Built from the Game State
+An alternative to streaming pixels: the board is drawn as SVG from the state
+the game exports - tile owners from "properties", token positions and colors
+from "teams", names and colors from "property_table" - so web pages can show a
+crisp board at any size.
+
+Every element (a tile, an owner marker, a token, a balance line) has an id and
+is rendered by a memoized function of just the values it shows, so a new state
+only re-renders the elements that changed. BoardSvg keeps the last board and
+reports those changed elements, which is all a live client needs to patch its
+copy (a few hundred bytes when a token moves):
+
+    svg, changes = board.update(state, version)   # changes: {element id: new SVG, "" if removed}
+
+Tile centers come from tile_positions(), the same layout main.py draws.
+"""
+
+import threading
+from functools import lru_cache
+from html import escape
+
+BOARD_SIZE = 700    # SVG user units per side
+CELLS = 7           # tiles per side, corners included
+ELEMENT_CACHE = 1024
+
+# Squares without a property; keep in step with CHANCE_TILES and MYSTERY_TILES in main.py
+SPECIAL_TILES = {0: "GO", 6: "Society Penalty", 12: "Free Parking", 18: "Event Penalty",
+                 4: "Chance", 8: "Chance", 16: "Chance", 20: "Chance",
+                 2: "Mystery", 10: "Mystery", 14: "Mystery", 22: "Mystery"}
+TOKEN_OFFSETS = [(-0.22, -0.22), (0.22, -0.22), (-0.22, 0.22), (0.22, 0.22), (0.0, 0.0)]  # share of a cell
+
+
+def tile_positions(x, y, width, height, cells=CELLS):
+    """Centers of the board squares, counter-clockwise from GO in the bottom-left corner"""
+    cell_w = width // cells
+    cell_h = height // cells
+    positions = []
+
+    # Bottom row: GO (0) to right edge (1-6)
+    for i in range(cells):
+        positions.append((x + i * cell_w + cell_w // 2, y + height - cell_h // 2))
+
+    # Right edge: bottom-right (7) to top-right (8-12)
+    for i in range(1, cells):
+        positions.append((x + width - cell_w // 2, y + (cells - 1 - i) * cell_h + cell_h // 2))
+
+    # Top row: top-right (13) to left (14-19)
+    for i in range(cells - 2, -1, -1):
+        positions.append((x + i * cell_w + cell_w // 2, y + cell_h // 2))
+
+    # Left edge: top-left (20) to bottom-left (21-23)
+    for i in range(1, cells - 1):
+        positions.append((x + cell_w // 2, y + i * cell_h + cell_h // 2))
+    return positions
+
+
+POSITIONS = tile_positions(0, 0, BOARD_SIZE, BOARD_SIZE)
+CELL = BOARD_SIZE // CELLS
+
+
+def _label_lines(name, width=13):
+    """A tile name split into at most two short lines"""
+    lines = [""]
+    for word in name.split():
+        if lines[-1] and len(lines[-1]) + 1 + len(word) > width:
+            if len(lines) == 2:
+                lines[-1] += "…"
+                break
+            lines.append(word)
+        else:
+            lines[-1] = f"{lines[-1]} {word}".strip()
+    return lines
+
+
+@lru_cache(maxsize=ELEMENT_CACHE)
+def _tile(index, name, color, price):
+    cx, cy = POSITIONS[index]
+    x, y = cx - CELL // 2, cy - CELL // 2
+    parts = [f'<g id="tile-{index}"><rect x="{x}" y="{y}" width="{CELL}" height="{CELL}" fill="#fdfaf2" '
+             f'stroke="#444"/>']
+    if color:
+        parts.append(f'<rect x="{x}" y="{y}" width="{CELL}" height="16" fill="{escape(color)}" stroke="#444"/>')
+    for line_no, line in enumerate(_label_lines(name)):
+        parts.append(f'<text x="{cx}" y="{y + 36 + line_no * 13}" font-size="11" text-anchor="middle">'
+                     f'{escape(line)}</text>')
+    if price:
+        parts.append(f'<text x="{cx}" y="{y + CELL - 10}" font-size="10" text-anchor="middle" fill="#555">'
+                     f'₹{price / 1_000_000:.1f}M</text>')
+    parts.append('</g>')
+    return "".join(parts)
+
+
+@lru_cache(maxsize=ELEMENT_CACHE)
+def _owner(index, color):
+    if color is None:
+        return f'<g id="owner-{index}"/>'
+    cx, cy = POSITIONS[index]
+    return (f'<rect id="owner-{index}" x="{cx - CELL // 2 + 3}" y="{cy - CELL // 2 + 3}" width="{CELL - 6}" '
+            f'height="{CELL - 6}" fill="none" stroke="{escape(color)}" stroke-width="5"/>')
+
+
+@lru_cache(maxsize=ELEMENT_CACHE)
+def _token(team_id, slot, pos, color, current):
+    cx, cy = POSITIONS[pos % len(POSITIONS)]
+    dx, dy = TOKEN_OFFSETS[slot % len(TOKEN_OFFSETS)]
+    ring = 'stroke="#FFD700" stroke-width="4"' if current else 'stroke="#fff" stroke-width="2"'
+    return (f'<circle id="token-{escape(team_id)}" cx="{cx + round(dx * CELL)}" cy="{cy + round(dy * CELL)}" '
+            f'r="11" fill="{escape(color)}" {ring}/>')
+
+
+@lru_cache(maxsize=ELEMENT_CACHE)
+def _balance(team_id, slot, name, color, balance, current):
+    y = CELL + 95 + slot * 30
+    weight = ' font-weight="bold"' if current else ''
+    marker = "🎲 " if current else ""
+    return (f'<text id="balance-{escape(team_id)}" x="{BOARD_SIZE // 2}" y="{y}" font-size="20" '
+            f'text-anchor="middle" fill="{escape(color)}"{weight}>{marker}{escape(name)}: '
+            f'₹{balance / 1_000_000:.1f}M</text>')
+
+
+def board_elements(state):
+    """(element id, SVG) pairs for a game state, in drawing order"""
+    table = state.get("property_table", {})
+    teams = state.get("teams", [])
+    colors = {team["id"]: team["color"] for team in teams}
+    owners = state.get("properties", {})
+    current = state.get("current_player", 0)
+    elements = []
+    for index in range(len(POSITIONS)):
+        row = table.get(str(index))
+        if row is not None:
+            elements.append((f"tile-{index}", _tile(index, row.get("name", ""), row.get("color"), row.get("price"))))
+        else:
+            elements.append((f"tile-{index}", _tile(index, SPECIAL_TILES.get(index, ""), None, None)))
+    for index in range(len(POSITIONS)):
+        owner = owners.get(str(index), {}).get("owner")
+        elements.append((f"owner-{index}", _owner(index, colors.get(owner) if owner else None)))
+    for slot, team in enumerate(teams):
+        elements.append((f"balance-{team['id']}", _balance(team["id"], slot, team["name"], team["color"],
+                                                           team["balance"], slot == current)))
+    for slot, team in enumerate(teams):
+        elements.append((f"token-{team['id']}", _token(team["id"], slot, team["pos"], team["color"], slot == current)))
+    return elements
+
+
+def render_svg(elements):
+    """A complete SVG document from board_elements()"""
+    return "".join([
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {BOARD_SIZE} {BOARD_SIZE}" '
+        f'font-family="Arial, sans-serif" id="board">',
+        f'<rect width="{BOARD_SIZE}" height="{BOARD_SIZE}" fill="#e8f5e9"/>',
+        f'<text x="{BOARD_SIZE // 2}" y="{CELL + 50}" font-size="28" font-weight="bold" text-anchor="middle" '
+        f'fill="#1b5e20">Arthvidya Monopoly</text>',
+        *(svg for _, svg in elements),
+        '</svg>',
+    ])
+
+
+def board_svg(state):
+    """The board for a game state as an SVG document"""
+    return render_svg(board_elements(state))
+
+
+class BoardSvg:
+    """Keeps the last rendered board and reports which elements each new state changed"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.svg = None
+        self.elements = {}  # element id -> SVG
+
+    def update(self, state, version=None):
+        """Return (svg, changes) for a state; changes maps each changed element id to its SVG ("" if removed).
+
+        The same version twice returns the cached board and no changes.
+        """
+        with self.lock:
+            if version is not None and version == self.version and self.svg is not None:
+                return self.svg, {}
+            elements = board_elements(state)
+            changes = {element_id: svg for element_id, svg in elements if self.elements.get(element_id) != svg}
+            current = dict(elements)
+            changes.update({element_id: "" for element_id in self.elements if element_id not in current})
+            if changes or self.svg is None:
+                self.svg = render_svg(elements)
+            self.elements = current
+            self.version = version
+            return self.svg, changes
@@ -0,0 +1,9 @@
+"""
+Shared pytest configuration
+Tests run headless, so select the dummy SDL drivers before pygame is imported.
+"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
@@ -29,6 +29,9 @@ import subprocess
 import shutil
 from datetime import datetime
 
+from git_sync import PushRejected, fetch_state, sync_files
+from sync_daemon import SYNC_FILES
+
 def sync_to_github():
     """Sync JSON files to GitHub"""
     try:
@@ -37,23 +40,16 @@ def sync_to_github():
             print("Initializing git repository...")
             subprocess.run(['git', 'init'], check=True)
         
-        # Add JSON files to git
-        json_files = ['game_state.json', 'player_actions.json', 'control_commands.json']
-        
-        for file in json_files:
-            if os.path.exists(file):
-                subprocess.run(['git', 'add', file], check=True)
-                print(f"Added {file} to git")
-        
-        # Commit changes
-        subprocess.run(['git', 'commit', '-m', f'Sync game state - {datetime.now()}'], check=True)
-        print("Committed changes to git")
+        # One commit built from the files (no git add/commit), one push
+        json_files = list(SYNC_FILES)  # the game state only; commands go the other way
+        files = [file for file in json_files if os.path.exists(file)]
         
-        # Push to GitHub (if remote exists)
         try:
-            subprocess.run(['git', 'push', 'origin', 'main'], check=True)
-            print("Pushed changes to GitHub")
-        except:
+            if sync_files(files, f'Sync game state - {datetime.now()}') is None:
+                print("No changes to sync")
+            else:
+                print("Committed and pushed changes to GitHub")
+        except (PushRejected, subprocess.CalledProcessError):
             print("No remote repository configured. Please set up GitHub remote.")
         
         return True
@@ -64,8 +60,8 @@ def sync_to_github():
 def sync_from_github():
     """Sync JSON files from GitHub"""
     try:
-        # Pull latest changes
-        subprocess.run(['git', 'pull', 'origin', 'main'], check=True)
+        # Latest commit of the state branch only
+        fetch_state(SYNC_FILES)
         print("Pulled latest changes from GitHub")
         return True
     except Exception as e:
@@ -87,7 +83,7 @@ if __name__ == "__main__":
     print("=" * 30)
     
     # Check if JSON files exist
-    json_files = ['game_state.json', 'player_actions.json', 'control_commands.json']
+    json_files = list(SYNC_FILES)
     missing_files = [f for f in json_files if not os.path.exists(f)]
     
     if missing_files:
@@ -326,7 +322,7 @@ import threading
 
 class GameSync:
     def __init__(self):
-        self.json_files = ['game_state.json', 'player_actions.json', 'control_commands.json']
+        self.json_files = ['game_state.json']  # commands go the other way
         self.sync_interval = 5  # seconds
         self.running = False
         
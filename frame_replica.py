@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Board Frame Replica for Remote Viewers
+The viewer half of frame_stream.py. FrameReplica follows board_frames.jsonl
+like json_patch.PatchReplica, pastes the streamed regions onto its copy of the
+frame and re-encodes the full frame once per change for display.
+
+It decodes with Pillow, which Streamlit already installs, and never imports
+pygame, so streamlit_mobile.py also runs where pygame isn't available
+(Streamlit Cloud).
+"""
+
+import base64
+import io
+import os
+import threading
+
+from PIL import Image
+
+from state_codec import loads_json
+
+FRAME_STREAM_FILE = "board_frames.jsonl"
+
+
+def encode_frame(image, fmt="jpeg"):
+    """A Pillow image as JPEG or PNG bytes"""
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG" if fmt == "jpeg" else "PNG")
+    return buffer.getvalue()
+
+
+class FrameReplica:
+    """Follows a frame stream file and keeps the current full frame"""
+
+    def __init__(self, path=FRAME_STREAM_FILE, fmt="jpeg"):
+        self.path = path
+        self.fmt = fmt
+        self.lock = threading.Lock()
+        self.frame = None
+        self.seq = 0
+        self._inode = None
+        self._offset = 0
+        self._image = (None, None)  # (seq, encoded full frame)
+
+    def read(self):
+        """Return (Pillow image, seq) of the latest frame; (None, 0) if nothing was published yet"""
+        with self.lock:
+            try:
+                f = open(self.path, 'rb')
+            except FileNotFoundError:
+                return None, 0
+            with f:
+                stat = os.fstat(f.fileno())
+                if stat.st_ino != self._inode or stat.st_size < self._offset:
+                    # Replaced by a new keyframe: start over
+                    self.frame, self.seq, self._inode, self._offset = None, 0, stat.st_ino, 0
+                f.seek(self._offset)
+                data = f.read(stat.st_size - self._offset)
+            for line in data.split(b"\n"):
+                if line.strip():
+                    try:
+                        record = loads_json(line)
+                    except ValueError:
+                        break  # the game is still appending this line
+                    self._apply(record)
+                self._offset += len(line) + 1
+            self._offset = min(self._offset, stat.st_size)
+            return self.frame, self.seq
+
+    def _apply(self, record):
+        size = tuple(record["size"])
+        if record.get("keyframe") or self.frame is None or self.frame.size != size:
+            self.frame = Image.new("RGB", size)
+        for x, y, width, height, data in record["regions"]:
+            with Image.open(io.BytesIO(base64.b64decode(data))) as region:
+                self.frame.paste(region.convert("RGB"), (x, y))
+        self.seq = record["seq"]
+
+    def read_image(self):
+        """Return (encoded full frame, seq), encoding it only when a new frame arrived"""
+        frame, seq = self.read()
+        if frame is None:
+            return None, 0
+        with self.lock:
+            if self._image[0] != seq:
+                self._image = (seq, encode_frame(frame, self.fmt))
+            return self._image[1], seq
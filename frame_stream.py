@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Board Frame Streaming for Remote Viewers
+Remote teams on streamlit_mobile.py only see numbers. With frame streaming on,
+the game publishes what it draws as small images so they can see the board too,
+without anyone screen-sharing the projector laptop:
+
+- FrameStreamer (in the game) downscales the screen at most max_fps times a
+  second and compares it with the last published frame tile by tile. If no
+  tile changed nothing is written; otherwise only the changed regions are
+  encoded (JPEG, or PNG where pygame has no JPEG support) and appended to
+  board_frames.jsonl. A full keyframe replaces the file every
+  KEYFRAME_INTERVAL records, or when most of the screen changed.
+- FrameReplica (in a viewer, frame_replica.py) follows that file, pastes the
+  regions onto its copy of the frame and re-encodes the full frame once per
+  change for display. It doesn't need pygame, so viewers can run without it.
+
+    {"seq": 1, "size": [640, 411], "keyframe": true, "regions": [[0, 0, 640, 411, "<base64 image>"]]}
+    {"seq": 2, "size": [640, 411], "regions": [[128, 64, 64, 64, "<base64 image>"]]}
+
+Run `python main.py --offscreen` to render into an offscreen surface (SDL
+dummy driver) and stream frames from a machine without a display.
+"""
+
+import base64
+import io
+import time
+import zlib
+
+import pygame
+
+from frame_replica import FRAME_STREAM_FILE
+from game_storage import VersionConflict, append_json, file_version, write_json
+
+FRAME_FPS = 4              # frames published per second at most
+FRAME_WIDTH = 640          # width of the published frames (the height keeps the aspect ratio)
+TILE = 32                  # change detection grid, in published pixels
+KEYFRAME_INTERVAL = 100    # region records between full keyframes
+KEYFRAME_AREA = 0.5        # changed share of the frame above which a keyframe is cheaper
+
+
+def image_format():
+    """"jpeg" if this pygame can save JPEG, else "png\""""
+    return "jpeg" if pygame.image.get_extended() else "png"
+
+
+def encode_image(surface, fmt=None):
+    """A surface as JPEG or PNG bytes"""
+    buffer = io.BytesIO()
+    pygame.image.save(surface, buffer, "frame.jpg" if (fmt or image_format()) == "jpeg" else "frame.png")
+    return buffer.getvalue()
+
+
+def _tile_rects(width, height, tile):
+    return [pygame.Rect(x, y, min(tile, width - x), min(tile, height - y))
+            for y in range(0, height, tile) for x in range(0, width, tile)]
+
+
+def changed_regions(rects, changed, columns):
+    """Merge changed tiles (a row-major grid with this many columns) into a few rectangles.
+
+    Runs of changed tiles in a row become one rectangle, and a run covering the
+    same columns as the one right above it extends that rectangle downwards.
+    """
+    regions = []
+    open_runs = {}  # (first column, last column) -> index in regions of the rectangle ending on the row above
+    for row_start in range(0, len(rects), columns):
+        runs = {}
+        column = 0
+        while column < columns:
+            if not changed[row_start + column]:
+                column += 1
+                continue
+            first = column
+            while column < columns and changed[row_start + column]:
+                column += 1
+            rect = rects[row_start + first].union(rects[row_start + column - 1])
+            key = (first, column - 1)
+            if key in open_runs:
+                index = open_runs[key]
+                regions[index] = regions[index].union(rect)
+            else:
+                index = len(regions)
+                regions.append(rect)
+            runs[key] = index
+        open_runs = runs
+    return regions
+
+
+class FrameStreamer:
+    """Publishes downscaled frames of a surface as changed regions, only when something changed"""
+
+    def __init__(self, path=FRAME_STREAM_FILE, max_fps=FRAME_FPS, width=FRAME_WIDTH, fmt=None,
+                 keyframe_interval=KEYFRAME_INTERVAL):
+        self.path = path
+        self.interval = 1.0 / max_fps
+        self.width = width
+        self.fmt = fmt or image_format()
+        self.keyframe_interval = keyframe_interval
+        self.seq = 0
+        self.records = 0          # region records since the last keyframe
+        self.version = None       # file version after our last write
+        self.size = None
+        self.rects = []
+        self.columns = 0
+        self.tile_hashes = None
+        self.last_capture = float("-inf")
+        self.stats = {"captures": 0, "unchanged": 0, "keyframes": 0, "regions": 0, "bytes": 0, "errors": 0}
+
+    def capture(self, surface, now=None):
+        """Consider surface for publishing; returns True if a record was written.
+
+        Calls more often than max_fps are skipped before any work is done.
+        """
+        now = time.monotonic() if now is None else now
+        if now - self.last_capture < self.interval:
+            return False
+        self.last_capture = now
+        self.stats["captures"] += 1
+        try:
+            return self._publish(self._downscale(surface))
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"Error streaming board frame: {e}")
+            return False
+
+    def _downscale(self, surface):
+        width, height = surface.get_size()
+        size = (self.width, max(1, round(height * self.width / width)))
+        if size != self.size:
+            self.size = size
+            self.rects = _tile_rects(size[0], size[1], TILE)
+            self.columns = (size[0] + TILE - 1) // TILE
+            self.tile_hashes = None  # new geometry: next record is a keyframe
+        return pygame.transform.smoothscale(surface, size)
+
+    def _publish(self, frame):
+        hashes = [zlib.crc32(pygame.image.tobytes(frame.subsurface(rect), "RGB")) for rect in self.rects]
+        current = file_version(self.path)
+        if self.tile_hashes is None or current != self.version or self.records >= self.keyframe_interval:
+            changed = None
+        else:
+            changed = [old != new for old, new in zip(self.tile_hashes, hashes)]
+            if not any(changed):
+                self.stats["unchanged"] += 1
+                return False
+        self.tile_hashes = hashes
+
+        regions = changed_regions(self.rects, changed, self.columns) if changed is not None else []
+        area = sum(rect.width * rect.height for rect in regions)
+        record = {"seq": self.seq + 1, "size": list(self.size)}
+        if changed is None or area > KEYFRAME_AREA * self.size[0] * self.size[1]:
+            record["keyframe"] = True
+            record["regions"] = [self._region(frame, frame.get_rect())]
+            self.version = write_json(self.path, record)
+            self.stats["bytes"] += self.version[2]
+            self.records = 0
+            self.stats["keyframes"] += 1
+        else:
+            record["regions"] = [self._region(frame, rect) for rect in regions]
+            try:
+                version = append_json(self.path, record, expected_version=current)
+            except VersionConflict:
+                self.tile_hashes = None  # someone replaced the file; start over with a keyframe
+                return False
+            self.stats["bytes"] += version[2] - current[2]
+            self.version = version
+            self.records += 1
+            self.stats["regions"] += len(regions)
+        self.seq += 1
+        return True
+
+    def _region(self, frame, rect):
+        data = encode_image(frame.subsurface(rect), self.fmt)
+        return [rect.x, rect.y, rect.width, rect.height, base64.b64encode(data).decode('ascii')]
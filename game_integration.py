@@ -1,4 +1,3 @@
-import json
 import os
 import time
 import threading
@@ -6,11 +5,15 @@ from datetime import datetime
 import subprocess
 import sys
 
+from game_state_manager import GameStateManager, delivery_order
+from game_storage import update_json
+
 class GameIntegration:
     def __init__(self):
         self.game_state_file = "game_state.json"
         self.player_actions_file = "player_actions.json"
         self.control_commands_file = "control_commands.json"
+        self.state_manager = GameStateManager()
         self.game_process = None
         self.running = False
         
@@ -54,10 +57,9 @@ class GameIntegration:
     def process_control_commands(self):
         """Process commands from the control center"""
         try:
-            with open(self.control_commands_file, 'r') as f:
-                commands = json.load(f)
+            commands = self.state_manager.drain_control_commands()
             
-            for timestamp, command_data in commands.items():
+            for key, command_data in delivery_order(commands):
                 command = command_data.get('command')
                 
                 if command == 'roll_dice':
@@ -76,11 +78,6 @@ class GameIntegration:
                     self.send_to_game('T')  # Press T key
                 elif command == 'reset_game':
                     self.send_to_game('RESET')  # Custom reset command
-                
-                # Remove processed command
-                del commands[timestamp]
-                with open(self.control_commands_file, 'w') as f:
-                    json.dump(commands, f)
                     
         except Exception as e:
             print(f"Error processing control commands: {e}")
@@ -88,10 +85,10 @@ class GameIntegration:
     def process_player_actions(self):
         """Process actions from players"""
         try:
-            with open(self.player_actions_file, 'r') as f:
-                actions = json.load(f)
+            actions = self.state_manager.drain_player_actions()
             
-            for team_id, action_data in actions.items():
+            for key, action_data in delivery_order(actions):
+                team_id = action_data.get('team_id', key)
                 action = action_data.get('action')
                 
                 # Only process actions for the current player
@@ -111,11 +108,6 @@ class GameIntegration:
                         self.send_to_game('SPIN')  # Custom mystery spin
                     elif action == 'start_trading':
                         self.send_to_game('T')
-                
-                # Remove processed action
-                del actions[team_id]
-                with open(self.player_actions_file, 'w') as f:
-                    json.dump(actions, f)
                     
         except Exception as e:
             print(f"Error processing player actions: {e}")
@@ -134,28 +126,20 @@ class GameIntegration:
     
     def get_current_player(self):
         """Get the current player ID"""
-        try:
-            with open(self.game_state_file, 'r') as f:
-                state = json.load(f)
-            current_idx = state.get('current_player', 0)
-            return f"T{current_idx + 1}"
-        except:
-            return "T1"
+        state = self.state_manager.load_game_state() or {}
+        current_idx = state.get('current_player', 0)
+        return f"T{current_idx + 1}"
     
     def update_game_state(self, state_data):
         """Update the game state file"""
         try:
-            with open(self.game_state_file, 'w') as f:
-                json.dump(state_data, f, indent=2)
+            self.state_manager.save_game_state(state_data)
         except Exception as e:
             print(f"Error updating game state: {e}")
     
     def add_game_message(self, message):
         """Add a message to the game log"""
-        try:
-            with open(self.game_state_file, 'r') as f:
-                state = json.load(f)
-            
+        def append_message(state):
             if 'messages' not in state:
                 state['messages'] = []
             
@@ -166,8 +150,9 @@ class GameIntegration:
             
             # Keep only last 50 messages
             state['messages'] = state['messages'][-50:]
-            
-            self.update_game_state(state)
+        
+        try:
+            update_json(self.game_state_file, append_message, indent=2)
         except Exception as e:
             print(f"Error adding game message: {e}")
 
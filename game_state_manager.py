@@ -0,0 +1,773 @@
+#!/usr/bin/env python3
+"""
+Shared Game State Access for the Game and All Streamlit Frontends
+One GameStateManager used by every client instead of a copy per app. Reads are
+cached by state version, so a page rerun only parses game_state.json when the
+game actually wrote something new, and the storage itself is a pluggable
+backend:
+
+- FileBackend:   the three JSON files next to main.py (default); with
+                 stream=True (MONOPOLY_BACKEND=stream) the game state is kept
+                 as a stream of JSON Patches between keyframes (json_patch.py)
+- SqliteBackend: one WAL-mode SQLite database with game history (sqlite_backend.py)
+- GitBranchBackend: FileBackend for the cloud pages, whose game_state.json
+                 follows the state branch the sync scripts push (git_sync.py)
+- SocketBackend: talks to `python game_state_manager.py serve` on the game laptop;
+                 every request carries the shared MONOPOLY_TOKEN
+
+Pick the backend with the MONOPOLY_BACKEND environment variable, e.g.
+MONOPOLY_BACKEND=sqlite or MONOPOLY_BACKEND=socket://192.168.1.20:8765
+
+When session_manager.py hosts several games in one process, each keeps its
+storage in games/<game_id>/ (hosted_game_manager(), list_games()).
+
+When the game runs on the same laptop it also publishes each state into shared
+memory (shm_snapshot.py), and local readers use that instead of the backend.
+
+Commands and player actions are queued, never overwritten: each manager is a
+client with its own id and sequence numbers, every entry gets an idempotency
+key (command_id), and the game applies entries in send order and skips ones it
+has already seen (see delivery_order()).
+"""
+
+import hmac
+import itertools
+import json
+import os
+import re
+import secrets
+import socket
+import socketserver
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from game_storage import (ANY_VERSION, VersionConflict, create_json, drain_json, file_version,
+                          read_json, read_json_versioned, update_json, write_json)
+from git_sync import STATE_BRANCH, branch_head, fetch_state
+from json_patch import PatchReplica, PatchStreamWriter, stream_path
+from shm_snapshot import SnapshotReader, SnapshotWriter, snapshot_name
+from sqlite_backend import DEFAULT_DB_FILE, SqliteBackend
+
+DEFAULT_PORT = 8765
+TOKEN_ENV = "MONOPOLY_TOKEN"  # shared secret between the state server and its clients
+SNAPSHOT_ATTACH_INTERVAL = 1.0  # seconds between attempts to map the game's snapshot
+SNAPSHOT_VERIFY_INTERVAL = 1.0  # seconds between checks that the snapshot matches storage
+BRANCH_POLL_INTERVAL = 2.0  # seconds between checks of the state branch head (GitBranchBackend)
+GAMES_DIR = "games"  # one storage directory per game hosted by session_manager.py
+GAME_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,31}$")
+
+DEFAULT_GAME_STATE = {
+    "current_player": 0,
+    "game_phase": "waiting",
+    "dice_rolled": False,
+    "current_position": 0,
+    "properties": {},
+    "teams": [
+        {"id": "T1", "name": "Team 1", "color": "#D32F2F", "balance": 10000000, "pos": 0},
+        {"id": "T2", "name": "Team 2", "color": "#1976D2", "balance": 10000000, "pos": 0},
+        {"id": "T3", "name": "Team 3", "color": "#388E3C", "balance": 10000000, "pos": 0},
+        {"id": "T4", "name": "Team 4", "color": "#F57C00", "balance": 10000000, "pos": 0},
+        {"id": "T5", "name": "Team 5", "color": "#7B1FA2", "balance": 10000000, "pos": 0}
+    ],
+    "messages": [],
+    "pending_actions": {},
+    "game_log": []
+}
+
+
+@dataclass
+class TeamSnapshot:
+    id: str
+    name: str
+    color: str
+    balance: int
+    pos: int
+
+
+@dataclass
+class GameSnapshot:
+    """Read-only, typed view of one game_state.json version"""
+    current_player: int
+    game_phase: str
+    dice_rolled: bool
+    current_position: int
+    teams: list
+    properties: dict
+    messages: list
+    game_log: list
+    property_table: dict = field(default_factory=dict)
+    portfolios: dict = field(default_factory=dict)
+    command_acks: dict = field(default_factory=dict)
+    command_metrics: dict = field(default_factory=dict)
+    version: object = None
+    raw: dict = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_state(cls, state, version=None):
+        teams = [TeamSnapshot(t["id"], t["name"], t["color"], t["balance"], t["pos"])
+                 for t in state.get("teams", [])]
+        return cls(
+            current_player=state.get("current_player", 0),
+            game_phase=state.get("game_phase", "waiting"),
+            dice_rolled=state.get("dice_rolled", False),
+            current_position=state.get("current_position", 0),
+            teams=teams,
+            properties=state.get("properties", {}),
+            messages=state.get("messages", []),
+            game_log=state.get("game_log", []),
+            property_table=state.get("property_table", {}),
+            portfolios=state.get("portfolios", {}),
+            command_acks=state.get("command_acks", {}),
+            command_metrics=state.get("command_metrics", {}),
+            version=version,
+            raw=state,
+        )
+
+    @property
+    def current_team(self):
+        if 0 <= self.current_player < len(self.teams):
+            return self.teams[self.current_player]
+        return None
+
+    def team(self, team_id):
+        """Return the team with the given id (e.g. "T3"), or None"""
+        return next((t for t in self.teams if t.id == team_id), None)
+
+
+class FileBackend:
+    """Game state, player actions and control commands as JSON files in one directory"""
+
+    def __init__(self, directory=".", stream=False):
+        self.directory = directory
+        self.game_state_file = os.path.join(directory, "game_state.json")
+        self.player_actions_file = os.path.join(directory, "player_actions.json")
+        self.control_commands_file = os.path.join(directory, "control_commands.json")
+        # In stream mode game_state.json is only rewritten at keyframes; the
+        # current state is the stream, which every reader here follows
+        self.state_stream_file = stream_path(self.game_state_file)
+        self.stream_writer = PatchStreamWriter(self.state_stream_file, checkpoint_path=self.game_state_file) \
+            if stream else None
+        self.stream_replica = PatchReplica(self.state_stream_file)
+
+    def init_files(self, default_state):
+        create_json(self.game_state_file, default_state, indent=2)
+        create_json(self.player_actions_file, {}, indent=2)
+        create_json(self.control_commands_file, {}, indent=2)
+
+    def state_version(self):
+        version = file_version(self.state_stream_file)
+        return version if version is not None else file_version(self.game_state_file)
+
+    def read_state(self):
+        state, version = self.stream_replica.read()
+        if version is not None:
+            return state, version
+        return read_json_versioned(self.game_state_file)
+
+    def read_state_if_changed(self, known_version):
+        """Return (state, version), or (None, version) if known_version is current"""
+        version = self.state_version()
+        if version is not None and version == known_version:
+            return None, version
+        return self.read_state()
+
+    def write_state(self, state, expected_version=ANY_VERSION):
+        if self.stream_writer is not None:
+            return self.stream_writer.write(state, expected_version)
+        stream_version = file_version(self.state_stream_file)
+        if stream_version is not None:
+            # Left behind by a game in stream mode; it would shadow this write
+            if expected_version is not ANY_VERSION and expected_version != stream_version:
+                raise VersionConflict(self.state_stream_file, expected_version, stream_version)
+            os.remove(self.state_stream_file)
+            expected_version = ANY_VERSION
+        return write_json(self.game_state_file, state, indent=2, expected_version=expected_version)
+
+    def player_actions_version(self):
+        return file_version(self.player_actions_file)
+
+    def read_player_actions(self):
+        return read_json(self.player_actions_file, {})
+
+    def write_player_actions(self, actions):
+        write_json(self.player_actions_file, actions, indent=2)
+
+    def set_player_action(self, team_id, action_data):
+        def set_action(actions):
+            actions[team_id] = action_data
+        update_json(self.player_actions_file, set_action, indent=2)
+
+    def add_player_action(self, key, action_data):
+        def add_action(actions):
+            actions[key] = action_data
+        update_json(self.player_actions_file, add_action, indent=2)
+
+    def drain_player_actions(self):
+        return drain_json(self.player_actions_file)
+
+    def read_control_commands(self):
+        return read_json(self.control_commands_file, {})
+
+    def write_control_commands(self, commands):
+        write_json(self.control_commands_file, commands, indent=2)
+
+    def add_control_command(self, key, command_data):
+        def add_command(commands):
+            commands[key] = command_data
+        update_json(self.control_commands_file, add_command, indent=2)
+
+    def drain_control_commands(self):
+        return drain_json(self.control_commands_file)
+
+    def log_event(self, message, timestamp=None):
+        pass  # the recent messages are already part of game_state.json
+
+    def close(self):
+        pass
+
+
+class GitBranchBackend(FileBackend):
+    """FileBackend whose game_state.json follows the state branch pushed from the game laptop.
+
+    The branch head is checked at most once per interval and the state is
+    only fetched when the head moved; commands and player actions stay local.
+    """
+
+    def __init__(self, directory=".", remote="origin", branch=STATE_BRANCH, interval=BRANCH_POLL_INTERVAL):
+        super().__init__(directory)
+        self.remote = remote
+        self.branch = branch
+        self.interval = interval
+        self.head = None  # branch commit game_state.json was last fetched from
+        self.checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def follow_branch(self):
+        """Fetch game_state.json if the branch moved since the last check; returns the head"""
+        now = time.monotonic()
+        if now - self.checked_at < self.interval or not self._lock.acquire(blocking=False):
+            return self.head  # checked recently, or another session is fetching right now
+        try:
+            self.checked_at = now
+            head = branch_head(self.directory, self.remote, self.branch)
+            if head is not None and head != self.head:
+                fetch_state(["game_state.json"], self.directory, self.directory, self.remote, self.branch)
+                self.head = head
+        except Exception as e:
+            print(f"Error following the state branch: {e}")
+        finally:
+            self._lock.release()
+        return self.head
+
+    def state_version(self):
+        self.follow_branch()
+        return super().state_version()
+
+    def read_state(self):
+        self.follow_branch()
+        return super().read_state()
+
+
+# Backend operations that may be called over the socket protocol
+REMOTE_OPERATIONS = {
+    "init_files", "state_version", "read_state", "read_state_if_changed", "write_state",
+    "player_actions_version", "read_player_actions", "write_player_actions", "set_player_action",
+    "add_player_action", "drain_player_actions",
+    "read_control_commands", "write_control_commands", "add_control_command", "drain_control_commands",
+    "log_event",
+}
+# Operations that are not resent after a lost reply: the first request may
+# already have taken the queue (or logged the line), and a resend would drop it
+NON_IDEMPOTENT_OPERATIONS = {"drain_player_actions", "drain_control_commands", "log_event"}
+
+
+def _to_version(value):
+    # Version tokens travel as JSON lists; backends compare them as tuples
+    return tuple(value) if isinstance(value, list) else value
+
+
+class SocketBackend:
+    """Client for a backend served over TCP with newline-delimited JSON requests"""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, timeout=5.0, token=None):
+        self.address = (host, port)
+        self.timeout = timeout
+        self.token = token if token is not None else os.environ.get(TOKEN_ENV, "")
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._sock = socket.create_connection(self.address, timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile('r', encoding='utf-8')
+
+    def _call(self, op, *args, **kwargs):
+        request = {"op": op, "args": args, "kwargs": kwargs, "token": self.token}
+        request = (json.dumps(request) + "\n").encode('utf-8')
+        attempts = 1 if op in NON_IDEMPOTENT_OPERATIONS else 2
+        with self._lock:
+            for attempt in range(attempts):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(request)
+                    line = self._reader.readline()
+                    if not line:
+                        raise ConnectionError("state server closed the connection")
+                    break
+                except OSError:
+                    self.close()
+                    if attempt == attempts - 1:
+                        raise
+        response = json.loads(line)
+        if response.get("ok"):
+            return response.get("result")
+        if response.get("error_type") == "VersionConflict":
+            raise VersionConflict(op, kwargs.get("expected_version"), None)
+        if response.get("error_type") == "PermissionError":
+            self.close()
+            raise PermissionError(f"State server refused {op}: set {TOKEN_ENV} to the server's token")
+        raise RuntimeError(f"State server error in {op}: {response.get('error')}")
+
+    def init_files(self, default_state):
+        self._call("init_files", default_state)
+
+    def state_version(self):
+        return _to_version(self._call("state_version"))
+
+    def read_state(self):
+        state, version = self._call("read_state")
+        return state, _to_version(version)
+
+    def read_state_if_changed(self, known_version):
+        state, version = self._call("read_state_if_changed", known_version)
+        return state, _to_version(version)
+
+    def write_state(self, state, expected_version=ANY_VERSION):
+        if expected_version is ANY_VERSION:
+            return _to_version(self._call("write_state", state))
+        return _to_version(self._call("write_state", state, expected_version=expected_version))
+
+    def player_actions_version(self):
+        return _to_version(self._call("player_actions_version"))
+
+    def read_player_actions(self):
+        return self._call("read_player_actions")
+
+    def write_player_actions(self, actions):
+        self._call("write_player_actions", actions)
+
+    def set_player_action(self, team_id, action_data):
+        self._call("set_player_action", team_id, action_data)
+
+    def add_player_action(self, key, action_data):
+        self._call("add_player_action", key, action_data)
+
+    def drain_player_actions(self):
+        return self._call("drain_player_actions")
+
+    def read_control_commands(self):
+        return self._call("read_control_commands")
+
+    def write_control_commands(self, commands):
+        self._call("write_control_commands", commands)
+
+    def add_control_command(self, key, command_data):
+        self._call("add_control_command", key, command_data)
+
+    def drain_control_commands(self):
+        return self._call("drain_control_commands")
+
+    def log_event(self, message, timestamp=None):
+        self._call("log_event", message, timestamp)
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+
+class _BackendRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        backend = self.server.backend
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if not hmac.compare_digest(str(request.get("token", "")), self.server.token):
+                    response = {"ok": False, "error": "bad token", "error_type": "PermissionError"}
+                    self.wfile.write((json.dumps(response) + "\n").encode('utf-8'))
+                    return
+                op = request.get("op")
+                if op not in REMOTE_OPERATIONS:
+                    raise ValueError(f"unknown operation {op!r}")
+                args = [_to_version(a) for a in request.get("args", [])]
+                kwargs = {k: _to_version(v) for k, v in request.get("kwargs", {}).items()}
+                response = {"ok": True, "result": getattr(backend, op)(*args, **kwargs)}
+            except Exception as e:
+                response = {"ok": False, "error": str(e), "error_type": type(e).__name__}
+            self.wfile.write((json.dumps(response) + "\n").encode('utf-8'))
+
+
+class BackendServer(socketserver.ThreadingTCPServer):
+    """Serve a local backend to SocketBackend clients that know the shared token.
+
+    Listens on this machine only unless given another host (e.g. "0.0.0.0").
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, backend, host="127.0.0.1", port=DEFAULT_PORT, token=None):
+        token = token if token is not None else os.environ.get(TOKEN_ENV, "")
+        if not token:
+            raise ValueError(f"the state server needs a shared token ({TOKEN_ENV})")
+        super().__init__((host, port), _BackendRequestHandler)
+        self.backend = backend
+        self.token = token
+
+
+def create_backend(spec=None):
+    """Create a backend from a spec such as "file", "stream:/path", "sqlite:/path.db", "git", "git:branch" or "socket://host:port\""""
+    spec = spec or os.environ.get("MONOPOLY_BACKEND", "file")
+    if spec == "file":
+        return FileBackend()
+    if spec.startswith("file:"):
+        return FileBackend(spec[len("file:"):])
+    if spec == "stream":
+        return FileBackend(stream=True)
+    if spec.startswith("stream:"):
+        return FileBackend(spec[len("stream:"):], stream=True)
+    if spec == "sqlite":
+        return SqliteBackend(DEFAULT_DB_FILE)
+    if spec.startswith("sqlite:"):
+        return SqliteBackend(spec[len("sqlite:"):])
+    if spec == "git":
+        return GitBranchBackend()
+    if spec.startswith("git:"):
+        return GitBranchBackend(branch=spec[len("git:"):])
+    if spec.startswith("socket://"):
+        host, _, port = spec[len("socket://"):].partition(":")
+        return SocketBackend(host or "127.0.0.1", int(port or DEFAULT_PORT))
+    raise ValueError(f"Unknown game state backend: {spec}")
+
+
+def game_directory(game_id, root=GAMES_DIR):
+    """Storage directory of a hosted game; raises ValueError for ids that are not safe names"""
+    if not isinstance(game_id, str) or not GAME_ID_PATTERN.match(game_id):
+        raise ValueError(f"Invalid game id {game_id!r} (letters, digits, - and _, up to 32 characters)")
+    return os.path.join(root, game_id)
+
+
+def list_games(root=GAMES_DIR):
+    """Ids of the games that have storage under root, sorted"""
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return []
+    return sorted(name for name in names if GAME_ID_PATTERN.match(name)
+                  and os.path.exists(os.path.join(root, name, "game_state.json")))
+
+
+def hosted_game_manager(game_id, root=GAMES_DIR, stream=False, init_files=False):
+    """A GameStateManager for one hosted game, namespaced by its id"""
+    backend = FileBackend(game_directory(game_id, root), stream=stream)
+    return GameStateManager(backend, init_files=init_files, namespace=game_id)
+
+
+def delivery_order(entries):
+    """Drained queue entries (key -> data) as (key, data) pairs in the order to apply them.
+
+    Entries are ordered by send time, and each client's entries by sequence
+    number; entries from older clients without either keep their key order.
+    """
+    return sorted(entries.items(), key=lambda item: (
+        item[1].get("sent_at") or 0, item[1].get("client_id", ""), item[1].get("seq", 0), item[0]))
+
+
+class GameStateManager:
+    """Game state access shared by the game and every Streamlit frontend.
+
+    load_game_state() and load_snapshot() return cached objects that are shared
+    between callers (and Streamlit sessions); treat them as read-only.
+    """
+
+    def __init__(self, backend=None, init_files=True, shared_snapshot=True, client_id=None, namespace=None):
+        self.backend = backend if backend is not None else create_backend()
+        self.namespace = namespace  # game id when one process hosts several games (session_manager.py)
+        self.client_id = client_id or uuid.uuid4().hex[:12]
+        self._seq = itertools.count(1)
+        self._cache_lock = threading.Lock()
+        self._cache = (None, None, None)  # (version, state dict, GameSnapshot)
+        self._actions_cache = (None, None)  # (version, pending player actions)
+        self._snapshot_writer = None
+        self._snapshot_reader = None
+        self._snapshot_seq = None
+        self._snapshot_stale_seq = None
+        self._snapshot_attached_at = float("-inf")
+        self._snapshot_verified_at = float("-inf")
+        local_path = getattr(self.backend, "directory", None) or getattr(self.backend, "path", None)
+        self._snapshot_name = snapshot_name(local_path) if shared_snapshot and local_path else None
+        if init_files:
+            self.init_files()
+
+    def init_files(self):
+        """Initialize game state and communication storage if it does not exist yet"""
+        self.backend.init_files(DEFAULT_GAME_STATE)
+
+    def state_version(self):
+        """Cheap version token of the stored game state"""
+        return self.backend.state_version()
+
+    def publish_shared_snapshot(self):
+        """Publish every saved state to same-host readers (called by the game)"""
+        if self._snapshot_name is None or self._snapshot_writer is not None:
+            return
+        try:
+            self._snapshot_writer = SnapshotWriter(self._snapshot_name)
+        except OSError as e:
+            print(f"Shared memory snapshot unavailable: {e}")
+
+    def close(self):
+        """Release the shared snapshot and backend connections"""
+        if self._snapshot_writer is not None:
+            self._snapshot_writer.close()
+            self._snapshot_writer = None
+        if self._snapshot_reader is not None:
+            self._snapshot_reader.close()
+            self._snapshot_reader = None
+        self.backend.close()
+
+    def _attach_snapshot(self):
+        now = time.monotonic()
+        if now - self._snapshot_attached_at < SNAPSHOT_ATTACH_INTERVAL:
+            return None
+        self._snapshot_attached_at = now
+        try:
+            self._snapshot_reader = SnapshotReader(self._snapshot_name)
+        except (FileNotFoundError, ValueError, OSError):
+            self._snapshot_reader = None
+        return self._snapshot_reader
+
+    def _refresh_from_snapshot(self):
+        """Serve the cache from shared memory; None means use the backend"""
+        if self._snapshot_name is None or self._snapshot_writer is not None:
+            return None
+        reader = self._snapshot_reader or self._attach_snapshot()
+        if reader is None:
+            return None
+        try:
+            seq, payload = reader.read(self._snapshot_seq)
+        except ValueError:  # closed by another thread
+            return None
+        if seq is None or seq == self._snapshot_stale_seq:
+            return None
+        if payload is not None:
+            with self._cache_lock:
+                self._cache = (_to_version(payload["version"]), payload["state"], None)
+                self._snapshot_seq = seq
+        # Something other than the game (or a game that crashed) may have
+        # written storage directly; check now and then that we still agree
+        now = time.monotonic()
+        if now - self._snapshot_verified_at >= SNAPSHOT_VERIFY_INTERVAL:
+            self._snapshot_verified_at = now
+            if self.backend.state_version() != self._cache[0]:
+                self._snapshot_stale_seq = seq
+                self._snapshot_seq = None
+                reader.close()
+                self._snapshot_reader = None
+                return None
+        return self._cache
+
+    def _refresh(self):
+        cached = self._refresh_from_snapshot()
+        if cached is not None:
+            return cached
+        version, state, snapshot = self._cache
+        try:
+            new_state, new_version = self.backend.read_state_if_changed(version)
+        except OSError as e:
+            print(f"Error loading game state: {e}")
+            return self._cache
+        if new_state is None and new_version == version:
+            return self._cache
+        with self._cache_lock:
+            self._cache = (new_version, new_state, None)
+            return self._cache
+
+    def load_game_state(self):
+        """Load game state, re-reading storage only when its version changed"""
+        return self._refresh()[1]
+
+    def load_game_state_versioned(self):
+        """Load game state together with its version token"""
+        version, state, _ = self._refresh()
+        return state, version
+
+    def load_snapshot(self):
+        """Load the game state as a typed GameSnapshot (cached per version)"""
+        version, state, snapshot = self._refresh()
+        if state is None:
+            return None
+        if snapshot is None:
+            snapshot = GameSnapshot.from_state(state, version)
+            with self._cache_lock:
+                if self._cache[0] == version:
+                    self._cache = (version, state, snapshot)
+        return snapshot
+
+    def save_game_state(self, state, expected_version=ANY_VERSION):
+        """Save game state (compare-and-swap when a version is given)"""
+        version = self.backend.write_state(state, expected_version=expected_version)
+        if self._snapshot_writer is not None:
+            self._snapshot_writer.publish(state, version)
+        return version
+
+    def save_player_actions(self, actions):
+        """Replace all pending player actions"""
+        self.backend.write_player_actions(actions)
+
+    def load_player_actions(self):
+        """Load pending player actions, re-read only when they changed (shared; treat as read-only)"""
+        # The version is taken before the read: a write in between only costs one more read
+        version = self.backend.player_actions_version()
+        with self._cache_lock:
+            if version is not None and self._actions_cache[0] == version:
+                return self._actions_cache[1]
+        actions = self.backend.read_player_actions()
+        with self._cache_lock:
+            self._actions_cache = (version, actions)
+        return actions
+
+    def set_player_action(self, team_id, action_data):
+        """Set one team's pending action slot (older clients; see send_player_action)"""
+        self.backend.set_player_action(team_id, action_data)
+
+    def drain_player_actions(self):
+        """Take every pending player action (used by the game loop)"""
+        return self.backend.drain_player_actions()
+
+    def save_control_commands(self, commands):
+        """Replace all pending control commands"""
+        self.backend.write_control_commands(commands)
+
+    def load_control_commands(self):
+        """Load pending control commands"""
+        return self.backend.read_control_commands()
+
+    def add_control_command(self, key, command_data):
+        """Queue one control command without touching the others"""
+        self.backend.add_control_command(key, command_data)
+
+    def drain_control_commands(self):
+        """Take every pending control command (used by the game loop)"""
+        return self.backend.drain_control_commands()
+
+    def _envelope(self, fields, idempotency_key):
+        """Queue key and entry for the next command from this client"""
+        seq = next(self._seq)
+        entry = dict(
+            fields,
+            # Retrying with the same idempotency key makes the game skip the
+            # repeat; by default every send is a new command
+            command_id=idempotency_key or f"{self.client_id}-{seq}",
+            client_id=self.client_id,
+            seq=seq,
+            sent_at=time.time(),
+            timestamp=datetime.now().isoformat()
+        )
+        return f"{self.client_id}:{seq:08d}", entry
+
+    def send_control_command(self, command, source="control_center", idempotency_key=None, **fields):
+        """Queue one control command; returns its command_id to look up the ack"""
+        key, entry = self._envelope(dict(fields, command=command, source=source), idempotency_key)
+        self.add_control_command(key, entry)
+        return entry["command_id"]
+
+    def add_command_batch(self, commands, source="control_center"):
+        """Queue an ordered list of commands that the game applies together; returns the batch id"""
+        return self.send_control_command("batch", source=source, commands=list(commands))
+
+    def send_player_action(self, team_id, action, idempotency_key=None, **fields):
+        """Queue a team's action behind its earlier ones; returns its command_id to look up the ack"""
+        key, entry = self._envelope(dict(fields, action=action, team_id=team_id), idempotency_key)
+        self.backend.add_player_action(key, entry)
+        return entry["command_id"]
+
+    def command_ack(self, command_id):
+        """The game's acknowledgement for a command id, or None while it is still queued.
+
+        Acks are dicts with status ("applied" or "rejected"), reason, latency_ms
+        and the time the game processed the command.
+        """
+        state = self.load_game_state() or {}
+        return state.get("command_acks", {}).get(command_id)
+
+    def command_metrics(self):
+        """Applied/rejected counts and recent end-to-end latency stats from the game"""
+        state = self.load_game_state() or {}
+        return state.get("command_metrics", {})
+
+    def log_event(self, message, timestamp=None):
+        """Append a message to the backend's event log (kept as history by SQLite)"""
+        self.backend.log_event(message, timestamp)
+
+
+def send_batch_file(path, timeout=10.0):
+    """Queue the commands listed in a JSON file as one batch and wait for the game's ack"""
+    with open(path, 'r', encoding='utf-8') as f:
+        commands = json.load(f)
+    manager = GameStateManager()
+    batch_id = manager.add_command_batch(commands, source="script")
+    print(f"📤 Sent batch {batch_id} ({len(commands)} commands)")
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        ack = manager.command_ack(batch_id)
+        if ack is not None:
+            if ack["status"] == "applied":
+                print(f"✅ Batch applied ({ack.get('steps')} commands)")
+            else:
+                print(f"❌ Batch rejected: {ack.get('reason')}")
+            return ack
+        time.sleep(0.1)
+    print("⏳ No acknowledgement yet - is the game running?")
+    return None
+
+
+def main():
+    """Serve the local game state to remote frontends, or send a scripted batch"""
+    if len(sys.argv) >= 3 and sys.argv[1] == "batch":
+        send_batch_file(sys.argv[2])
+        return
+    if len(sys.argv) < 2 or sys.argv[1] != "serve":
+        print("Usage: python game_state_manager.py serve [port] [backend-spec] [host]")
+        print("       python game_state_manager.py batch commands.json")
+        return
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PORT
+    backend = create_backend(sys.argv[3] if len(sys.argv) > 3 else "file")
+    host = sys.argv[4] if len(sys.argv) > 4 else "127.0.0.1"
+    token = os.environ.get(TOKEN_ENV) or secrets.token_urlsafe(16)
+    server = BackendServer(backend, host=host, port=port, token=token)
+    print(f"🔌 Serving game state on {host}:{port} (MONOPOLY_BACKEND=socket://<this-ip>:{port})")
+    if not os.environ.get(TOKEN_ENV):
+        print(f"🔑 Clients need {TOKEN_ENV}={token}")
+    if host == "127.0.0.1":
+        print("ℹ️ Only this machine can connect; pass 0.0.0.0 as the host to accept other machines")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 State server stopped")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
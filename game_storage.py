@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Shared JSON Storage for the Game and Streamlit Clients
+Every process that touches game_state.json, player_actions.json or
+control_commands.json goes through these helpers:
+
+- writes go to a temporary file that is swapped in with os.replace, so readers
+  never see a half-written file
+- read-modify-write cycles hold an advisory lock on a "<file>.lock" sidecar, so
+  concurrent writers never clobber each other's commands
+- JSON is encoded and parsed by state_codec (orjson when it is installed)
+- every file has a version token (inode, mtime, size) that callers can use for
+  compare-and-swap writes and for cheap "has it changed?" checks
+"""
+
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from state_codec import dumps_json, loads_json
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+ANY_VERSION = object()  # write_json: skip the compare-and-swap check
+REPLACE_RETRIES = 50    # Windows refuses os.replace while a reader holds the file open
+READ_RETRIES = 5
+
+
+class VersionConflict(Exception):
+    """Raised when a compare-and-swap write finds the file has changed"""
+
+    def __init__(self, path, expected, actual):
+        super().__init__(f"{path} changed (expected version {expected}, found {actual})")
+        self.path = path
+        self.expected = expected
+        self.actual = actual
+
+
+def file_version(path):
+    """Return the version token of a file, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _fd_version(fd):
+    st = os.fstat(fd)
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive advisory lock for <path> while the block runs"""
+    lock_file = open(path + ".lock", 'a+')
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.002)
+        yield
+    finally:
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            lock_file.close()
+
+
+def read_json_versioned(path, default=None):
+    """Read a JSON file and return (data, version); (default, None) if missing"""
+    for attempt in range(READ_RETRIES):
+        try:
+            with open(path, 'rb') as f:
+                version = _fd_version(f.fileno())
+                return loads_json(f.read()), version
+        except FileNotFoundError:
+            return default, None
+        except (json.JSONDecodeError, PermissionError) as e:
+            # Only legacy writers that bypass this module can leave a torn file
+            # behind; give them a moment to finish before giving up.
+            error = e
+            time.sleep(0.002 * (attempt + 1))
+    print(f"Error reading {path}: {error}")
+    return default, None
+
+
+def read_json(path, default=None):
+    """Read a JSON file, returning default if it is missing or unreadable"""
+    return read_json_versioned(path, default)[0]
+
+
+def _replace(src, dst):
+    for attempt in range(REPLACE_RETRIES):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if attempt == REPLACE_RETRIES - 1:
+                raise
+            time.sleep(0.002)
+
+
+def _atomic_write(path, data, indent, durable):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(dumps_json(data, indent))
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        _replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return file_version(path)
+
+
+def write_json(path, data, indent=None, expected_version=ANY_VERSION, durable=False):
+    """Atomically replace a JSON file and return its new version.
+
+    Pass expected_version (a token from read_json_versioned, or None for "must
+    not exist yet") to make the write a compare-and-swap; VersionConflict is
+    raised if another process wrote the file in the meantime.
+    """
+    with file_lock(path):
+        if expected_version is not ANY_VERSION:
+            actual = file_version(path)
+            if actual != expected_version:
+                raise VersionConflict(path, expected_version, actual)
+        return _atomic_write(path, data, indent, durable)
+
+
+def append_json(path, data, expected_version=ANY_VERSION, durable=False):
+    """Append one JSON value on a line of its own and return the file's new version.
+
+    The value starts with a newline, so a file written by write_json() can be
+    continued; a reader that sees a last line which does not parse has caught
+    the append half done. expected_version works as for write_json().
+    """
+    line = b"\n" + dumps_json(data)
+    with file_lock(path):
+        if expected_version is not ANY_VERSION:
+            actual = file_version(path)
+            if actual != expected_version:
+                raise VersionConflict(path, expected_version, actual)
+        with open(path, 'ab') as f:
+            f.write(line)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        return file_version(path)
+
+
+def create_json(path, data, indent=None):
+    """Write a JSON file only if it does not exist yet; returns True if created"""
+    try:
+        write_json(path, data, indent=indent, expected_version=None)
+        return True
+    except VersionConflict:
+        return False
+
+
+def update_json(path, mutate, default=dict, indent=None):
+    """Locked read-modify-write of a JSON file.
+
+    mutate(data) edits the loaded data in place and may return a value, which
+    is passed back to the caller. default is a factory for missing files; a
+    corrupt file is moved aside to <file>.corrupt-<timestamp> and started over.
+    """
+    with file_lock(path):
+        data, version = read_json_versioned(path, None)
+        if version is None and os.path.exists(path):
+            aside = f"{path}.corrupt-{time.strftime('%Y%m%d-%H%M%S')}"
+            _replace(path, aside)
+            print(f"⚠️ {path} could not be parsed; moved it to {aside} and started over")
+        if data is None:
+            data = default()
+        result = mutate(data)
+        _atomic_write(path, data, indent, durable=False)
+        return result
+
+
+def drain_json(path):
+    """Atomically take every entry out of a JSON object file, leaving it empty"""
+    def take_all(data):
+        taken = dict(data)
+        data.clear()
+        return taken
+
+    # Cheap unlocked peek first: the game polls these files every frame and
+    # they are empty almost all of the time.
+    if not read_json(path, {}):
+        return {}
+    return update_json(path, take_all)
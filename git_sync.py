@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Working-Tree-Free Git Sync for the Game Files
+The old sync scripts probed for git by running `git --version` up to four
+times, then forked `git add` per file, `git diff --cached`, `git commit` and
+`git push` on every sync. Here git is resolved once per process, and commits
+are built by writing the blob, tree and commit objects straight into the
+repository's object store in Python - the index, the working tree and the
+local branches are never touched. A sync costs one `git push`; the only other
+git processes run once per repository and branch, the first time it syncs
+(sync_files keeps one GitStateSync, with the branch head and tree, for each).
+
+The files go to an orphan branch (STATE_BRANCH) that is force-pushed with only
+the last `keep` commits, so main is left alone and a clone or fetch of the
+state costs the same after five minutes or eight hours of play. The loose
+objects older syncs leave behind are pruned every PRUNE_INTERVAL syncs, so
+the local repository stops growing too. Cloud clients
+read it with fetch_state(), a depth-1 fetch of that branch, when branch_head()
+says it moved (game_state_manager.GitBranchBackend does both for the pages).
+"""
+
+import functools
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import zlib
+
+from game_storage import write_json
+from json_patch import PatchReplica, stream_path
+
+GIT_CANDIDATES = [
+    r"C:\Program Files\Git\bin\git.exe",
+    r"C:\Program Files (x86)\Git\bin\git.exe",
+    os.path.join(os.getenv('LOCALAPPDATA') or "", "Programs", "Git", "bin", "git.exe"),
+]
+DEFAULT_IDENT = "Monopoly Sync <sync@localhost>"
+STATE_BRANCH = "game-state"
+KEEP_COMMITS = 1  # commits kept on the state branch; 1 is a single squashed commit
+PRUNE_INTERVAL = 100  # syncs between prunes of the objects earlier syncs no longer use
+PRUNE_EXPIRE = "10.minutes.ago"  # objects written since then are kept (other git commands may be using them)
+
+
+@functools.lru_cache(maxsize=None)
+def find_git():
+    """Path of the git executable, looked up once per process; None if git is not installed"""
+    found = shutil.which("git")
+    if found:
+        return found
+    return next((path for path in GIT_CANDIDATES if os.path.isfile(path)), None)
+
+
+class PushRejected(Exception):
+    """Raised when the remote refuses a push (e.g. someone else pushed to the branch)"""
+
+
+class GitObjectWriter:
+    """Writes blob, tree and commit objects as loose objects into a repository"""
+
+    def __init__(self, objects_dir):
+        self.objects_dir = objects_dir
+
+    def write(self, kind, body):
+        """Store an object (if not present yet) and return its hex id"""
+        data = f"{kind} {len(body)}\0".encode('ascii') + body
+        object_id = hashlib.sha1(data).hexdigest()
+        directory = os.path.join(self.objects_dir, object_id[:2])
+        path = os.path.join(directory, object_id[2:])
+        if not os.path.exists(path):
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix="tmp_obj_")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(zlib.compress(data, 1))
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+        return object_id
+
+    def blob(self, content):
+        return self.write("blob", content)
+
+    def tree(self, entries):
+        """entries: {name: (mode, object_id)} for one directory level"""
+        # git orders subtrees as if their names ended in "/"
+        def order(item):
+            name, (mode, _) = item
+            return name + "/" if mode.lstrip('0') == "40000" else name
+        body = b"".join(f"{mode.lstrip('0')} {name}".encode('utf-8') + b"\0" + bytes.fromhex(object_id)
+                        for name, (mode, object_id) in sorted(entries.items(), key=order))
+        return self.write("tree", body)
+
+    def commit(self, tree, parents, message, ident=DEFAULT_IDENT, when=None):
+        stamp = f"{ident} {int(when if when is not None else time.time())} {time.strftime('%z') or '+0000'}"
+        lines = [f"tree {tree}"] + [f"parent {parent}" for parent in parents]
+        lines += [f"author {stamp}", f"committer {stamp}", "", message]
+        return self.write("commit", ("\n".join(lines) + "\n").encode('utf-8'))
+
+
+class GitStateSync:
+    """Keeps files on an orphan branch that is force-pushed with at most `keep` commits"""
+
+    def __init__(self, repo_dir=".", remote="origin", branch=STATE_BRANCH, keep=KEEP_COMMITS,
+                 prune_interval=PRUNE_INTERVAL):
+        self.git = find_git()
+        if self.git is None:
+            raise FileNotFoundError("git not found")
+        self.repo_dir = repo_dir
+        self.remote = remote
+        self.branch = branch
+        self.keep = max(1, keep)
+        self.prune_interval = prune_interval
+        self.prune_expire = PRUNE_EXPIRE
+        self.syncs = 0
+        objects_dir = self._run('rev-parse', '--git-path', 'objects').strip()
+        self.writer = GitObjectWriter(os.path.join(repo_dir, objects_dir))
+        ident = self._run('var', 'GIT_COMMITTER_IDENT', check=False).rsplit(' ', 2)[0].strip()
+        self.ident = ident or DEFAULT_IDENT
+        self.head = None     # commit we last pushed
+        self.entries = None  # top-level tree entries of self.head
+        self.window = []     # (tree, message, time) of the commits on the branch, oldest first
+
+    def _run(self, *args, check=True):
+        result = subprocess.run([self.git, *args], cwd=self.repo_dir, capture_output=True, text=True)
+        if check and result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, args, result.stdout, result.stderr)
+        return result.stdout
+
+    def _load_base(self):
+        """Carry over files already on the state branch as we last fetched it (one-time lookup)"""
+        head = self._run('rev-parse', '--verify', '-q', f'refs/remotes/{self.remote}/{self.branch}^{{commit}}',
+                         check=False).strip()
+        self.entries = {}
+        if head:
+            for line in self._run('ls-tree', head).splitlines():
+                info, name = line.split('\t', 1)
+                mode, kind, object_id = info.split()
+                self.entries[name] = (mode, object_id)
+
+    def commit(self, contents, message):
+        """Build the branch with top-level files replaced ({name: bytes}).
+
+        Returns (head commit id, tree entries, window), or None if nothing changed.
+        """
+        if self.entries is None:
+            self._load_base()
+        entries = dict(self.entries)
+        for name, content in contents.items():
+            entries[name] = ("100644", self.writer.blob(content))
+        if entries == self.entries and self.head:
+            return None
+        tree = self.writer.tree(entries)
+        # Rebuild the whole (short) chain so its oldest commit has no parent
+        window = (self.window + [(tree, message, int(time.time()))])[-self.keep:]
+        commit = None
+        for tree_id, commit_message, when in window:
+            commit = self.writer.commit(tree_id, [commit] if commit else [], commit_message, self.ident, when)
+        return commit, entries, window
+
+    def sync(self, contents, message):
+        """Commit the files and push them; returns the new commit id, or None if nothing changed"""
+        built = self.commit(contents, message)
+        if built is None:
+            return None
+        commit, entries, window = built
+        result = subprocess.run([self.git, 'push', '-q', self.remote, f'+{commit}:refs/heads/{self.branch}'],
+                                cwd=self.repo_dir, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise PushRejected(result.stderr.strip())
+        self.head, self.entries, self.window = commit, entries, window
+        self.syncs += 1
+        if self.syncs % self.prune_interval == 0:
+            self.prune()
+        return commit
+
+    def prune(self):
+        """Delete the loose objects of earlier syncs, keeping those of the branch as last pushed"""
+        # The remote-tracking ref keeps the current objects; its reflog would keep every old head
+        ref = f'refs/remotes/{self.remote}/{self.branch}'
+        self._run('update-ref', ref, self.head)
+        self._run('reflog', 'expire', f'--expire={self.prune_expire}',
+                  f'--expire-unreachable={self.prune_expire}', ref, check=False)
+        self._run('prune', f'--expire={self.prune_expire}', check=False)
+
+
+@functools.lru_cache(maxsize=None)
+def _state_sync(repo_dir, remote, branch):
+    # One per repository and branch, so later syncs reuse its head and tree
+    return GitStateSync(repo_dir, remote, branch)
+
+
+def sync_files(paths, message, repo_dir=".", remote="origin", branch=STATE_BRANCH):
+    """Commit top-level files of repo_dir onto the state branch with one push; None if nothing changed"""
+    contents = {}
+    for path in paths:
+        path = os.path.join(repo_dir, path)
+        # A game in stream mode only rewrites the file itself at keyframes
+        data, version = PatchReplica(stream_path(path)).read()
+        if version is not None:
+            contents[os.path.basename(path)] = json.dumps(data, indent=2).encode('utf-8')
+            continue
+        with open(path, 'rb') as f:
+            contents[os.path.basename(path)] = f.read()
+    return _state_sync(os.path.abspath(repo_dir), remote, branch).sync(contents, message)
+
+
+def branch_head(repo_dir=".", remote="origin", branch=STATE_BRANCH):
+    """Commit id the remote's state branch points at (one ls-remote, no objects fetched); None if it has none"""
+    git = find_git()
+    if git is None:
+        raise FileNotFoundError("git not found")
+    output = subprocess.run([git, 'ls-remote', '--heads', remote, f'refs/heads/{branch}'],
+                            cwd=repo_dir, check=True, capture_output=True, text=True).stdout
+    return output.split()[0] if output.strip() else None
+
+
+def fetch_state(names, directory=".", repo_dir=".", remote="origin", branch=STATE_BRANCH):
+    """Fetch the state branch's latest commit only and write the named JSON files into directory.
+
+    Returns the names written; files missing from the branch are left alone.
+    """
+    git = find_git()
+    if git is None:
+        raise FileNotFoundError("git not found")
+    subprocess.run([git, 'fetch', '-q', '--depth=1', remote, f'+refs/heads/{branch}:refs/remotes/{remote}/{branch}'],
+                   cwd=repo_dir, check=True, capture_output=True)
+    request = "".join(f"refs/remotes/{remote}/{branch}:{name}\n" for name in names).encode('utf-8')
+    output = subprocess.run([git, 'cat-file', '--batch'], cwd=repo_dir, input=request,
+                            check=True, capture_output=True).stdout
+    written = []
+    for name in names:
+        header, _, output = output.partition(b"\n")
+        if header.endswith(b" missing"):
+            continue
+        size = int(header.split()[2])
+        content, output = output[:size], output[size + 1:]
+        write_json(os.path.join(directory, name), json.loads(content), indent=2)
+        written.append(name)
+    return written
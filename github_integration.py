@@ -4,20 +4,15 @@ GitHub Integration for Streamlit Cloud
 This script helps Streamlit Cloud read/write JSON files via GitHub
 """
 
-import json
-import os
 import time
-import subprocess
-from datetime import datetime
+
+from game_storage import read_json, write_json
 
 def read_from_github(filename):
     """Read JSON file from GitHub"""
     try:
         # For Streamlit Cloud, we'll use local files that are synced
-        if os.path.exists(filename):
-            with open(filename, 'r') as f:
-                return json.load(f)
-        return None
+        return read_json(filename)
     except Exception as e:
         print(f"Error reading {filename}: {e}")
         return None
@@ -25,14 +20,9 @@ def read_from_github(filename):
 def write_to_github(data, filename):
     """Write JSON file to GitHub"""
     try:
-        # Write to local file (will be synced to GitHub)
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
-        
-        # Commit and push to GitHub
-        subprocess.run(['git', 'add', filename], check=True)
-        subprocess.run(['git', 'commit', '-m', f'Update {filename} - {datetime.now()}'], check=True)
-        subprocess.run(['git', 'push', 'origin', 'main'], check=True)
+        # Write to local file; the sync daemon (sync_daemon.py) ships it,
+        # batched with whatever else changed, instead of a commit per write
+        write_json(filename, data, indent=2)
         
         return True
     except Exception as e:
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+JSON Patch (RFC 6902) Diffs and a Keyframed Patch Stream of the Game State
+Most state changes touch a handful of values - a balance, a position, one new
+message - yet every save used to rewrite (and every sync ship) the whole
+state. make_patch() turns two versions into the few RFC 6902 operations that
+differ, and apply_patch() replays them on a copy.
+
+PatchStreamWriter keeps a state file as a stream instead: a keyframe record
+with the full state, followed by one line per change holding only its patch.
+Every KEYFRAME_INTERVAL changes the stream is replaced by a fresh keyframe, so
+it stays small and a reader never replays more than that many patches.
+PatchReplica follows a stream and reads only the lines added since its last
+read.
+
+    {"seq": 1, "keyframe": {...}}
+    {"seq": 2, "patch": [{"op": "replace", "path": "/teams/2/balance", "value": 9800000}]}
+"""
+
+import os
+import threading
+
+from game_storage import (ANY_VERSION, VersionConflict, append_json, file_version,
+                          write_json)
+from state_codec import loads_json
+
+KEYFRAME_INTERVAL = 50  # patches between full keyframes in a stream
+LIST_SHIFT_LIMIT = 8    # entries dropped off the front of a list still diffed as a shift
+
+
+class PatchError(ValueError):
+    """Raised when a patch cannot be applied to a document"""
+
+
+def escape_token(key):
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+
+def parse_pointer(pointer):
+    """A JSON Pointer ("/teams/0/balance") as its list of reference tokens"""
+    if pointer == "":
+        return []
+    if not pointer.startswith('/'):
+        raise PatchError(f"invalid JSON pointer {pointer!r}")
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+
+
+def _same(old, new):
+    # 1 == True and 1 == 1.0 in Python, but they are different JSON values
+    return type(old) is type(new) and old == new
+
+
+def _diff(old, new, path, ops):
+    if _same(old, new):
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{escape_token(key)}"})
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": f"{path}/{escape_token(key)}", "value": value})
+            else:
+                _diff(old[key], value, f"{path}/{escape_token(key)}", ops)
+    elif isinstance(old, list) and isinstance(new, list):
+        _diff_list(old, new, path, ops)
+    else:
+        ops.append({"op": "replace", "path": path, "value": new})
+
+
+def _diff_list(old, new, path, ops):
+    # Capped logs (messages, game log) drop their oldest entries as new ones
+    # arrive; send that as removals at the front and appends at the end
+    for shift in range(1, min(len(old) // 2, LIST_SHIFT_LIMIT) + 1):
+        kept = len(old) - shift
+        if kept <= len(new) and old[shift:] == new[:kept]:
+            ops.extend({"op": "remove", "path": f"{path}/0"} for _ in range(shift))
+            ops.extend({"op": "add", "path": f"{path}/-", "value": value} for value in new[kept:])
+            return
+
+    # Otherwise keep the common head and tail and diff the middle element by element
+    head = 0
+    while head < min(len(old), len(new)) and _same(old[head], new[head]):
+        head += 1
+    tail = 0
+    while tail < min(len(old), len(new)) - head and _same(old[-1 - tail], new[-1 - tail]):
+        tail += 1
+    old_middle, new_middle = old[head:len(old) - tail], new[head:len(new) - tail]
+    for offset, (old_value, new_value) in enumerate(zip(old_middle, new_middle)):
+        _diff(old_value, new_value, f"{path}/{head + offset}", ops)
+    for _ in range(len(old_middle) - len(new_middle)):
+        ops.append({"op": "remove", "path": f"{path}/{head + len(new_middle)}"})
+    for offset in range(len(old_middle), len(new_middle)):
+        ops.append({"op": "add", "path": f"{path}/{head + offset}", "value": new_middle[offset]})
+
+
+def make_patch(old, new):
+    """RFC 6902 operations that turn old into new ([] if they are equal).
+
+    The operations share values with new rather than copying them.
+    """
+    ops = []
+    _diff(old, new, "", ops)
+    return ops
+
+
+def _child(container, token, op):
+    if isinstance(container, dict):
+        if token not in container:
+            raise PatchError(f"{op['op']} {op['path']}: no member {token!r}")
+        return container[token]
+    if isinstance(container, list):
+        return container[_index(container, token, op)]
+    raise PatchError(f"{op['op']} {op['path']}: {token!r} is inside a scalar")
+
+
+def _index(container, token, op, allow_end=False):
+    if allow_end and token == '-':
+        return len(container)
+    if not token.isdigit() or (token != '0' and token.startswith('0')):
+        raise PatchError(f"{op['op']} {op['path']}: invalid array index {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f"{op['op']} {op['path']}: index {index} out of range")
+    return index
+
+
+def _parent(root, tokens, op, copied):
+    """Walk to the container holding the last token, copying containers on the way"""
+    container = root
+    for token in [0] + tokens[:-1]:
+        child = container[token] if container is root else _child(container, token, op)
+        if isinstance(child, (dict, list)) and id(child) not in copied:
+            child = dict(child) if isinstance(child, dict) else list(child)
+            copied.add(id(child))
+            if isinstance(container, list):
+                container[token if container is root else _index(container, token, op)] = child
+            else:
+                container[token] = child
+        container = child
+    return container, tokens[-1] if tokens else 0
+
+
+def _get(root, tokens, op):
+    value = root[0]
+    for token in tokens:
+        value = _child(value, token, op)
+    return value
+
+
+def _add(root, tokens, value, op, copied):
+    if not tokens:
+        root[0] = value
+        return
+    container, token = _parent(root, tokens, op, copied)
+    if isinstance(container, dict):
+        container[token] = value
+    elif isinstance(container, list):
+        container.insert(_index(container, token, op, allow_end=True), value)
+    else:
+        raise PatchError(f"{op['op']} {op['path']}: parent is not a container")
+
+
+def _remove(root, tokens, op, copied):
+    if not tokens:
+        raise PatchError(f"{op['op']}: cannot remove the whole document")
+    container, token = _parent(root, tokens, op, copied)
+    value = _child(container, token, op)
+    if isinstance(container, dict):
+        del container[token]
+    else:
+        del container[_index(container, token, op)]
+    return value
+
+
+def _replace(root, tokens, value, op, copied):
+    if not tokens:
+        root[0] = value
+        return
+    container, token = _parent(root, tokens, op, copied)
+    _child(container, token, op)  # must exist
+    if isinstance(container, dict):
+        container[token] = value
+    else:
+        container[_index(container, token, op)] = value
+
+
+def apply_patch(doc, patch):
+    """Apply RFC 6902 operations and return the new document.
+
+    doc itself is never modified: only the containers on the changed paths are
+    copied, the rest is shared with doc. Raises PatchError if an operation
+    does not fit the document (or a "test" fails).
+    """
+    root = [doc]
+    copied = {id(root)}
+    for op in patch:
+        kind = op.get("op")
+        try:
+            tokens = parse_pointer(op["path"])
+            if kind == "add":
+                _add(root, tokens, op["value"], op, copied)
+            elif kind == "remove":
+                _remove(root, tokens, op, copied)
+            elif kind == "replace":
+                _replace(root, tokens, op["value"], op, copied)
+            elif kind == "move":
+                source = parse_pointer(op["from"])
+                if tokens[:len(source)] == source and tokens != source:
+                    raise PatchError(f"move {op['from']}: cannot move a value into itself")
+                value = _remove(root, source, op, copied) if source else root[0]
+                _add(root, tokens, value, op, copied)
+            elif kind == "copy":
+                _add(root, tokens, _get(root, parse_pointer(op["from"]), op), op, copied)
+            elif kind == "test":
+                if not _same(_get(root, tokens, op), op["value"]):
+                    raise PatchError(f"test {op['path']}: value differs")
+            else:
+                raise PatchError(f"unknown operation {kind!r}")
+        except KeyError as e:
+            raise PatchError(f"{kind} operation without {e}") from None
+    return root[0]
+
+
+def stream_path(path):
+    """Name of the patch stream kept for a JSON file (game_state.json -> game_state.patches.jsonl)"""
+    return os.path.splitext(path)[0] + ".patches.jsonl"
+
+
+class PatchStreamWriter:
+    """Writes successive versions of a document to a keyframe + patches stream file"""
+
+    def __init__(self, path, keyframe_interval=KEYFRAME_INTERVAL, checkpoint_path=None, durable=False):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.durable = durable  # fsync every record
+        self.checkpoint_path = checkpoint_path  # plain JSON copy rewritten at each keyframe
+        self.lock = threading.Lock()
+        self.state = None
+        self.version = None  # stream version after our last write
+        self.seq = 0
+        self.patches = 0     # patches since the last keyframe
+        self.stats = {"keyframes": 0, "patches": 0, "bytes": 0}
+
+    def _keyframe(self, state, expected_version):
+        record = {"seq": self.seq + 1, "keyframe": state}
+        version = write_json(self.path, record, expected_version=expected_version, durable=self.durable)
+        self.stats["bytes"] += version[2]
+        if self.checkpoint_path is not None:
+            self.stats["bytes"] += write_json(self.checkpoint_path, state, indent=2)[2]
+        self.patches = 0
+        self.stats["keyframes"] += 1
+        return version
+
+    def write(self, state, expected_version=ANY_VERSION):
+        """Append state as a patch against the last version (or a keyframe); returns the stream version.
+
+        The writer keeps a reference to state, so pass a new object each time
+        rather than modifying the last one.
+        """
+        with self.lock:
+            current = file_version(self.path)
+            if expected_version is not ANY_VERSION and current != expected_version:
+                raise VersionConflict(self.path, expected_version, current)
+            # Patches only make sense against the version we wrote ourselves
+            if self.state is None or current != self.version or self.patches >= self.keyframe_interval:
+                version = self._keyframe(state, current if expected_version is not ANY_VERSION else ANY_VERSION)
+            else:
+                patch = make_patch(self.state, state)
+                if not patch:
+                    return current
+                try:
+                    version = append_json(self.path, {"seq": self.seq + 1, "patch": patch}, expected_version=current,
+                                          durable=self.durable)
+                except VersionConflict:
+                    if expected_version is not ANY_VERSION:
+                        raise
+                    version = self._keyframe(state, ANY_VERSION)
+                else:
+                    self.patches += 1
+                    self.stats["patches"] += 1
+                    self.stats["bytes"] += version[2] - current[2]
+            self.state, self.version = state, version
+            self.seq += 1
+            return version
+
+
+class PatchReplica:
+    """Follows a patch stream file, reading only what was appended since the last read"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.state = None
+        self.seq = 0
+        self._inode = None
+        self._offset = 0  # bytes of the file already applied
+
+    def read(self):
+        """Return (state, version) of the stream; (None, None) if it does not exist"""
+        with self.lock:
+            try:
+                f = open(self.path, 'rb')
+            except FileNotFoundError:
+                return None, None
+            with f:
+                # The version is taken before reading, so a write racing with
+                # us shows up as a change on the next read
+                stat = os.fstat(f.fileno())
+                version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                if stat.st_ino != self._inode or stat.st_size < self._offset:
+                    # Replaced by a new keyframe: start over
+                    self.state, self.seq, self._inode, self._offset = None, 0, stat.st_ino, 0
+                f.seek(self._offset)
+                data = f.read(stat.st_size - self._offset)
+            for line in data.split(b"\n"):
+                if line.strip():
+                    try:
+                        record = loads_json(line)
+                    except ValueError:
+                        break  # the writer is still appending this line
+                    if "keyframe" in record:
+                        self.state = record["keyframe"]
+                    else:
+                        self.state = apply_patch(self.state, record["patch"])
+                    self.seq = record["seq"]
+                self._offset += len(line) + 1
+            self._offset = min(self._offset, stat.st_size)
+            return self.state, version
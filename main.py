@@ -2,14 +2,23 @@ import sys
 import math
 import random
 import time
-import json
 import os
+from collections import OrderedDict, deque
 from datetime import datetime
 from dataclasses import dataclass
 import pygame
 
+from autosave import AUTOSAVE_FILE, AutoSaver, discard_autosave, load_autosave
+from board_svg import tile_positions
+from frame_stream import FRAME_STREAM_FILE, FrameStreamer
+from game_state_manager import GameStateManager, delivery_order
+from ownership import OwnershipIndex
+from rent_engine import RentEngine
+from trading_engine import TradingEngine
+
 
 FPS = 60
+WINDOW_SIZE = (1400, 900)
 BOARD_SPACES = 24
 SIDEBAR_W = 420
 UI_H = 120
@@ -18,6 +27,16 @@ MARGIN = 20
 CHANCE_TILES = [4, 8, 16, 20]
 MYSTERY_TILES = [2, 10, 14, 22]
 
+MAX_COMMAND_ACKS = 50  # acknowledgements kept in the exported Streamlit state
+LATENCY_WINDOW = 200   # recent command latencies used for the exported metrics
+DEDUP_WINDOW = 300.0   # seconds a command id is remembered to skip client retries
+MAX_SEEN_COMMANDS = 10000
+TRADE_ACTIONS = ('open_trade', 'bid', 'close_trade', 'cancel_trade')  # any team, any time
+
+
+class CommandRejected(Exception):
+    """Raised when a Streamlit command cannot be applied in the current game state"""
+
 
 @dataclass
 class Team:
@@ -29,42 +48,16 @@ class Team:
 
 
 class Game:
-    def __init__(self):
-        pygame.init()
-        pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)  # Initialize sound mixer
-        pygame.display.set_caption("Arthvidya Monopoly — Python")
-        # Start in windowed, resizable mode
-        self.screen = pygame.display.set_mode((1400, 900), pygame.RESIZABLE)
-        self.screen_w, self.screen_h = self.screen.get_size()
-        self.clock = pygame.time.Clock()
-        # Enhanced fonts with better typography and fallbacks
-        # Try premium fonts first, then fall back to system fonts
-        self.font = (pygame.font.SysFont("arial", 18, bold=True) or 
-                     pygame.font.SysFont("helvetica", 18, bold=True) or 
-                     pygame.font.SysFont("segoeui", 18, bold=True) or 
-                     pygame.font.SysFont("bahnschrift", 18, bold=True))
-        
-        self.big_font = (pygame.font.SysFont("arial", 28, bold=True) or 
-                         pygame.font.SysFont("helvetica", 28, bold=True) or 
-                         pygame.font.SysFont("segoeui", 28, bold=True) or 
-                         pygame.font.SysFont("bahnschrift", 28, bold=True))
-        
-        # Premium heading fonts
-        self.title_font = (pygame.font.SysFont("arial black", 42, bold=True) or 
-                           pygame.font.SysFont("impact", 42, bold=True) or 
-                           pygame.font.SysFont("arial", 42, bold=True) or 
-                           pygame.font.SysFont("segoeui", 42, bold=True))
-        
-        self.subtitle_font = (pygame.font.SysFont("arial", 28, bold=True) or 
-                              pygame.font.SysFont("helvetica", 28, bold=True) or 
-                              pygame.font.SysFont("segoeui", 28, bold=True) or 
-                              pygame.font.SysFont("bahnschrift", 28, bold=True))
-        
-        # Special money tracker font
-        self.money_font = (pygame.font.SysFont("arial", 22, bold=True) or 
-                           pygame.font.SysFont("helvetica", 22, bold=True) or 
-                           pygame.font.SysFont("segoeui", 22, bold=True) or 
-                           pygame.font.SysFont("bahnschrift", 22, bold=True))
+    def __init__(self, autosave_path=AUTOSAVE_FILE, state_manager=None, headless=False, frame_stream_path=None):
+        # A headless game has no window, fonts or sounds; it is driven only by
+        # Streamlit commands (several of them are hosted by session_manager.py)
+        self.headless = headless
+        if headless:
+            self.screen = None
+            self.screen_w, self.screen_h = WINDOW_SIZE
+            self.clock = None
+        else:
+            self._init_display()
 
         self.teams = [
             Team("T1", "Team 1", (211, 47, 47), 10_000_000, 0),
@@ -130,6 +123,11 @@ class Game:
         self.chance_cards = self._build_chance_cards()
         self.mystery_cards = self._build_mystery_cards()
         self.property_data = self._build_property_data()
+        # Who owns what and teams by id, kept up to date by _set_owner(); rent and trades use it too
+        self.ownership = OwnershipIndex(self.property_data, self.teams)
+        self.rent = RentEngine(self.property_data, self.ownership)
+        # Concurrent sealed-bid and auction trades run from the Streamlit pages
+        self.trading = TradingEngine(self.teams, index=self.ownership)
 
         # Try loading a board image from common filenames
         self.board_image_original = None
@@ -139,7 +137,7 @@ class Game:
             "monopoly_board.jpg",
             "board.jpg",
             "board.png",
-        ]:
+        ] if not headless else []:
             try:
                 self.board_image_original = pygame.image.load(name).convert()
                 break
@@ -165,14 +163,70 @@ class Game:
         self.last_dice_roll = None
         
         # Sound system initialization
-        self.sounds = self._init_sounds()
+        self.sounds = self._init_sounds() if not headless else {}
         
         # Streamlit integration
         self.streamlit_enabled = True
-        self.game_state_file = "game_state.json"
-        self.player_actions_file = "player_actions.json"
-        self.control_commands_file = "control_commands.json"
+        self.state_manager = state_manager if state_manager is not None else GameStateManager(init_files=False)
+        self.streamlit_messages = []
+        self._batch_events = None  # events held back while a command batch runs
+        self._last_streamlit_state = None
+        self.command_acks = {}
+        self.command_latencies = deque(maxlen=LATENCY_WINDOW)
+        self.command_metrics = {"applied": 0, "rejected": 0, "duplicates": 0, "latency_ms": {}}
+        self.seen_commands = OrderedDict()  # command_id -> when the game first processed it
+        self.streamlit_property_table = self._build_streamlit_property_table()
+        
+        # Crash-safe autosave (None disables it); pick up the game it recorded
+        self.autosaver = None
+        self._state_dirty = True  # something changed since the last autosave snapshot
+        if autosave_path is not None:
+            self._resume_from_autosave(autosave_path)
+            self.autosaver = AutoSaver(autosave_path)
         self.init_streamlit_files()
+        
+        # Board frames for remote viewers (None disables it; needs a screen to draw on)
+        self.frame_streamer = None
+        if frame_stream_path is not None and not headless:
+            self.frame_streamer = FrameStreamer(frame_stream_path)
+
+    def _init_display(self):
+        """Open the game window and load the fonts"""
+        pygame.init()
+        pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)  # Initialize sound mixer
+        pygame.display.set_caption("Arthvidya Monopoly — Python")
+        # Start in windowed, resizable mode
+        self.screen = pygame.display.set_mode(WINDOW_SIZE, pygame.RESIZABLE)
+        self.screen_w, self.screen_h = self.screen.get_size()
+        self.clock = pygame.time.Clock()
+        # Enhanced fonts with better typography and fallbacks
+        # Try premium fonts first, then fall back to system fonts
+        self.font = (pygame.font.SysFont("arial", 18, bold=True) or 
+                     pygame.font.SysFont("helvetica", 18, bold=True) or 
+                     pygame.font.SysFont("segoeui", 18, bold=True) or 
+                     pygame.font.SysFont("bahnschrift", 18, bold=True))
+        
+        self.big_font = (pygame.font.SysFont("arial", 28, bold=True) or 
+                         pygame.font.SysFont("helvetica", 28, bold=True) or 
+                         pygame.font.SysFont("segoeui", 28, bold=True) or 
+                         pygame.font.SysFont("bahnschrift", 28, bold=True))
+        
+        # Premium heading fonts
+        self.title_font = (pygame.font.SysFont("arial black", 42, bold=True) or 
+                           pygame.font.SysFont("impact", 42, bold=True) or 
+                           pygame.font.SysFont("arial", 42, bold=True) or 
+                           pygame.font.SysFont("segoeui", 42, bold=True))
+        
+        self.subtitle_font = (pygame.font.SysFont("arial", 28, bold=True) or 
+                              pygame.font.SysFont("helvetica", 28, bold=True) or 
+                              pygame.font.SysFont("segoeui", 28, bold=True) or 
+                              pygame.font.SysFont("bahnschrift", 28, bold=True))
+        
+        # Special money tracker font
+        self.money_font = (pygame.font.SysFont("arial", 22, bold=True) or 
+                           pygame.font.SysFont("helvetica", 22, bold=True) or 
+                           pygame.font.SysFont("segoeui", 22, bold=True) or 
+                           pygame.font.SysFont("bahnschrift", 22, bold=True))
 
     def _init_sounds(self):
         """Initialize sound effects using pygame's built-in sound generation"""
@@ -286,6 +340,8 @@ class Game:
     
     def _play_sound(self, sound_name):
         """Play a sound effect"""
+        if self.headless:
+            return
         print(f"Attempting to play sound: {sound_name}")
         if sound_name in self.sounds and self.sounds[sound_name] is not None:
             try:
@@ -297,18 +353,27 @@ class Game:
         else:
             print(f"Sound {sound_name} not available or is None")
 
+    def _build_streamlit_property_table(self):
+        """Static per-property data exported with every Streamlit state"""
+        table = {}
+        for i, prop_info in self.property_data.items():
+            color = prop_info["color"]
+            table[str(i)] = {
+                "name": prop_info["name"],
+                "price": prop_info["price"],
+                "rent": prop_info["rent"],
+                "color": f"#{color[0]:02x}{color[1]:02x}{color[2]:02x}",
+                "sell_price": self._sell_price(i)
+            }
+        return table
+
     def init_streamlit_files(self):
         """Initialize Streamlit communication files"""
-        if not os.path.exists(self.game_state_file):
+        if self.state_manager.state_version() is None:
             self.save_streamlit_state()
         
-        if not os.path.exists(self.player_actions_file):
-            with open(self.player_actions_file, 'w') as f:
-                json.dump({}, f)
-        
-        if not os.path.exists(self.control_commands_file):
-            with open(self.control_commands_file, 'w') as f:
-                json.dump({}, f)
+        self.state_manager.init_files()
+        self.state_manager.publish_shared_snapshot()
 
     def save_streamlit_state(self):
         """Save current game state for Streamlit"""
@@ -323,9 +388,13 @@ class Game:
                 "current_position": self.teams[self.current_idx].pos if self.teams else 0,
                 "properties": {},
                 "teams": [],
-                "messages": [],
+                "messages": list(self.streamlit_messages),
                 "pending_actions": {},
-                "game_log": []
+                "game_log": [],
+                "property_table": self.streamlit_property_table,
+                "portfolios": {},
+                "command_acks": dict(self.command_acks),
+                "command_metrics": dict(self.command_metrics)
             }
             
             # Convert teams data
@@ -337,18 +406,39 @@ class Game:
                     "balance": team.balance,
                     "pos": team.pos
                 })
+                state["portfolios"][team.team_id] = {
+                    "properties": [],
+                    "total_value": 0,
+                    "rent_exposure": 0,
+                    "sale_value": 0
+                }
+            
+            # Convert properties data; portfolios are summed here once per
+            # state so the team pages only have to display them
+            for i in sorted(self.ownership.owners):
+                owner = self.ownership.owners[i]
+                prop_name = self.property_data.get(i, {}).get('name', f'Property {i}')
+                state["properties"][str(i)] = {
+                    "owner": owner,
+                    "name": prop_name
+                }
+                row = self.streamlit_property_table.get(str(i))
+                portfolio = state["portfolios"].get(owner)
+                if row is not None and portfolio is not None:
+                    portfolio["properties"].append(i)
+                    portfolio["total_value"] += row["price"]
+                    portfolio["rent_exposure"] += row["rent"]
+                    portfolio["sale_value"] += row["sell_price"]
+            
+            state.update(self.trading.export())
+            
+            # This runs every frame; only touch the file when something changed
+            if state == self._last_streamlit_state:
+                return
             
-            # Convert properties data
-            for i, prop in enumerate(self.properties):
-                if prop["owner"] is not None:
-                    prop_name = self.property_data.get(i, {}).get('name', f'Property {i}')
-                    state["properties"][str(i)] = {
-                        "owner": prop["owner"],
-                        "name": prop_name
-                    }
-            
-            with open(self.game_state_file, 'w') as f:
-                json.dump(state, f, indent=2)
+            self._state_dirty = True
+            self.state_manager.save_game_state(state)
+            self._last_streamlit_state = state
                 
         except Exception as e:
             print(f"Error saving Streamlit state: {e}")
@@ -358,26 +448,25 @@ class Game:
         if not self.streamlit_enabled:
             return
         
-        try:
-            with open(self.game_state_file, 'r') as f:
-                state = json.load(f)
-            
-            if 'messages' not in state:
-                state['messages'] = []
-            
-            state['messages'].append({
-                'timestamp': datetime.now().isoformat(),
-                'message': message
-            })
-            
-            # Keep only last 50 messages
-            state['messages'] = state['messages'][-50:]
-            
-            with open(self.game_state_file, 'w') as f:
-                json.dump(state, f, indent=2)
-                
-        except Exception as e:
-            print(f"Error logging Streamlit event: {e}")
+        timestamp = datetime.now().isoformat()
+        if self._batch_events is not None:
+            # Published only if the whole batch applies (see _apply_command_batch)
+            self._batch_events.append((message, timestamp))
+            return
+        self._record_event(message, timestamp)
+        self.save_streamlit_state()
+
+    def _record_event(self, message, timestamp):
+        self._state_dirty = True
+        self.streamlit_messages.append({
+            'timestamp': timestamp,
+            'message': message
+        })
+        
+        # Keep only last 50 messages
+        del self.streamlit_messages[:-50]
+        
+        self.state_manager.log_event(message, timestamp)
 
     def check_streamlit_commands(self):
         """Check for commands from Streamlit control center"""
@@ -385,90 +474,242 @@ class Game:
             return
         
         try:
-            with open(self.control_commands_file, 'r') as f:
-                commands = json.load(f)
+            # Take every queued command in one locked step so commands sent
+            # while we are processing them are kept for the next frame
+            commands = self.state_manager.drain_control_commands()
+            
+            for key, command_data in delivery_order(commands):
+                if not self._first_delivery(command_data):
+                    continue
+                if command_data.get('command') == 'batch':
+                    self._apply_command_batch(command_data)
+                    continue
+                try:
+                    self._apply_control_command(command_data)
+                except CommandRejected as e:
+                    self._ack_command(command_data, "rejected", reason=str(e))
+                except Exception as e:
+                    print(f"Error processing Streamlit command {command_data.get('command')}: {e}")
+                    self._ack_command(command_data, "rejected", reason=f"error: {e}")
+                else:
+                    self._ack_command(command_data, "applied")
             
-            for timestamp, command_data in list(commands.items()):
-                command = command_data.get('command')
-                
-                if command == 'roll_dice' and not self.moving:
-                    self.roll_dice()
-                    self.log_streamlit_event(f"Control Center: Rolled dice")
-                elif command == 'next_turn':
-                    self.next_turn()
-                    self.log_streamlit_event(f"Control Center: Advanced turn")
-                elif command == 'buy_property':
-                    self.buy_current()
-                    self.log_streamlit_event(f"Control Center: Attempted property purchase")
-                elif command == 'sell_property':
-                    self._show_sell_property()
-                    self.log_streamlit_event(f"Control Center: Opened sell property menu")
-                elif command == 'test_chance':
-                    self._test_chance()
-                    self.log_streamlit_event(f"Control Center: Triggered chance")
-                elif command == 'test_mystery':
-                    self._test_mystery()
-                    self.log_streamlit_event(f"Control Center: Triggered mystery")
-                elif command == 'start_trading':
-                    self._start_trading()
-                    self.log_streamlit_event(f"Control Center: Started trading")
-                elif command == 'reset_game':
-                    self._reset_game()
-                    self.log_streamlit_event(f"Control Center: Reset game")
-                
-                # Remove processed command
-                del commands[timestamp]
-                with open(self.control_commands_file, 'w') as f:
-                    json.dump(commands, f)
+            if commands:
+                self.save_streamlit_state()
                     
         except Exception as e:
             print(f"Error processing Streamlit commands: {e}")
 
+    def _apply_control_command(self, command_data):
+        """Apply one control center command; raises CommandRejected if it can't run now"""
+        command = command_data.get('command')
+        
+        if command == 'roll_dice':
+            if self.moving:
+                raise CommandRejected("dice are already rolling")
+            self.roll_dice()
+            self.log_streamlit_event(f"Control Center: Rolled dice")
+        elif command == 'next_turn':
+            self.next_turn()
+            self.log_streamlit_event(f"Control Center: Advanced turn")
+        elif command == 'buy_property':
+            if not self.can_buy(self.teams[self.current_idx]):
+                raise CommandRejected("current tile can't be bought")
+            self.buy_current()
+            self.log_streamlit_event(f"Control Center: Bought property")
+        elif command == 'sell_property':
+            self._show_sell_property()
+            self.log_streamlit_event(f"Control Center: Opened sell property menu")
+        elif command == 'test_chance':
+            self._test_chance()
+            self.log_streamlit_event(f"Control Center: Triggered chance")
+        elif command == 'test_mystery':
+            self._test_mystery()
+            self.log_streamlit_event(f"Control Center: Triggered mystery")
+        elif command == 'start_trading':
+            self._start_trading()
+            self.log_streamlit_event(f"Control Center: Started trading")
+        elif command in TRADE_ACTIONS:
+            team = self._command_team(command_data) if command in ('open_trade', 'bid') else None
+            self._apply_trade_action(team, command, command_data)
+        elif command == 'reset_game':
+            self._reset_game()
+            self.log_streamlit_event(f"Control Center: Reset game")
+        elif command == 'set_balance':
+            team = self._command_team(command_data)
+            balance = command_data.get('balance')
+            if not isinstance(balance, int) or isinstance(balance, bool):
+                raise CommandRejected(f"invalid balance {balance!r}")
+            self._save_state()
+            team.balance = balance
+            self.log_streamlit_event(f"Control Center: Set {team.name} balance to ₹{balance:,}")
+        elif command == 'set_current_player':
+            team = self._command_team(command_data)
+            self._save_state()
+            self._change_turn(self.ownership.team_index[team.team_id])
+            self.log_streamlit_event(f"Control Center: Turn set to {team.name}")
+        else:
+            raise CommandRejected(f"unknown command {command!r}")
+
+    def _command_team(self, command_data):
+        team_id = command_data.get('team_id')
+        team = self.ownership.team(team_id)
+        if team is None:
+            raise CommandRejected(f"unknown team {team_id!r}")
+        return team
+
+    def _apply_command_batch(self, batch_data):
+        """Apply an ordered list of commands in this frame, all or nothing, with one acknowledgement"""
+        commands = batch_data.get('commands', [])
+        
+        # One checkpoint for the whole batch: undoing it restores the game and
+        # the undo history as they were before the first command
+        history = list(self.game_history)
+        self._save_state()
+        checkpoint = self.game_history[-1]
+        
+        # The steps' messages and log events wait for the outcome, so a
+        # rolled-back batch leaves no trace of changes that never happened
+        self._batch_events = []
+        try:
+            for step, command_data in enumerate(commands, 1):
+                try:
+                    self._apply_control_command(command_data)
+                except CommandRejected as e:
+                    raise CommandRejected(f"step {step} ({command_data.get('command')}): {e}")
+        except Exception as e:
+            self._batch_events = None
+            self.game_history = (history + [checkpoint])[-self.max_history_size:]
+            self._undo_state()
+            self._ack_command(batch_data, "rejected", reason=str(e), steps=len(commands))
+            self.log_streamlit_event(f"Control Center: Batch rejected, {e}")
+            return
+        
+        events, self._batch_events = self._batch_events, None
+        for message, timestamp in events:
+            self._record_event(message, timestamp)
+        self.game_history = (history + [checkpoint])[-self.max_history_size:]
+        self._ack_command(batch_data, "applied", steps=len(commands))
+
+    def _first_delivery(self, command_data):
+        """False if this command id was already processed (a client retry or a duplicate queue entry)"""
+        now = time.time()
+        while self.seen_commands and (len(self.seen_commands) > MAX_SEEN_COMMANDS
+                                      or next(iter(self.seen_commands.values())) < now - DEDUP_WINDOW):
+            self.seen_commands.popitem(last=False)
+        
+        self._state_dirty = True
+        command_id = command_data.get('command_id')
+        if command_id is None:
+            return True
+        if command_id in self.seen_commands:
+            # The first delivery's ack stands; don't apply or ack it twice
+            self.command_metrics["duplicates"] = self.command_metrics.get("duplicates", 0) + 1
+            return False
+        self.seen_commands[command_id] = now
+        return True
+
+    def _ack_command(self, command_data, status, **details):
+        """Record a command's outcome for the clients; it goes out with the next state save"""
+        command_id = command_data.get('command_id')
+        now = time.time()
+        sent_at = command_data.get('sent_at')
+        
+        self.command_metrics[status] = self.command_metrics.get(status, 0) + 1
+        if isinstance(sent_at, (int, float)):
+            # Client clocks on other machines may be skewed; clamp at zero
+            details["latency_ms"] = max(0.0, round((now - sent_at) * 1000, 1))
+            self.command_latencies.append(details["latency_ms"])
+            latencies = sorted(self.command_latencies)
+            self.command_metrics["latency_ms"] = {
+                "count": len(latencies),
+                "mean": round(sum(latencies) / len(latencies), 1),
+                "p50": latencies[len(latencies) // 2],
+                "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                "max": latencies[-1]
+            }
+        
+        if command_id is None:
+            return
+        self.command_acks.pop(command_id, None)
+        self.command_acks[command_id] = dict(details, status=status, at=now,
+                                             command=command_data.get('command') or command_data.get('action'))
+        while len(self.command_acks) > MAX_COMMAND_ACKS:
+            del self.command_acks[next(iter(self.command_acks))]
+
     def check_streamlit_player_actions(self):
         """Check for actions from Streamlit players"""
         if not self.streamlit_enabled:
             return
         
         try:
-            with open(self.player_actions_file, 'r') as f:
-                actions = json.load(f)
+            actions = self.state_manager.drain_player_actions()
             
-            current_team_id = self.teams[self.current_idx].team_id
+            for key, action_data in delivery_order(actions):
+                if not self._first_delivery(action_data):
+                    continue
+                # Queued actions carry their team; older clients key them by team
+                team_id = action_data.get('team_id', key)
+                try:
+                    self._apply_player_action(team_id, action_data)
+                except CommandRejected as e:
+                    self._ack_command(action_data, "rejected", reason=str(e))
+                except Exception as e:
+                    print(f"Error processing Streamlit action {action_data.get('action')}: {e}")
+                    self._ack_command(action_data, "rejected", reason=f"error: {e}")
+                else:
+                    self._ack_command(action_data, "applied")
             
-            for team_id, action_data in list(actions.items()):
-                if team_id == current_team_id:
-                    action = action_data.get('action')
-                    
-                    if action == 'roll_dice' and not self.moving:
-                        self.roll_dice()
-                        self.log_streamlit_event(f"{self.teams[self.current_idx].name}: Rolled dice")
-                    elif action == 'end_turn':
-                        self.next_turn()
-                        self.log_streamlit_event(f"{self.teams[self.current_idx].name}: Ended turn")
-                    elif action == 'buy_property':
-                        self.buy_current()
-                        self.log_streamlit_event(f"{self.teams[self.current_idx].name}: Attempted property purchase")
-                    elif action == 'sell_property':
-                        self._show_sell_property()
-                        self.log_streamlit_event(f"{self.teams[self.current_idx].name}: Opened sell property menu")
-                    elif action == 'take_chance' and self.show_chance_confirm:
-                        self._confirm_chance_yes()
-                        self.log_streamlit_event(f"{self.teams[self.current_idx].name}: Took chance")
-                    elif action == 'spin_mystery' and self.show_mystery:
-                        self._start_spin_wheel()
-                        self.log_streamlit_event(f"{self.teams[self.current_idx].name}: Spun mystery wheel")
-                    elif action == 'start_trading':
-                        self._start_trading()
-                        self.log_streamlit_event(f"{self.teams[self.current_idx].name}: Started trading")
-                
-                # Remove processed action
-                del actions[team_id]
-                with open(self.player_actions_file, 'w') as f:
-                    json.dump(actions, f)
+            if actions:
+                self.save_streamlit_state()
                     
         except Exception as e:
             print(f"Error processing Streamlit player actions: {e}")
 
+    def _apply_player_action(self, team_id, action_data):
+        """Apply one team's action; raises CommandRejected if it can't run now"""
+        action = action_data.get('action')
+        if action in TRADE_ACTIONS:
+            # Trades run alongside the turns, so they don't wait for the team's turn
+            self._apply_trade_action(self._command_team({'team_id': team_id}), action, action_data)
+            return
+        
+        team = self.teams[self.current_idx]
+        if team_id != team.team_id:
+            raise CommandRejected(f"it's {team.name}'s turn")
+        
+        if action == 'roll_dice':
+            if self.moving:
+                raise CommandRejected("dice are already rolling")
+            self.roll_dice()
+            self.log_streamlit_event(f"{team.name}: Rolled dice")
+        elif action == 'end_turn':
+            self.next_turn()
+            self.log_streamlit_event(f"{team.name}: Ended turn")
+        elif action == 'buy_property':
+            if not self.can_buy(team):
+                raise CommandRejected("current tile can't be bought")
+            self.buy_current()
+            self.log_streamlit_event(f"{team.name}: Bought property")
+        elif action == 'sell_property':
+            self._show_sell_property()
+            self.log_streamlit_event(f"{team.name}: Opened sell property menu")
+        elif action == 'take_chance':
+            if not self.show_chance_confirm:
+                raise CommandRejected("no chance card is waiting")
+            self._confirm_chance_yes()
+            self.log_streamlit_event(f"{team.name}: Took chance")
+        elif action == 'spin_mystery':
+            if not self.show_mystery:
+                raise CommandRejected("the mystery wheel is not open")
+            self._start_spin_wheel()
+            self.log_streamlit_event(f"{team.name}: Spun mystery wheel")
+        elif action == 'start_trading':
+            self._start_trading()
+            self.log_streamlit_event(f"{team.name}: Started trading")
+        else:
+            raise CommandRejected(f"unknown action {action!r}")
+
     def _build_chance_cards(self):
         return [
             {
@@ -634,28 +875,9 @@ class Game:
         return board_rect, sidebar_rect
 
     def _compute_positions(self):
-        cells = 7
+        # Counter-clockwise path starting from GO (bottom-left); board_svg.py draws the same layout
         br = self.board_rect
-        cell_w = br.width // cells
-        cell_h = br.height // cells
-        self.positions = []
-        
-        # Counter-clockwise path starting from GO (bottom-left)
-        # Bottom row: GO (0) to right edge (1-6)
-        for i in range(cells):
-            self.positions.append((br.x + i * cell_w + cell_w // 2, br.y + br.height - cell_h // 2))
-        
-        # Right edge: bottom-right (7) to top-right (8-12)
-        for i in range(1, cells):
-            self.positions.append((br.x + br.width - cell_w // 2, br.y + (cells - 1 - i) * cell_h + cell_h // 2))
-        
-        # Top row: top-right (13) to left (14-19)
-        for i in range(cells - 2, -1, -1):
-            self.positions.append((br.x + i * cell_w + cell_w // 2, br.y + cell_h // 2))
-        
-        # Left edge: top-left (20) to bottom-left (21-23)
-        for i in range(1, cells - 1):
-            self.positions.append((br.x + cell_w // 2, br.y + i * cell_h + cell_h // 2))
+        self.positions = tile_positions(br.x, br.y, br.width, br.height)
 
     def run(self):
         while True:
@@ -664,6 +886,11 @@ class Game:
                 break
             self._update()
             self._draw()
+            if self.frame_streamer is not None:
+                self.frame_streamer.capture(self.screen)
+        if self.autosaver is not None:
+            self.autosaver.close()
+        self.state_manager.close()
         pygame.quit()
         sys.exit(0)
 
@@ -671,6 +898,8 @@ class Game:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
+            if event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+                self._state_dirty = True
             if event.type == pygame.VIDEORESIZE:
                 # Recreate window with new size and recompute layout/positions
                 self.screen = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
@@ -785,6 +1014,7 @@ class Game:
 
     def _update(self):
         if self.moving:
+            self._state_dirty = True
             # Slow smooth interpolation
             self.move_progress += 0.06
             if self.move_progress >= 1.0:
@@ -822,6 +1052,8 @@ class Game:
                         team.balance -= 1_500_000
                         self.mystery_feedback = "Event Penalty: Lost ₹1.5M"
                         self.feedback_timer = 120
+                    else:
+                        self._collect_rent(team)
                     # No auto-advance; user ends turn
                 else:
                     # prepare next segment
@@ -833,24 +1065,35 @@ class Game:
         
         # Auto-apply mystery after spin completes
         if self.selected_mystery and not self.spinning and self.overlay_timer > 0:
+            self._state_dirty = True
             self.overlay_timer -= 1
             if self.overlay_timer <= 0:
                 self._apply_mystery()
         
         # Update feedback timer
         if (self.chance_feedback or self.mystery_feedback or self.sell_property_feedback) and self.feedback_timer > 0:
+            self._state_dirty = True
             self.feedback_timer -= 1
             if self.feedback_timer <= 0:
                 self.chance_feedback = None
                 self.mystery_feedback = None
                 self.sell_property_feedback = None
         
+        # Settle the trades that are due
+        self._update_trades()
+        
         # Check Streamlit commands and actions
         self.check_streamlit_commands()
         self.check_streamlit_player_actions()
         
         # Save state for Streamlit
         self.save_streamlit_state()
+        
+        # Journal the frame's changes on the autosave thread; an idle frame
+        # has nothing new, so skip building the snapshot
+        if self.autosaver is not None and self._state_dirty:
+            self._state_dirty = False
+            self.autosaver.submit(self._autosave_state())
 
     def _record_trail(self):
         team = self.teams[self.current_idx]
@@ -881,19 +1124,29 @@ class Game:
         # Save state before advancing turn
         self._save_state()
         # advance to next, honoring skip flags
+        index = self.current_idx
         attempts = 0
         while attempts < len(self.teams):
-            self.current_idx = (self.current_idx + 1) % len(self.teams)
-            team = self.teams[self.current_idx]
+            index = (index + 1) % len(self.teams)
+            team = self.teams[index]
             if self.skip_next_turn.get(team.team_id):
                 self.skip_next_turn[team.team_id] = False
                 attempts += 1
                 continue
             break
+        self._change_turn(index)
         
         # Log turn advancement
         self.log_streamlit_event(f"Turn advanced to {self.teams[self.current_idx].name}")
 
+    def _change_turn(self, index):
+        """Hand the turn to teams[index]; every turn change goes through here so per-turn rules follow it"""
+        if index == self.current_idx:
+            return
+        previous_id = self.teams[self.current_idx].team_id
+        self.current_idx = index
+        self.rent.turn_changed(previous_id, self.teams[index].team_id)
+
     def can_buy(self, team):
         space = team.pos % BOARD_SPACES
         # Disallow buying on GO, special tiles and free parking / penalty tiles
@@ -909,7 +1162,7 @@ class Game:
             return
         # Save state before buying property
         self._save_state()
-        self.properties[team.pos % BOARD_SPACES]["owner"] = team.team_id
+        self._set_owner(team.pos % BOARD_SPACES, team.team_id)
         
         # Play property purchase sound
         self._play_sound('purchase')
@@ -918,6 +1171,29 @@ class Game:
         prop_name = self.property_data.get(team.pos, {}).get('name', f'Property {team.pos}')
         self.log_streamlit_event(f"{team.name} bought {prop_name}")
 
+    def _set_owner(self, index, team_id):
+        """Change a property's owner (None: unowned); every ownership change goes through here"""
+        self.properties[index]["owner"] = team_id
+        self.ownership.set_owner(index, team_id)
+
+    def _collect_rent(self, team):
+        """Charge team the rent for the property it landed on, if another team owns it"""
+        index = team.pos % BOARD_SPACES
+        rent = self.rent.resolve(index, team.team_id)
+        if rent is None:
+            return
+        owner = self._command_team({'team_id': rent['owner']})
+        name = self.property_data[index]['name']
+        if rent['waived']:
+            self.mystery_feedback = f"No rent this turn: {name} is free!"
+            self.log_streamlit_event(f"{team.name} landed on {owner.name}'s {name}, rent waived")
+        else:
+            team.balance -= rent['amount']
+            owner.balance += rent['amount']
+            self.mystery_feedback = f"Paid ₹{rent['amount']/1_000_000:.2f}M rent to {owner.name}"
+            self.log_streamlit_event(f"{team.name} paid ₹{rent['amount']:,} rent to {owner.name} for {name}")
+        self.feedback_timer = 120
+
     def _trigger_chance(self):
         # Choose a random chance question that hasn't been used recently
         available_questions = [card for card in self.chance_cards if card not in self.used_chance_questions]
@@ -1043,7 +1319,17 @@ class Game:
 
     def _save_state(self):
         """Save current game state to history for undo functionality"""
-        state = {
+        self._state_dirty = True
+        state = self._snapshot_state()
+        
+        # Add to history and limit size
+        self.game_history.append(state)
+        if len(self.game_history) > self.max_history_size:
+            self.game_history.pop(0)
+
+    def _snapshot_state(self):
+        """Copy of the game state that undo restores"""
+        return {
             'teams': [
                 {
                     'team_id': team.team_id,
@@ -1081,21 +1367,22 @@ class Game:
             'spin_progress': self.spin_progress,
             'selected_mystery': self.selected_mystery,
             'used_mysteries': self.used_mysteries.copy(),
-            'used_chance_questions': self.used_chance_questions.copy()
+            'used_chance_questions': self.used_chance_questions.copy(),
+            # Open trades with their bids: the escrowed money comes back with the balances
+            'trades': self.trading.snapshot(),
+            'rent_waivers': dict(self.rent.waivers)
         }
-        
-        # Add to history and limit size
-        self.game_history.append(state)
-        if len(self.game_history) > self.max_history_size:
-            self.game_history.pop(0)
 
     def _undo_state(self):
         """Restore previous game state from history"""
         if not self.game_history:
             return False
         
-        state = self.game_history.pop()
-        
+        self._restore_state(self.game_history.pop())
+        return True
+
+    def _restore_state(self, state):
+        """Restore a _snapshot_state() copy; the game takes ownership of its lists and dicts"""
         # Restore teams
         for i, team_data in enumerate(state['teams']):
             self.teams[i].team_id = team_data['team_id']
@@ -1107,6 +1394,9 @@ class Game:
         # Restore game state
         self.current_idx = state['current_idx']
         self.properties = state['properties']
+        self.ownership.set_teams(self.teams)
+        self.ownership.rebuild(self.properties)
+        self.rent.waivers = state.get('rent_waivers', {})
         self.moving = state['moving']
         self.move_steps = state['move_steps']
         self.move_progress = state['move_progress']
@@ -1134,7 +1424,84 @@ class Game:
         self.selected_mystery = state.get('selected_mystery', None)
         self.used_mysteries = state.get('used_mysteries', [])
         self.used_chance_questions = state.get('used_chance_questions', [])
+        if 'trades' in state:
+            self.trading.restore(state['trades'])
+        else:
+            self.trading.reset()
+
+    def _autosave_state(self):
+        """Everything needed to resume the game after a crash, as JSON-ready data.
+
+        Cards are stored as their index in the deck so a resumed game gets
+        the very same card objects back.
+        """
+        def card(value, deck):
+            return deck.index(value) if value is not None else None
+        
+        state = self._snapshot_state()
+        state.update(
+            chance_card=card(self.chance_card, self.chance_cards),
+            mystery_card=card(self.mystery_card, self.mystery_cards),
+            selected_mystery=card(self.selected_mystery, self.mystery_cards),
+            used_mysteries=[card(c, self.mystery_cards) for c in self.used_mysteries],
+            used_chance_questions=[card(c, self.chance_cards) for c in self.used_chance_questions],
+            last_dice_roll=self.last_dice_roll,
+            recent_mystery_results=list(self.recent_mystery_results),
+            show_trading=self.show_trading,
+            trading_seller=self.trading_seller,
+            trading_property=self.trading_property,
+            trading_offers=dict(self.trading_offers),
+            trading_feedback=self.trading_feedback,
+            trading_phase=self.trading_phase,
+            trading_mode=self.trading_mode,
+            trading_offer_amounts=dict(self.trading_offer_amounts),
+            streamlit_messages=list(self.streamlit_messages),
+            command_acks=dict(self.command_acks),
+            command_metrics=dict(self.command_metrics),
+            command_latencies=list(self.command_latencies),
+            seen_commands=dict(self.seen_commands)
+        )
+        return state
+
+    def _resume_from_autosave(self, path):
+        """Restore the game an earlier run autosaved at path; returns True if there was one"""
+        started = time.perf_counter()
+        try:
+            state = load_autosave(path)
+            if state is None:
+                return False
+            for team_data in state['teams']:
+                team_data['color'] = tuple(team_data['color'])
+            for key, deck in (('chance_card', self.chance_cards), ('mystery_card', self.mystery_cards),
+                              ('selected_mystery', self.mystery_cards)):
+                state[key] = deck[state[key]] if state[key] is not None else None
+            state['used_mysteries'] = [self.mystery_cards[i] for i in state['used_mysteries']]
+            state['used_chance_questions'] = [self.chance_cards[i] for i in state['used_chance_questions']]
+            self._restore_state(state)
+            
+            self.last_dice_roll = state['last_dice_roll']
+            self.recent_mystery_results = state['recent_mystery_results']
+            self.show_trading = state['show_trading']
+            self.trading_seller = state['trading_seller']
+            self.trading_property = state['trading_property']
+            self.trading_offers = state['trading_offers']
+            self.trading_feedback = state['trading_feedback']
+            self.trading_phase = state['trading_phase']
+            self.trading_mode = state['trading_mode']
+            self.trading_offer_amounts = state['trading_offer_amounts']
+            self.streamlit_messages = state['streamlit_messages']
+            self.command_acks = state['command_acks']
+            self.command_metrics = state['command_metrics']
+            self.command_latencies.extend(state['command_latencies'])
+            self.seen_commands = OrderedDict(state['seen_commands'])
+        except Exception as e:
+            print(f"Error resuming from {path}, starting a new game: {e}")
+            self._reset_game()
+            return False
         
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"♻️ Resumed the autosaved game from {path} in {elapsed:.1f} ms")
+        self.log_streamlit_event("Game resumed after a restart")
         return True
 
     def _reset_game(self):
@@ -1170,6 +1537,9 @@ class Game:
         # Reset all properties
         for prop in self.properties:
             prop["owner"] = None
+        self.ownership.clear()
+        self.rent.waivers = {}
+        self.trading.reset()
         # Clear history on reset
         self.game_history = []
         # Reset dice tracking
@@ -1221,13 +1591,10 @@ class Game:
         cell_h = self.board_rect.height // cells
         edge_offset = int(min(cell_w, cell_h) * 0.30)
         tangent_offset = 10
-        for p in self.properties:
-            owner = p["owner"]
-            if not owner:
-                continue
-            color = next(t.color for t in self.teams if t.team_id == owner)
-            x, y = self.positions[p["index"]]
-            side = self._get_board_side(p["index"]) 
+        for index, owner in self.ownership.owners.items():
+            color = self.ownership.team(owner).color
+            x, y = self.positions[index]
+            side = self._get_board_side(index)
             hx, hy = x, y
             if side == 'bottom':
                 hy = y - edge_offset; hx = x + tangent_offset
@@ -1600,7 +1967,7 @@ class Game:
             
             # Owner info with enhanced styling
             if owner:
-                owner_team = next(t for t in self.teams if t.team_id == owner)
+                owner_team = self.ownership.team(owner)
                 owner_text = self.font.render(f"* Owner: {owner_team.name}", True, owner_team.color)
                 self.screen.blit(owner_text, (inner.x + 15, desc_y + 10))
             else:
@@ -1664,6 +2031,7 @@ class Game:
                 self.mystery_feedback = f"Advanced {steps} spaces!"
             else:
                 self.mystery_feedback = f"Went back {abs(steps)} spaces!"
+            self._collect_rent(team)
         elif card["type"] == "go_to_free_parking":
             # Go to free parking (position 12)
             team.pos = 12
@@ -1673,8 +2041,8 @@ class Game:
             team.pos = 6
             self.mystery_feedback = "Moved to Society Penalty!"
         elif card["type"] == "no_rent":
-            # Set a flag for no rent next turn (this would need to be implemented in rent collection)
-            self.mystery_feedback = "No rent next turn! (Note: Manual implementation needed)"
+            self.rent.waive_next_turn(team.team_id)
+            self.mystery_feedback = "No rent next turn!"
         
         self.feedback_timer = 120
         self.show_mystery = False
@@ -1742,6 +2110,7 @@ class Game:
         if not self.spinning:
             return
             
+        self._state_dirty = True
         self.spin_progress += 1
         
         # Calculate progress ratio (0 to 1)
@@ -1968,8 +2337,8 @@ class Game:
     def _get_owned_properties(self, team_id):
         """Get list of properties owned by a team"""
         owned = []
-        for i, prop in enumerate(self.properties):
-            if prop["owner"] == team_id and i in self.property_data:
+        for i in self.ownership.properties_of(team_id):
+            if i in self.property_data:
                 prop_info = self.property_data[i]
                 owned.append({
                     "index": i,
@@ -1979,6 +2348,11 @@ class Game:
                 })
         return owned
 
+    def _sell_price(self, property_index):
+        """Sale value of a property: half its price, rounded to the nearest 500k"""
+        half_price = self.property_data[property_index]["price"] // 2
+        return round(half_price / 500_000) * 500_000
+
     def _sell_property(self, property_index):
         """Sell a property and give money to the team"""
         # Save state before selling
@@ -1987,15 +2361,13 @@ class Game:
         team = self.teams[self.current_idx]
         prop_info = self.property_data[property_index]
         
-        # Calculate sell price as half the original price, then round to nearest 500k
-        half_price = prop_info["price"] // 2
-        sell_price = round(half_price / 500_000) * 500_000  # Round to nearest 500k
+        sell_price = self._sell_price(property_index)
         
         # Give money to team
         team.balance += sell_price
         
         # Remove ownership
-        self.properties[property_index]["owner"] = None
+        self._set_owner(property_index, None)
         
         # Show feedback
         self.sell_property_feedback = f"Sold {prop_info['name']} for ₹{sell_price/1_000_000:.1f}M"
@@ -2072,14 +2444,14 @@ class Game:
         
         offer_amount = self.trading_offers[buyer_team_id]
         seller_team = self.teams[self.trading_seller]
-        buyer_team = next(t for t in self.teams if t.team_id == buyer_team_id)
+        buyer_team = self.ownership.team(buyer_team_id)
         
         # Transfer money
         buyer_team.balance -= offer_amount
         seller_team.balance += offer_amount
         
         # Transfer property
-        self.properties[self.trading_property]["owner"] = buyer_team_id
+        self._set_owner(self.trading_property, buyer_team_id)
         
         # Show feedback
         prop_info = self.property_data[self.trading_property]
@@ -2098,6 +2470,60 @@ class Game:
         self.trading_feedback = None
         self.trading_offer_amounts = {}
 
+    def _apply_trade_action(self, team, action, action_data):
+        """Open, bid on, close or cancel a trade; team is None for the control center"""
+        try:
+            if action == 'open_trade':
+                index = action_data.get('property')
+                if isinstance(index, bool) or index not in self.property_data \
+                        or self.properties[index]["owner"] != team.team_id:
+                    raise CommandRejected(f"{team.name} doesn't own property {index!r}")
+                mode = action_data.get('mode', 'sealed')
+                self._save_state()
+                self.trading.open_trade(team.team_id, index, mode, action_data.get('reserve', 0))
+                self.log_streamlit_event(f"{team.name}: Put {self.property_data[index]['name']} up for a {mode} trade")
+            elif action == 'bid':
+                trade = self.trading.bid(action_data.get('trade_id'), team.team_id, action_data.get('amount'))
+                name = self.property_data[trade.property_index]['name']
+                if trade.mode == 'auction':
+                    self.log_streamlit_event(f"{team.name}: Bid ₹{trade.high_bid()[1]:,} for {name}")
+                else:
+                    self.log_streamlit_event(f"{team.name}: Placed a sealed bid for {name}")
+            else:
+                trade = self.trading.trades.get(action_data.get('trade_id'))
+                if trade is None:
+                    raise CommandRejected(f"no open trade {action_data.get('trade_id')!r}")
+                if team is not None and team.team_id != trade.seller:
+                    raise CommandRejected("only the seller can close or cancel a trade")
+                self._save_state()
+                if action == 'close_trade':
+                    result = self.trading.close(trade.trade_id, self.properties[trade.property_index]["owner"])
+                else:
+                    result = self.trading.cancel(trade.trade_id)
+                self._finish_trade(result)
+        except ValueError as e:
+            raise CommandRejected(str(e))
+
+    def _update_trades(self):
+        """Resolve the trades whose deadline passed (or that every team has bid on)"""
+        now = time.time()
+        if not self.trading.due(now):
+            return
+        self._save_state()
+        for result in self.trading.tick(lambda index: self.properties[index]["owner"], now):
+            self._finish_trade(result)
+
+    def _finish_trade(self, result):
+        """Hand a sold property to the winner and announce the outcome"""
+        name = self.property_data[result['property']]['name']
+        if result['outcome'] == 'sold':
+            self._set_owner(result['property'], result['winner'])
+            winner = self._command_team({'team_id': result['winner']})
+            self._play_sound('purchase')
+            self.log_streamlit_event(f"🤝 {name} sold to {winner.name} for ₹{result['amount']:,}")
+        else:
+            self.log_streamlit_event(f"🤝 Trade for {name} closed: {result['outcome']}")
+
     def _draw_sell_property_overlay(self):
         if not self.show_sell_property:
             return
@@ -2152,8 +2578,7 @@ class Game:
             self.screen.blit(name_text, (prop_rect.x + 10, prop_rect.y + 8))
             
             # Sell price (half of original price, rounded to nearest 500k)
-            half_price = prop["price"] // 2
-            sell_price = round(half_price / 500_000) * 500_000  # Round to nearest 500k
+            sell_price = self._sell_price(prop["index"])
             price_text = self.font.render(f"Sell for: ₹{sell_price/1_000_000:.1f}M", True, (20,20,20))
             self.screen.blit(price_text, (prop_rect.x + 10, prop_rect.y + 28))
             
@@ -2336,7 +2761,7 @@ class Game:
                 
                 y_offset = box.y + 130
                 for team_id, offer in self.trading_offers.items():
-                    team = next(t for t in self.teams if t.team_id == team_id)
+                    team = self.ownership.team(team_id)
                     
                     buyer_rect = pygame.Rect(box.x + 20, y_offset, box.width - 40, 50)
                     pygame.draw.rect(self.screen, (247,249,252), buyer_rect, border_radius=8)
@@ -2509,6 +2934,13 @@ class Game:
 
 
 if __name__ == "__main__":
-    Game().run()
+    if "--new" in sys.argv[1:]:
+        discard_autosave()  # start over instead of resuming
+    if "--offscreen" in sys.argv[1:]:
+        # No window: draw into an offscreen surface and stream it to remote viewers
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+    stream_frames = "--stream-frames" in sys.argv[1:] or "--offscreen" in sys.argv[1:]
+    Game(frame_stream_path=FRAME_STREAM_FILE if stream_frames else None).run()
 
 
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Property Ownership Index
+The game's properties list says who owns each square; answering "what does
+this team own", "which Team is that" or "does it hold the whole color group"
+from it means a scan over the board or the teams, several times a frame.
+OwnershipIndex keeps those answers ready, updated on every ownership change
+(Game._set_owner) and rebuilt after an undo or a resume:
+
+    index.owner(5)                 # team id or None
+    index.owner_team(5)            # the owner's Team object or None
+    index.properties_of("T2")      # sorted list of property indices
+    index.team("T2")               # Team object; index.team_index["T2"] is its place in the list
+    index.group_count("T2", 5)     # properties of 5's color group that T2 owns
+    index.has_group("T2", 5)       # True when T2 owns the whole group
+"""
+
+from bisect import insort
+
+
+class OwnershipIndex:
+    """Owner of each property, properties of each team, color-group counts and teams by id"""
+
+    def __init__(self, property_data, teams=()):
+        # Color groups come from the property colors in Game._build_property_data
+        self.group_of = {index: info["color"] for index, info in property_data.items()}
+        self.group_sizes = {}
+        for color in self.group_of.values():
+            self.group_sizes[color] = self.group_sizes.get(color, 0) + 1
+        self.set_teams(teams)
+        self.clear()
+
+    def set_teams(self, teams):
+        """Index the game's Team objects by id (again whenever their ids may have changed)"""
+        self.teams = teams
+        self.team_index = {team.team_id: position for position, team in enumerate(teams)}
+
+    def clear(self):
+        """Forget every owner"""
+        self.owners = {}        # property index -> team_id
+        self.owned = {}         # team_id -> sorted list of property indices
+        self.group_counts = {}  # (team_id, color) -> properties of that color the team owns
+
+    def set_owner(self, index, team_id):
+        """Record that team_id (None: nobody) now owns the property"""
+        previous = self.owners.pop(index, None)
+        color = self.group_of.get(index)
+        if previous is not None:
+            self.owned[previous].remove(index)
+            self.group_counts[(previous, color)] -= 1
+        if team_id is not None:
+            self.owners[index] = team_id
+            insort(self.owned.setdefault(team_id, []), index)
+            self.group_counts[(team_id, color)] = self.group_counts.get((team_id, color), 0) + 1
+
+    def rebuild(self, properties):
+        """Start over from the game's properties list"""
+        self.clear()
+        for index, prop in enumerate(properties):
+            if prop["owner"] is not None:
+                self.set_owner(index, prop["owner"])
+
+    def owner(self, index):
+        return self.owners.get(index)
+
+    def properties_of(self, team_id):
+        return self.owned.get(team_id, [])
+
+    def team(self, team_id):
+        position = self.team_index.get(team_id)
+        return self.teams[position] if position is not None else None
+
+    def owner_team(self, index):
+        return self.team(self.owners.get(index))
+
+    def group_count(self, team_id, index):
+        return self.group_counts.get((team_id, self.group_of.get(index)), 0)
+
+    def has_group(self, team_id, index):
+        color = self.group_of.get(index)
+        return color is not None and self.group_counts.get((team_id, color), 0) == self.group_sizes[color]
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Rent Collection Rules
+A team that ends its move on a property another team owns pays rent to the
+owner. The base rent comes from Game._build_property_data; owning more of a
+color group raises it (GROUP_MULTIPLIERS, and MONOPOLY_MULTIPLIER for the
+whole group). A team that spun "No rent next turn" on the mystery wheel pays
+nothing on its next turn.
+
+Ownership questions go to the OwnershipIndex (ownership.py), so resolving a
+landing costs a few dict lookups however many properties the teams own.
+The game moves the money; the engine only decides who owes what.
+"""
+
+from ownership import OwnershipIndex
+
+GROUP_MULTIPLIERS = {1: 1.0, 2: 1.5}  # properties of the group the owner holds -> rent multiplier
+MONOPOLY_MULTIPLIER = 2.0             # the owner holds the whole color group
+
+
+class RentEngine:
+    """Rent owed on landing, and the teams excused from it by the no_rent card"""
+
+    def __init__(self, property_data, index=None):
+        self.property_data = property_data
+        self.index = index if index is not None else OwnershipIndex(property_data)
+        self.waivers = {}  # team_id -> "pending" (waits for the team's next turn) or "active"
+
+    def rent_for(self, index, team_id):
+        """(owner, amount) team_id owes for landing on index; (None, 0) if it owes nothing"""
+        owner = self.index.owner(index)
+        if owner is None or owner == team_id or index not in self.property_data:
+            return None, 0
+        if self.index.has_group(owner, index):
+            multiplier = MONOPOLY_MULTIPLIER
+        else:
+            multiplier = GROUP_MULTIPLIERS.get(self.index.group_count(owner, index), 1.0)
+        return owner, int(self.property_data[index]["rent"] * multiplier)
+
+    def resolve(self, index, team_id):
+        """Rent for a landing as {"owner", "amount", "waived"}, or None if nobody is owed anything"""
+        owner, amount = self.rent_for(index, team_id)
+        if owner is None:
+            return None
+        return {"owner": owner, "amount": amount, "waived": self.waivers.get(team_id) == "active"}
+
+    def waive_next_turn(self, team_id):
+        """The no_rent mystery card: team_id pays no rent during its next turn"""
+        self.waivers[team_id] = "pending"
+
+    def turn_changed(self, previous_id, current_id):
+        """Expire the finished turn's waiver and start the new turn's"""
+        if self.waivers.get(previous_id) == "active":
+            del self.waivers[previous_id]
+        if self.waivers.get(current_id) == "pending":
+            self.waivers[current_id] = "active"
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Multi-Game Hosting: Many Headless Game Sessions in One Process
+At the fest several boards run in parallel. Instead of one main.py window,
+one set of JSON files and one Streamlit process per board, a SessionManager
+hosts every board as a headless Game keyed by game id:
+
+- each game keeps its storage in its own directory, games/<game_id>/
+  (game_state.json, player_actions.json, control_commands.json and the
+  autosave), so games never see each other's commands or state
+- one ticker thread advances every game at the game's frame rate; a game
+  that raises is reported and skipped, the others keep running
+- hosted games have no window, fonts, board image or sounds and keep a
+  shorter undo history, so each one costs a bounded, small amount of memory
+
+The Streamlit control center lists the games under games/ and lets you pick
+one (?game=<id> in the URL).
+
+Usage:
+    python session_manager.py hall-a hall-b hall-c   # host (or resume) these games
+    python session_manager.py --count 20             # host game-01 .. game-20
+    python session_manager.py                        # resume every game under games/
+"""
+
+import os
+
+# Hosted games never open a window or an audio device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import threading
+import time
+from collections import deque
+
+from autosave import AUTOSAVE_FILE, discard_autosave
+from game_state_manager import GAMES_DIR, game_directory, hosted_game_manager, list_games
+from main import FPS, Game
+
+MAX_GAMES = 32              # games one process will host
+HOSTED_HISTORY_SIZE = 20    # undo steps kept per hosted game (a window keeps 50)
+TICK_WINDOW = 600           # recent tick times used for the metrics
+
+
+class SessionManager:
+    """Hosts independent headless games keyed by game id and ticks them from one thread"""
+
+    def __init__(self, root=GAMES_DIR, max_games=MAX_GAMES, stream=False, autosave=True, fps=FPS):
+        self.root = root
+        self.max_games = max_games
+        self.stream = stream
+        self.autosave = autosave
+        self.fps = fps
+        self.games = {}  # game_id -> Game
+        self.lock = threading.Lock()
+        self.stats = {"ticks": 0, "overruns": 0, "errors": 0, "last_error": None}
+        self.tick_times = deque(maxlen=TICK_WINDOW)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def create_game(self, game_id):
+        """Host the game with this id (resuming its autosave); returns the running game if it already is"""
+        directory = game_directory(game_id, self.root)
+        with self.lock:
+            if game_id in self.games:
+                return self.games[game_id]
+            if len(self.games) >= self.max_games:
+                raise ValueError(f"Already hosting {self.max_games} games")
+            os.makedirs(directory, exist_ok=True)
+            manager = hosted_game_manager(game_id, self.root, stream=self.stream)
+            autosave_path = os.path.join(directory, AUTOSAVE_FILE) if self.autosave else None
+            game = Game(autosave_path=autosave_path, state_manager=manager, headless=True)
+            game.max_history_size = HOSTED_HISTORY_SIZE
+            self.games[game_id] = game
+        print(f"🎲 Hosting game {game_id} in {directory}")
+        return game
+
+    def get(self, game_id):
+        """The hosted game with this id, or None"""
+        return self.games.get(game_id)
+
+    def close_game(self, game_id):
+        """Stop hosting a game; its storage and autosave stay on disk"""
+        with self.lock:
+            game = self.games.pop(game_id, None)
+        if game is None:
+            return False
+        if game.autosaver is not None:
+            game.autosaver.close()
+        game.state_manager.close()
+        return True
+
+    def tick(self):
+        """Advance every hosted game by one frame"""
+        started = time.perf_counter()
+        with self.lock:
+            games = list(self.games.items())
+        for game_id, game in games:
+            try:
+                game._update()
+            except Exception as e:
+                self.stats["errors"] += 1
+                self.stats["last_error"] = f"{game_id}: {e}"
+                print(f"Error updating game {game_id}: {e}")
+        self.stats["ticks"] += 1
+        self.tick_times.append(round((time.perf_counter() - started) * 1000, 2))
+
+    def _run(self):
+        frame = 1.0 / self.fps
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            self.tick()
+            deadline += frame
+            delay = deadline - time.monotonic()
+            if delay < 0:
+                # Too slow for the frame rate: don't try to catch up in a burst
+                self.stats["overruns"] += 1
+                deadline = time.monotonic()
+                delay = 0
+            self._stop.wait(delay)
+
+    def start(self):
+        """Start ticking the hosted games in a background thread"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="session-ticker", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the ticker thread (the games stay hosted)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """Stop ticking and close every hosted game"""
+        self.stop()
+        for game_id in list(self.games):
+            self.close_game(game_id)
+
+    def metrics(self):
+        """Hosted games, tick counts and recent tick times (ms) for all games together"""
+        times = sorted(self.tick_times)
+        return dict(self.stats, games=len(self.games),
+                    tick_ms={"p50": times[len(times) // 2], "max": times[-1]} if times else {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host several headless Monopoly games in one process")
+    parser.add_argument("games", nargs="*", help="game ids to host (default: every game under games/)")
+    parser.add_argument("--count", type=int, help="host game-01 .. game-NN")
+    parser.add_argument("--root", default=GAMES_DIR, help="directory holding the games' storage")
+    parser.add_argument("--stream", action="store_true", help="keep game states as JSON Patch streams")
+    parser.add_argument("--new", action="store_true", help="discard the autosaves and start new games")
+    args = parser.parse_args()
+
+    game_ids = list(args.games)
+    if args.count:
+        game_ids += [f"game-{number:02d}" for number in range(1, args.count + 1)]
+    if not game_ids:
+        game_ids = list_games(args.root)
+    if not game_ids:
+        parser.error("no games to host: name some or pass --count")
+
+    sessions = SessionManager(args.root, max_games=max(MAX_GAMES, len(game_ids)), stream=args.stream)
+    try:
+        for game_id in game_ids:
+            if args.new:
+                discard_autosave(os.path.join(game_directory(game_id, args.root), AUTOSAVE_FILE))
+            sessions.create_game(game_id)
+    except ValueError as e:
+        parser.error(str(e))
+    sessions.start()
+    print(f"🚀 Hosting {len(game_ids)} games; open the control center and pick one (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(30)
+            metrics = sessions.metrics()
+            print(f"📊 {metrics['games']} games, tick p50 {metrics['tick_ms'].get('p50', 0)} ms, "
+                  f"{metrics['overruns']} overruns, {metrics['errors']} errors")
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping games")
+    finally:
+        sessions.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Shared-Memory Game State Snapshot for Same-Host Clients
+The game publishes every saved state into a shared memory segment; Streamlit
+pages on the same laptop map it once and then read the latest state without
+touching game_state.json. A seqlock-style counter guards the segment:
+
+- the writer makes the counter odd, copies the payload in, then makes it even
+- readers copy the payload and retry if the counter was odd or moved meanwhile
+
+Readers only copy and parse the payload when the counter changed, so an idle
+game costs a tab refresh nothing but one 8-byte read. The payload is encoded
+with state_codec in MONOPOLY_STATE_FORMAT; readers detect the format.
+"""
+
+import hashlib
+import os
+import struct
+import time
+from multiprocessing import shared_memory
+
+from state_codec import dumps, loads
+
+HEADER = struct.Struct("<QI")  # sequence counter, payload length
+SEQ = struct.Struct("<Q")
+DEFAULT_SIZE = 1024 * 1024
+READ_RETRIES = 100
+
+
+def snapshot_name(storage_path):
+    """Shared memory name for the game whose storage lives at storage_path"""
+    digest = hashlib.sha1(os.path.abspath(storage_path).encode('utf-8')).hexdigest()[:12]
+    return f"monopoly_{digest}"  # macOS limits names to 31 characters
+
+
+class SnapshotWriter:
+    """Publishes game state snapshots into a shared memory segment (one writer)"""
+
+    def __init__(self, name, size=DEFAULT_SIZE):
+        self.name = name
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a game that was killed; take it over
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.capacity = self.shm.size - HEADER.size
+        self.seq = 0
+        HEADER.pack_into(self.shm.buf, 0, 0, 0)
+
+    def publish(self, state, version):
+        """Publish a state and its storage version token; returns False if it does not fit"""
+        payload = dumps({"version": version, "state": state})
+        fits = len(payload) <= self.capacity
+        buf = self.shm.buf
+        SEQ.pack_into(buf, 0, self.seq + 1)
+        if fits:
+            buf[HEADER.size:HEADER.size + len(payload)] = payload
+        # Length 0 tells readers to fall back to the regular storage
+        HEADER.pack_into(buf, 0, self.seq + 1, len(payload) if fits else 0)
+        self.seq += 2
+        SEQ.pack_into(buf, 0, self.seq)
+        return fits
+
+    def close(self):
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except (FileNotFoundError, BufferError):
+            pass
+
+
+class SnapshotReader:
+    """Maps a game's snapshot segment; raises FileNotFoundError if no game publishes one"""
+
+    def __init__(self, name):
+        self.name = name
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:  # Python < 3.13
+            self.shm = shared_memory.SharedMemory(name=name)
+            if os.name == "posix":
+                # Otherwise this process would unlink the game's segment on exit
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+
+    def sequence(self):
+        """Current sequence counter (even when no write is in progress)"""
+        return SEQ.unpack_from(self.shm.buf, 0)[0]
+
+    def read(self, known_seq=None):
+        """Return (seq, payload) with payload None if seq == known_seq.
+
+        Returns (None, None) if nothing usable is published or the writer kept
+        the segment busy for every retry.
+        """
+        buf = self.shm.buf
+        for attempt in range(READ_RETRIES):
+            seq, length = HEADER.unpack_from(buf, 0)
+            if seq & 1:
+                time.sleep(0)
+                continue
+            if seq == known_seq:
+                return seq, None
+            if seq == 0 or length == 0:
+                return None, None
+            data = bytes(buf[HEADER.size:HEADER.size + length])
+            if SEQ.unpack_from(buf, 0)[0] == seq:
+                try:
+                    return seq, loads(data)
+                except ValueError:
+                    pass  # torn read that happened to keep the counter; retry
+        return None, None
+
+    def close(self):
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
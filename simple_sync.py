@@ -8,23 +8,8 @@ import os
 import json
 from datetime import datetime
 
-def find_git():
-    """Find Git executable"""
-    git_paths = [
-        r"C:\Program Files\Git\bin\git.exe",
-        r"C:\Program Files (x86)\Git\bin\git.exe",
-        r"C:\Users\{}\AppData\Local\Programs\Git\bin\git.exe".format(os.getenv('USERNAME')),
-        "git"
-    ]
-    
-    for git_path in git_paths:
-        try:
-            result = subprocess.run([git_path, '--version'], capture_output=True, text=True)
-            if result.returncode == 0:
-                return git_path
-        except:
-            continue
-    return None
+from git_sync import PushRejected, fetch_state, find_git, sync_files
+from sync_daemon import SYNC_FILES
 
 def sync_to_github():
     """Sync JSON files to GitHub"""
@@ -34,7 +19,7 @@ def sync_to_github():
         return False
     
     try:
-        json_files = ['game_state.json', 'player_actions.json', 'control_commands.json']
+        json_files = list(SYNC_FILES)  # the game state only; commands go the other way
         
         # Check if files exist
         existing_files = [f for f in json_files if os.path.exists(f)]
@@ -44,32 +29,22 @@ def sync_to_github():
         
         print(f"🔄 Syncing {len(existing_files)} files to GitHub...")
         
-        # Add JSON files to git
-        for file in existing_files:
-            subprocess.run([git_path, 'add', file], check=True)
-            print(f"✅ Added {file}")
-        
-        # Check if there are changes to commit
-        result = subprocess.run([git_path, 'diff', '--cached', '--quiet'], capture_output=True)
-        if result.returncode == 0:
-            print("ℹ️ No changes to commit")
-            return True
-        
-        # Commit changes
+        # One commit built straight from the files (no git add/commit, the
+        # working tree and index are left alone), then one push
         commit_message = f"Auto-sync game state - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        subprocess.run([git_path, 'commit', '-m', commit_message], check=True)
-        print("✅ Committed changes")
-        
-        # Push to GitHub
         try:
-            subprocess.run([git_path, 'push', 'origin', 'main'], check=True)
-            print("✅ Pushed to GitHub")
-        except subprocess.CalledProcessError as e:
+            commit = sync_files(existing_files, commit_message)
+        except PushRejected as e:
             print(f"⚠️ Push failed: {e}")
             print("💡 This might be due to authentication. Try running:")
             print("   git config --global credential.helper store")
             return False
         
+        if commit is None:
+            print("ℹ️ No changes to commit")
+            return True
+        print(f"✅ Committed and pushed {commit[:7]}")
+        
         print(f"🎉 Successfully synced {len(existing_files)} files to GitHub!")
         return True
     except Exception as e:
@@ -85,7 +60,8 @@ def pull_from_github():
     
     try:
         print("🔄 Pulling latest changes from GitHub...")
-        subprocess.run([git_path, 'pull', 'origin', 'main'], check=True)
+        # Only the state branch's latest commit: the same cost however long the game ran
+        fetch_state(SYNC_FILES)
         print("✅ Pulled latest changes from GitHub")
         return True
     except Exception as e:
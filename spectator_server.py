@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Spectator Fan-Out Server for Large Audiences
+During finals a hundred or more people want to watch balances and positions.
+A Streamlit session per viewer would re-run a script and re-read the game
+state for each of them; this server reads the state once and fans it out to
+every viewer over Server-Sent Events instead:
+
+- one Feed per game polls the state (shared memory or files, never the game
+  process or the Streamlit control center) and encodes the spectator view
+  and the SVG board (board_svg.py) once per change; every subscriber is sent
+  those same bytes
+- a viewer that is up to date only gets the board elements that changed (a
+  few hundred bytes when a token moves); others get the whole board
+- updates coalesce: a subscriber that is still busy sending skips straight
+  to the newest view rather than queueing the ones in between
+- backpressure: each connection has a small write buffer, and a viewer that
+  cannot take a frame within SEND_TIMEOUT is dropped (EventSource reconnects
+  on its own and gets the current view)
+
+    GET /              spectator page (balances, positions, recent messages)
+    GET /events        the SSE stream: "event: state" with the view as JSON and
+                       "event: board" with {"svg": ...} or {"changes": {id: svg}}
+    GET /metrics       subscriber and fan-out counters as JSON
+
+Add ?game=<id> to watch a game hosted by session_manager.py.
+
+Usage:
+    python spectator_server.py [port]
+"""
+
+import asyncio
+import json
+import sys
+from urllib.parse import parse_qs, urlsplit
+
+from board_svg import BoardSvg
+from game_state_manager import GameStateManager, hosted_game_manager, list_games
+from state_codec import dumps_json
+
+DEFAULT_SPECTATOR_PORT = 8767
+POLL_INTERVAL = 0.1         # seconds between state version checks (also the fastest update rate)
+KEEPALIVE_INTERVAL = 15.0   # seconds of silence before a keep-alive comment
+SEND_TIMEOUT = 5.0          # seconds a viewer may take to accept a frame before it is dropped
+CLIENT_BUFFER = 64 * 1024   # bytes buffered per connection before sending waits
+MAX_SUBSCRIBERS = 1000
+REQUEST_TIMEOUT = 10.0      # seconds to receive the request headers
+RECENT_MESSAGES = 5
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Arthvidya Monopoly - Live</title>
+<style>
+body { font-family: Arial, sans-serif; background: #111; color: #eee; margin: 2em; }
+table { border-collapse: collapse; width: 100%; max-width: 40em; }
+td, th { padding: 0.5em; border-bottom: 1px solid #333; text-align: left; }
+tr.current { background: #333; font-weight: bold; }
+#status { color: #888; }
+</style></head>
+<body>
+<h1>🎲 Arthvidya Monopoly - Live</h1>
+<p id="status">Connecting...</p>
+<div id="board" style="max-width: 40em"></div>
+<table><thead><tr><th>Team</th><th>Balance</th><th>Position</th><th>Properties</th></tr></thead>
+<tbody id="teams"></tbody></table>
+<h3>📢 Latest</h3><ul id="messages"></ul>
+<script>
+const source = new EventSource("events" + location.search);
+source.onopen = () => { document.getElementById("status").textContent = "🟢 Live"; };
+source.onerror = () => { document.getElementById("status").textContent = "🟡 Reconnecting..."; };
+source.addEventListener("board", (event) => {
+  const update = JSON.parse(event.data);
+  const board = document.getElementById("board");
+  if (update.svg !== undefined) { board.innerHTML = update.svg; return; }
+  for (const [id, svg] of Object.entries(update.changes)) {
+    const element = document.getElementById(id);
+    if (element && svg) { element.outerHTML = svg; }
+    else if (element) { element.remove(); }
+    else if (svg) { board.querySelector("svg").insertAdjacentHTML("beforeend", svg); }
+  }
+});
+source.addEventListener("state", (event) => {
+  const view = JSON.parse(event.data);
+  const owned = {};
+  Object.values(view.owners).forEach((owner) => { owned[owner] = (owned[owner] || 0) + 1; });
+  document.getElementById("teams").innerHTML = view.teams.map((team, index) =>
+    `<tr class="${index === view.current_player ? "current" : ""}">` +
+    `<td style="color:${team.color}">● ${team.name}</td><td>₹${team.balance.toLocaleString("en-IN")}</td>` +
+    `<td>${team.pos}</td><td>${owned[team.id] || 0}</td></tr>`).join("");
+  document.getElementById("messages").innerHTML = view.messages.map((m) => {
+    const li = document.createElement("li"); li.textContent = m; return li.outerHTML; }).join("");
+});
+</script>
+</body></html>
+"""
+
+
+def spectator_view(state):
+    """The public part of a game state: teams, whose turn it is, owners and recent messages"""
+    return {
+        "current_player": state.get("current_player", 0),
+        "teams": [{"id": t["id"], "name": t["name"], "color": t["color"], "balance": t["balance"], "pos": t["pos"]}
+                  for t in state.get("teams", [])],
+        "owners": {index: prop.get("owner") for index, prop in state.get("properties", {}).items()},
+        "messages": [entry.get("message", "") for entry in state.get("messages", [])[-RECENT_MESSAGES:]],
+    }
+
+
+def sse_frame(event, event_id, data):
+    """One Server-Sent Events frame (data is a single line of bytes)"""
+    return b"event: %s\nid: %d\ndata: %s\n\n" % (event.encode('ascii'), event_id, data)
+
+
+class Feed:
+    """One game's spectator view, polled once and shared by all of its subscribers"""
+
+    def __init__(self, manager, interval=POLL_INTERVAL):
+        self.manager = manager
+        self.interval = interval
+        self.seq = 0
+        self.frame = None     # SSE frames of the latest view and the whole board
+        self.delta = None     # ... and with only the board elements changed since the previous one
+        self.view = None
+        self.board = BoardSvg()
+        self.version = None
+        self.subscribers = 0
+        self.closed = False
+        self._changed = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                # File and shared memory reads happen off the event loop
+                state, version = await loop.run_in_executor(None, self.manager.load_game_state_versioned)
+                if state and version != self.version:
+                    self.version = version
+                    svg, changes = self.board.update(state, version)
+                    self.publish(spectator_view(state), svg, changes)
+            except Exception as e:
+                print(f"Error reading game state for spectators: {e}")
+            await asyncio.sleep(self.interval)
+
+    def publish(self, view, svg=None, changes=None):
+        """Make view (and the board) the current frame and wake every subscriber; unchanged ones are skipped"""
+        if view == self.view and not changes:
+            return
+        self.view = view
+        self.seq += 1
+        state = sse_frame("state", self.seq, dumps_json(view))
+        self.frame = state + (sse_frame("board", self.seq, dumps_json({"svg": svg})) if svg is not None else b"")
+        self.delta = state + (sse_frame("board", self.seq, dumps_json({"changes": changes})) if changes else b"")
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self, seq, timeout):
+        """Wait until there is a frame newer than seq; False on timeout"""
+        if self.seq != seq:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def close(self):
+        """Stop polling and end every subscriber's stream"""
+        self.closed = True
+        self._changed.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.manager.close()
+
+
+def _default_manager(game_id):
+    if game_id is None:
+        return GameStateManager(init_files=False)
+    if game_id not in list_games():
+        raise ValueError(f"unknown game {game_id!r}")
+    return hosted_game_manager(game_id)
+
+
+class SpectatorServer:
+    """asyncio HTTP server streaming spectator views to many viewers over SSE"""
+
+    def __init__(self, host="0.0.0.0", port=DEFAULT_SPECTATOR_PORT, manager_factory=_default_manager,
+                 max_subscribers=MAX_SUBSCRIBERS):
+        self.host = host
+        self.port = port
+        self.manager_factory = manager_factory  # game id (or None) -> GameStateManager
+        self.max_subscribers = max_subscribers
+        self.feeds = {}
+        self.subscribers = 0
+        self.stats = {"connected": 0, "dropped": 0, "rejected": 0, "frames": 0, "coalesced": 0, "bytes": 0}
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        for feed in self.feeds.values():
+            await feed.close()
+        self.feeds = {}
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def feed(self, game_id=None):
+        """The feed for a game (created and started on first use); raises ValueError for unknown games.
+
+        _subscribe closes it again when its last subscriber leaves.
+        """
+        if game_id not in self.feeds:
+            self.feeds[game_id] = Feed(self.manager_factory(game_id))
+            self.feeds[game_id].start()
+        return self.feeds[game_id]
+
+    def metrics(self):
+        return dict(self.stats, subscribers=self.subscribers,
+                    feeds={str(game_id): feed.subscribers for game_id, feed in self.feeds.items()})
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(self._read_request(reader), REQUEST_TIMEOUT)
+            if request is None:
+                return
+            method, target = request
+            url = urlsplit(target)
+            game_id = parse_qs(url.query).get("game", [None])[0]
+            if method != "GET":
+                await self._respond(writer, "405 Method Not Allowed", "text/plain", b"GET only\n")
+            elif url.path == "/":
+                await self._respond(writer, "200 OK", "text/html; charset=utf-8", PAGE.encode('utf-8'))
+            elif url.path == "/metrics":
+                await self._respond(writer, "200 OK", "application/json", json.dumps(self.metrics()).encode('utf-8'))
+            elif url.path == "/events":
+                await self._subscribe(writer, game_id)
+            else:
+                await self._respond(writer, "404 Not Found", "text/plain", b"Not found\n")
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """(method, target) from the request line; the headers are read and ignored"""
+        line = await reader.readline()
+        parts = line.decode('latin-1').split()
+        if len(parts) != 3:
+            return None
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        return parts[0], parts[1]
+
+    async def _respond(self, writer, status, content_type, body):
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                     f"Connection: close\r\n\r\n".encode('latin-1') + body)
+        await asyncio.wait_for(writer.drain(), SEND_TIMEOUT)
+
+    async def _subscribe(self, writer, game_id):
+        if self.subscribers >= self.max_subscribers:
+            self.stats["rejected"] += 1
+            await self._respond(writer, "503 Service Unavailable", "text/plain", b"Too many spectators\n")
+            return
+        try:
+            feed = self.feed(game_id)
+        except ValueError as e:
+            await self._respond(writer, "404 Not Found", "text/plain", f"{e}\n".encode('utf-8'))
+            return
+
+        # A small buffer makes drain() wait early, so a slow viewer is noticed
+        # before it holds much memory
+        writer.transport.set_write_buffer_limits(high=CLIENT_BUFFER)
+        self.subscribers += 1
+        feed.subscribers += 1
+        self.stats["connected"] += 1
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                         b"Access-Control-Allow-Origin: *\r\nX-Accel-Buffering: no\r\n\r\nretry: 2000\n\n")
+            sent = 0
+            while True:
+                if not await feed.wait(sent, KEEPALIVE_INTERVAL):
+                    writer.write(b": keepalive\n\n")
+                elif feed.closed:
+                    return
+                elif feed.frame is not None:
+                    if sent and feed.seq > sent + 1:
+                        self.stats["coalesced"] += feed.seq - sent - 1
+                    # Only a viewer that has the previous board can apply the changes
+                    frame = feed.delta if sent and feed.seq == sent + 1 else feed.frame
+                    sent = feed.seq
+                    writer.write(frame)
+                    self.stats["frames"] += 1
+                    self.stats["bytes"] += len(frame)
+                try:
+                    await asyncio.wait_for(writer.drain(), SEND_TIMEOUT)
+                except asyncio.TimeoutError:
+                    self.stats["dropped"] += 1
+                    print(f"Dropped a spectator that took over {SEND_TIMEOUT:.0f}s to accept a frame")
+                    writer.transport.abort()
+                    return
+        finally:
+            self.subscribers -= 1
+            feed.subscribers -= 1
+            if feed.subscribers == 0 and self.feeds.get(game_id) is feed:
+                # Nobody watches this game any more: stop polling it until someone does
+                del self.feeds[game_id]
+                await feed.close()
+
+
+async def serve(port=DEFAULT_SPECTATOR_PORT):
+    server = await SpectatorServer(port=port).start()
+    print(f"👀 Spectators: http://<this-ip>:{server.port}/ (add ?game=<id> for a hosted game)")
+    async with server.server:
+        await server.server.serve_forever()
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SPECTATOR_PORT
+    try:
+        asyncio.run(serve(port))
+    except KeyboardInterrupt:
+        print("\n🛑 Spectator server stopped")
+
+
+if __name__ == "__main__":
+    main()
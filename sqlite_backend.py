@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+SQLite Storage Backend for the Game State Manager
+Keeps game state, player actions, control commands and the event log in one
+SQLite database in WAL mode, so Streamlit readers never block the game while it
+writes and every command is queued inside a real transaction:
+
+- state_snapshots: the last STATE_HISTORY_ROWS saved game states, newest row
+                   is the current state
+- commands:        append-only command queue; draining marks rows consumed
+- player_actions:  one pending action slot per team (older clients)
+- action_queue:    queued player actions, several per team, in send order
+- events:          the game's event log
+
+Select it with MONOPOLY_BACKEND=sqlite (game_state.db) or sqlite:<path>.
+With MONOPOLY_STATE_FORMAT=binary the state history is stored in the compact
+binary format of state_codec.py; rows in either format can be read back.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+from game_storage import ANY_VERSION, VersionConflict
+from state_codec import MAGIC, dumps, loads
+
+DEFAULT_DB_FILE = "game_state.db"
+BUSY_TIMEOUT_MS = 5000
+STATE_HISTORY_ROWS = 1000  # saved states kept; older rows are deleted as new ones arrive
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state_snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    current_player INTEGER,
+    game_phase TEXT,
+    state TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS state_snapshots_created_at ON state_snapshots(created_at);
+
+CREATE TABLE IF NOT EXISTS commands (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    command TEXT,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    consumed_at REAL
+);
+CREATE INDEX IF NOT EXISTS commands_pending ON commands(consumed_at, id);
+CREATE INDEX IF NOT EXISTS commands_by_name ON commands(command, created_at);
+
+CREATE TABLE IF NOT EXISTS player_actions (
+    team_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS action_queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    team_id TEXT,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    timestamp TEXT,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_created_at ON events(created_at);
+"""
+
+
+class _ThreadConnection:
+    """Holds one thread's connection; the thread-local drops it when the thread ends"""
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn):
+        self.conn = conn
+
+
+def _close_connection(conn):
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+def _encode_state(state):
+    """A state row: a BLOB in the binary format, JSON text otherwise"""
+    data = dumps(state)
+    return data if data.startswith(MAGIC) else data.decode('utf-8')
+
+
+class SqliteBackend:
+    """Game state, player actions, control commands and events in a WAL-mode SQLite database"""
+
+    def __init__(self, path=DEFAULT_DB_FILE, history_rows=STATE_HISTORY_ROWS):
+        self.path = path
+        self.history_rows = history_rows
+        self._local = threading.local()  # sqlite3 connections are per thread
+        self._finalizers = set()  # close the connections of threads still running
+        self._connections_lock = threading.Lock()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            holder = self._local.holder = _ThreadConnection(conn)
+            # Streamlit runs every rerun on a new thread: close the connection
+            # when its thread ends instead of keeping it until close()
+            finalizer = weakref.finalize(holder, _close_connection, conn)
+            with self._connections_lock:
+                self._finalizers = {f for f in self._finalizers if f.alive}
+                self._finalizers.add(finalizer)
+        return holder.conn
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so two writers never
+        # both read the same queue state and then fail to upgrade their lock
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _current_snapshot_id(self, conn):
+        return conn.execute("SELECT MAX(id) FROM state_snapshots").fetchone()[0]
+
+    def init_files(self, default_state):
+        with self._transaction() as conn:
+            if self._current_snapshot_id(conn) is None:
+                self._insert_state(conn, default_state)
+
+    def state_version(self):
+        return self._current_snapshot_id(self._connection())
+
+    def read_state(self):
+        row = self._connection().execute(
+            "SELECT id, state FROM state_snapshots ORDER BY id DESC LIMIT 1").fetchone()
+        if row is None:
+            return None, None
+        return loads(row[1]), row[0]
+
+    def read_state_if_changed(self, known_version):
+        """Return (state, version), or (None, version) if known_version is current"""
+        version = self.state_version()
+        if version is not None and version == known_version:
+            return None, version
+        return self.read_state()
+
+    def _insert_state(self, conn, state):
+        cursor = conn.execute(
+            "INSERT INTO state_snapshots (created_at, current_player, game_phase, state) VALUES (?, ?, ?, ?)",
+            (time.time(), state.get("current_player"), state.get("game_phase"), _encode_state(state)))
+        # Same transaction: the table never grows past the history it keeps
+        conn.execute("DELETE FROM state_snapshots WHERE id <= ?", (cursor.lastrowid - self.history_rows,))
+        return cursor.lastrowid
+
+    def write_state(self, state, expected_version=ANY_VERSION):
+        with self._transaction() as conn:
+            if expected_version is not ANY_VERSION:
+                actual = self._current_snapshot_id(conn)
+                if actual != expected_version:
+                    raise VersionConflict(self.path, expected_version, actual)
+            return self._insert_state(conn, state)
+
+    def _pending_actions(self, conn):
+        actions = {team_id: json.loads(data)
+                   for team_id, data in conn.execute("SELECT team_id, data FROM player_actions")}
+        for key, data in conn.execute("SELECT key, data FROM action_queue ORDER BY id"):
+            actions[key] = json.loads(data)
+        return actions
+
+    def player_actions_version(self):
+        """Changes whenever an action is queued, set or drained"""
+        return self._connection().execute(
+            "SELECT (SELECT MAX(id) FROM action_queue), (SELECT COUNT(*) FROM action_queue),"
+            " (SELECT MAX(updated_at) FROM player_actions), (SELECT COUNT(*) FROM player_actions)").fetchone()
+
+    def read_player_actions(self):
+        return self._pending_actions(self._connection())
+
+    def write_player_actions(self, actions):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM player_actions")
+            conn.execute("DELETE FROM action_queue")
+            now = time.time()
+            conn.executemany("INSERT INTO player_actions (team_id, data, updated_at) VALUES (?, ?, ?)",
+                             [(team_id, json.dumps(data), now) for team_id, data in actions.items()])
+
+    def set_player_action(self, team_id, action_data):
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO player_actions (team_id, data, updated_at) VALUES (?, ?, ?)",
+                         (team_id, json.dumps(action_data), time.time()))
+
+    def add_player_action(self, key, action_data):
+        with self._transaction() as conn:
+            conn.execute("INSERT INTO action_queue (key, team_id, data, created_at) VALUES (?, ?, ?, ?)",
+                         (key, action_data.get("team_id"), json.dumps(action_data), time.time()))
+
+    def drain_player_actions(self):
+        conn = self._connection()
+        if (conn.execute("SELECT 1 FROM player_actions LIMIT 1").fetchone() is None
+                and conn.execute("SELECT 1 FROM action_queue LIMIT 1").fetchone() is None):
+            return {}
+        with self._transaction() as conn:
+            actions = self._pending_actions(conn)
+            conn.execute("DELETE FROM player_actions")
+            conn.execute("DELETE FROM action_queue")
+        return actions
+
+    def _pending_commands(self, conn):
+        rows = conn.execute(
+            "SELECT id, key, data FROM commands WHERE consumed_at IS NULL ORDER BY id").fetchall()
+        commands = {}
+        for row_id, key, data in rows:
+            # Two clients can pick the same timestamp key; keep both commands
+            if key in commands:
+                key = f"{key}#{row_id}"
+            commands[key] = json.loads(data)
+        return commands, [row[0] for row in rows]
+
+    def read_control_commands(self):
+        return self._pending_commands(self._connection())[0]
+
+    def _insert_command(self, conn, key, command_data, now):
+        conn.execute("INSERT INTO commands (key, command, data, created_at) VALUES (?, ?, ?, ?)",
+                     (key, command_data.get("command"), json.dumps(command_data), now))
+
+    def write_control_commands(self, commands):
+        with self._transaction() as conn:
+            now = time.time()
+            conn.execute("UPDATE commands SET consumed_at = ? WHERE consumed_at IS NULL", (now,))
+            for key, command_data in commands.items():
+                self._insert_command(conn, key, command_data, now)
+
+    def add_control_command(self, key, command_data):
+        with self._transaction() as conn:
+            self._insert_command(conn, key, command_data, time.time())
+
+    def drain_control_commands(self):
+        conn = self._connection()
+        # Unlocked read first: the game polls every frame and the queue is
+        # almost always empty, so don't take the write lock for nothing
+        if conn.execute("SELECT 1 FROM commands WHERE consumed_at IS NULL LIMIT 1").fetchone() is None:
+            return {}
+        with self._transaction() as conn:
+            commands, row_ids = self._pending_commands(conn)
+            if row_ids:
+                conn.execute(f"UPDATE commands SET consumed_at = ? WHERE id IN ({','.join('?' * len(row_ids))})",
+                             [time.time(), *row_ids])
+        return commands
+
+    def log_event(self, message, timestamp=None):
+        with self._transaction() as conn:
+            conn.execute("INSERT INTO events (created_at, timestamp, message) VALUES (?, ?, ?)",
+                         (time.time(), timestamp, message))
+
+    def state_history(self, since=None, until=None, limit=100):
+        """Return (id, created_at, current_player, game_phase) rows, newest first"""
+        return self._connection().execute(
+            "SELECT id, created_at, current_player, game_phase FROM state_snapshots"
+            " WHERE created_at >= ? AND created_at <= ? ORDER BY created_at DESC LIMIT ?",
+            (since if since is not None else 0, until if until is not None else float("inf"), limit)).fetchall()
+
+    def load_state_at(self, snapshot_id):
+        """Return the game state saved as snapshot_id, or None"""
+        row = self._connection().execute(
+            "SELECT state FROM state_snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+        return loads(row[0]) if row else None
+
+    def command_history(self, command=None, limit=100):
+        """Return (key, data, created_at, consumed_at) rows, newest first"""
+        if command is None:
+            rows = self._connection().execute(
+                "SELECT key, data, created_at, consumed_at FROM commands ORDER BY id DESC LIMIT ?",
+                (limit,)).fetchall()
+        else:
+            rows = self._connection().execute(
+                "SELECT key, data, created_at, consumed_at FROM commands WHERE command = ?"
+                " ORDER BY created_at DESC LIMIT ?", (command, limit)).fetchall()
+        return [(key, json.loads(data), created_at, consumed_at) for key, data, created_at, consumed_at in rows]
+
+    def events(self, since_id=0, limit=100):
+        """Return (id, timestamp, message) rows logged after since_id, oldest first"""
+        return self._connection().execute(
+            "SELECT id, timestamp, message FROM events WHERE id > ? ORDER BY id LIMIT ?",
+            (since_id, limit)).fetchall()
+
+    def close(self):
+        with self._connections_lock:
+            for finalizer in self._finalizers:
+                finalizer()
+            self._finalizers = set()
+        self._local = threading.local()
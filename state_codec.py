@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Pluggable Serialization for Game State Snapshots
+Two formats, picked with MONOPOLY_STATE_FORMAT and told apart on read, so a
+reader never needs to know which one a writer used:
+
+- json:   JSON text, produced by orjson when it is installed (several times
+          faster than the stdlib json module) and by json otherwise
+- binary: a compact struct-packed layout with msgpack's type tags (none,
+          bool, int, float, str, array, map). Lists of records with the same
+          keys (teams, messages, undo properties) and maps of such records
+          (the property table) are stored as tables: the keys once, then only
+          the values.
+
+Binary payloads start with MAGIC, which can never begin JSON text.
+The shared-memory snapshot and the SQLite state history use this module;
+`python benchmark_game.py --codecs` compares the formats on the game's payloads.
+"""
+
+import json
+import os
+import struct
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+FORMATS = ("json", "binary")
+DEFAULT_FORMAT = os.environ.get("MONOPOLY_STATE_FORMAT", "json")
+MAGIC = b"\xc1MB\x01"  # 0xc1 is unused by msgpack and is never valid UTF-8
+TABLE, KEYED_TABLE = 1, 2  # extension types for record tables
+
+_U8, _U16, _U32, _U64 = struct.Struct(">B"), struct.Struct(">H"), struct.Struct(">I"), struct.Struct(">Q")
+_I8, _I16, _I32, _I64 = struct.Struct(">b"), struct.Struct(">h"), struct.Struct(">i"), struct.Struct(">q")
+_F64 = struct.Struct(">d")
+_EXT = struct.Struct(">IB")  # ext 32 header: body length, type
+
+
+def dumps_json(data, indent=None):
+    """JSON text as UTF-8 bytes (orjson when available)"""
+    if orjson is not None and indent in (None, 2):
+        options = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return orjson.dumps(data, option=options)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; the stdlib handles those
+    separators = None if indent else (',', ':')
+    return json.dumps(data, indent=indent, separators=separators).encode('utf-8')
+
+
+def loads_json(text):
+    """Parse JSON text (str or bytes)"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _key(key):
+    # Same key conversion as JSON, so both formats decode to the same data
+    return key if isinstance(key, str) else json.dumps(key)
+
+
+def _record_keys(rows):
+    """The shared key tuple if rows are two or more dicts with the same keys, else None"""
+    if len(rows) < 2 or not isinstance(rows[0], dict) or not rows[0]:
+        return None
+    keys = tuple(rows[0])
+    for row in rows:
+        if not isinstance(row, dict) or len(row) != len(keys) or tuple(row) != keys:
+            return None
+    return keys
+
+
+def _pack_str(text, out):
+    raw = text.encode('utf-8')
+    size = len(raw)
+    if size < 32:
+        out.append(0xa0 | size)
+    elif size < 0x100:
+        out += b"\xd9" + _U8.pack(size)
+    elif size < 0x10000:
+        out += b"\xda" + _U16.pack(size)
+    else:
+        out += b"\xdb" + _U32.pack(size)
+    out += raw
+
+
+def _pack_header(size, fix, fix_limit, tag16, tag32, out):
+    if size < fix_limit:
+        out.append(fix | size)
+    elif size < 0x10000:
+        out += tag16 + _U16.pack(size)
+    else:
+        out += tag32 + _U32.pack(size)
+
+
+def _pack_ext(kind, body, out):
+    out += b"\xc9" + _EXT.pack(len(body), kind)
+    out += body
+
+
+def _pack(value, out):
+    if value is None:
+        out.append(0xc0)
+    elif value is True:
+        out.append(0xc3)
+    elif value is False:
+        out.append(0xc2)
+    elif isinstance(value, int):
+        if 0 <= value < 0x80:
+            out.append(value)
+        elif -32 <= value < 0:
+            out.append(value & 0xff)
+        elif 0 <= value < 0x10000:
+            out += (b"\xcc" + _U8.pack(value)) if value < 0x100 else (b"\xcd" + _U16.pack(value))
+        elif -0x8000 <= value < 0:
+            out += (b"\xd0" + _I8.pack(value)) if value >= -0x80 else (b"\xd1" + _I16.pack(value))
+        elif -0x80000000 <= value < 0x100000000:
+            out += (b"\xce" + _U32.pack(value)) if value >= 0 else (b"\xd2" + _I32.pack(value))
+        elif -0x8000000000000000 <= value < 0x10000000000000000:
+            out += (b"\xcf" + _U64.pack(value)) if value >= 0 else (b"\xd3" + _I64.pack(value))
+        else:
+            raise ValueError(f"integer out of range for the binary format: {value}")
+    elif isinstance(value, float):
+        out += b"\xcb" + _F64.pack(value)
+    elif isinstance(value, str):
+        _pack_str(value, out)
+    elif isinstance(value, (list, tuple)):
+        keys = _record_keys(value)
+        if keys is not None:
+            body = bytearray()
+            _pack([list(keys), [item for row in value for item in row.values()]], body)
+            _pack_ext(TABLE, body, out)
+            return
+        _pack_header(len(value), 0x90, 16, b"\xdc", b"\xdd", out)
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, dict):
+        rows = list(value.values())
+        keys = _record_keys(rows)
+        if keys is not None:
+            body = bytearray()
+            _pack([[_key(key) for key in value], list(keys), [item for row in rows for item in row.values()]], body)
+            _pack_ext(KEYED_TABLE, body, out)
+            return
+        _pack_header(len(value), 0x80, 16, b"\xde", b"\xdf", out)
+        for key, item in value.items():
+            _pack_str(_key(key), out)
+            _pack(item, out)
+    else:
+        raise TypeError(f"cannot serialize {type(value).__name__}")
+
+
+def _unpack(data, pos):
+    """Decode the value at data[pos]; returns (value, next position)"""
+    tag = data[pos]
+    pos += 1
+    if tag < 0x80:
+        return tag, pos
+    if tag >= 0xe0:
+        return tag - 0x100, pos
+    if 0xa0 <= tag < 0xc0:
+        end = pos + (tag & 0x1f)
+        return data[pos:end].decode('utf-8'), end
+    if 0x90 <= tag < 0xa0:
+        return _unpack_list(data, pos, tag & 0x0f)
+    if 0x80 <= tag < 0x90:
+        return _unpack_map(data, pos, tag & 0x0f)
+    if tag == 0xc0:
+        return None, pos
+    if tag == 0xc2:
+        return False, pos
+    if tag == 0xc3:
+        return True, pos
+    if tag == 0xcb:
+        return _F64.unpack_from(data, pos)[0], pos + 8
+    if tag in _INTS:
+        fmt = _INTS[tag]
+        return fmt.unpack_from(data, pos)[0], pos + fmt.size
+    if tag in (0xd9, 0xda, 0xdb):
+        fmt = _LENGTHS[tag]
+        size = fmt.unpack_from(data, pos)[0]
+        start = pos + fmt.size
+        return data[start:start + size].decode('utf-8'), start + size
+    if tag in (0xdc, 0xdd):
+        fmt = _LENGTHS[tag]
+        return _unpack_list(data, pos + fmt.size, fmt.unpack_from(data, pos)[0])
+    if tag in (0xde, 0xdf):
+        fmt = _LENGTHS[tag]
+        return _unpack_map(data, pos + fmt.size, fmt.unpack_from(data, pos)[0])
+    if tag == 0xc9:
+        size, kind = _EXT.unpack_from(data, pos)
+        body, end = _unpack(data, pos + _EXT.size)
+        if kind == TABLE:
+            keys, values = body
+            width = len(keys)
+            return [dict(zip(keys, values[start:start + width])) for start in range(0, len(values), width)], end
+        if kind == KEYED_TABLE:
+            outer, keys, values = body
+            width = len(keys)
+            return {name: dict(zip(keys, values[index * width:(index + 1) * width]))
+                    for index, name in enumerate(outer)}, end
+        raise ValueError(f"unknown extension type {kind}")
+    raise ValueError(f"invalid type tag 0x{tag:02x} at offset {pos - 1}")
+
+
+def _unpack_list(data, pos, count):
+    items = []
+    for _ in range(count):
+        item, pos = _unpack(data, pos)
+        items.append(item)
+    return items, pos
+
+
+def _unpack_map(data, pos, count):
+    items = {}
+    for _ in range(count):
+        key, pos = _unpack(data, pos)
+        items[key], pos = _unpack(data, pos)
+    return items, pos
+
+
+_INTS = {0xcc: _U8, 0xcd: _U16, 0xce: _U32, 0xcf: _U64, 0xd0: _I8, 0xd1: _I16, 0xd2: _I32, 0xd3: _I64}
+_LENGTHS = {0xd9: _U8, 0xda: _U16, 0xdb: _U32, 0xdc: _U16, 0xdd: _U32, 0xde: _U16, 0xdf: _U32}
+
+
+def dumps_binary(data):
+    out = bytearray(MAGIC)
+    _pack(data, out)
+    return bytes(out)
+
+
+def loads_binary(blob):
+    try:
+        value, end = _unpack(blob, len(MAGIC))
+    except (IndexError, struct.error, TypeError) as e:
+        raise ValueError(f"truncated or corrupt binary snapshot: {e}") from None
+    if end != len(blob):
+        raise ValueError(f"{len(blob) - end} trailing bytes after the snapshot")
+    return value
+
+
+def dumps(data, fmt=None):
+    """Serialize data in the given format (default: MONOPOLY_STATE_FORMAT) as bytes"""
+    fmt = fmt or DEFAULT_FORMAT
+    if fmt == "binary":
+        return dumps_binary(data)
+    if fmt == "json":
+        return dumps_json(data)
+    raise ValueError(f"Unknown state format: {fmt} (expected one of {', '.join(FORMATS)})")
+
+
+def loads(blob):
+    """Deserialize bytes (or JSON text) written by dumps() in any format"""
+    if isinstance(blob, (bytes, bytearray, memoryview)) and bytes(blob[:len(MAGIC)]) == MAGIC:
+        return loads_binary(bytes(blob))
+    return loads_json(bytes(blob) if isinstance(blob, memoryview) else blob)
@@ -1,8 +1,9 @@
 import streamlit as st
-import json
 import time
 import os
-from datetime import datetime
+from game_storage import read_json, write_json
+from game_state_manager import GameStateManager, create_backend
+from streamlit_state import command_status_section, live_section, remember_command
 
 # Password configuration
 TEAM_PASSWORDS = {
@@ -22,8 +23,7 @@ def save_to_storage(data, filename):
     """Save data to shared storage"""
     try:
         filepath = os.path.join(STORAGE_PATH, filename)
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+        write_json(filepath, data, indent=2)
         return True
     except Exception as e:
         st.error(f"Error saving to storage: {e}")
@@ -31,86 +31,8 @@ def save_to_storage(data, filename):
 
 def load_from_storage(filename):
     """Load data from shared storage"""
-    try:
-        filepath = os.path.join(STORAGE_PATH, filename)
-        with open(filepath, 'r') as f:
-            return json.load(f)
-    except:
-        return None
-
-# Game state management
-class GameStateManager:
-    def __init__(self):
-        self.game_state_file = "game_state.json"
-        self.player_actions_file = "player_actions.json"
-        self.control_commands_file = "control_commands.json"
-        self.init_files()
-    
-    def init_files(self):
-        """Initialize the JSON files for game state and communication"""
-        if not os.path.exists(self.game_state_file):
-            self.save_game_state({
-                "current_player": 0,
-                "game_phase": "waiting",
-                "dice_rolled": False,
-                "current_position": 0,
-                "properties": {},
-                "teams": [
-                    {"id": "T1", "name": "Team 1", "color": "#D32F2F", "balance": 10000000, "pos": 0},
-                    {"id": "T2", "name": "Team 2", "color": "#1976D2", "balance": 10000000, "pos": 0},
-                    {"id": "T3", "name": "Team 3", "color": "#388E3C", "balance": 10000000, "pos": 0},
-                    {"id": "T4", "name": "Team 4", "color": "#F57C00", "balance": 10000000, "pos": 0},
-                    {"id": "T5", "name": "Team 5", "color": "#7B1FA2", "balance": 10000000, "pos": 0}
-                ],
-                "messages": [],
-                "pending_actions": {},
-                "game_log": []
-            })
-        
-        if not os.path.exists(self.player_actions_file):
-            self.save_player_actions({})
-        
-        if not os.path.exists(self.control_commands_file):
-            self.save_control_commands({})
-    
-    def save_game_state(self, state):
-        """Save game state to JSON file"""
-        with open(self.game_state_file, 'w') as f:
-            json.dump(state, f, indent=2)
-    
-    def load_game_state(self):
-        """Load game state from JSON file"""
-        try:
-            with open(self.game_state_file, 'r') as f:
-                return json.load(f)
-        except:
-            return None
-    
-    def save_player_actions(self, actions):
-        """Save player actions to JSON file"""
-        with open(self.player_actions_file, 'w') as f:
-            json.dump(actions, f, indent=2)
-    
-    def load_player_actions(self):
-        """Load player actions from JSON file"""
-        try:
-            with open(self.player_actions_file, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
-    
-    def save_control_commands(self, commands):
-        """Save control commands to JSON file"""
-        with open(self.control_commands_file, 'w') as f:
-            json.dump(commands, f, indent=2)
-    
-    def load_control_commands(self):
-        """Load control commands from JSON file"""
-        try:
-            with open(self.control_commands_file, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
+    filepath = os.path.join(STORAGE_PATH, filename)
+    return read_json(filepath)
 
 # Authentication functions
 def authenticate_user(team_name, password):
@@ -162,10 +84,11 @@ def logout_button():
         st.session_state['team_id'] = None
         st.rerun()
 
-# Initialize the game state manager
+# Initialize the game state manager; the game state follows the state branch
+# the laptop pushes (git_sync.py) unless MONOPOLY_BACKEND says otherwise
 @st.cache_resource
 def get_game_manager():
-    return GameStateManager()
+    return GameStateManager(create_backend(os.environ.get("MONOPOLY_BACKEND", "git")))
 
 def main():
     st.set_page_config(
@@ -202,22 +125,18 @@ def main():
         st.info("🌐 **Streamlit Cloud Integration**: This control center is hosted on Streamlit Cloud and communicates with your laptop game via shared storage.")
         
         # Load current game state
-        game_state = game_manager.load_game_state()
+        game_state, version = game_manager.load_game_state_versioned()
         if not game_state:
             st.error("Failed to load game state")
             return
         
-        # Game status
-        col1, col2, col3 = st.columns(3)
+        live = st.session_state.get("auto_refresh_control", True)
         
-        with col1:
-            st.metric("Current Player", f"Team {game_state['current_player'] + 1}")
-        
-        with col2:
-            st.metric("Game Phase", game_state['game_phase'].title())
+        # Game status refreshes itself while the page is open
+        live_section(game_manager, render_game_status, enabled=live)
         
-        with col3:
-            st.metric("Dice Rolled", "Yes" if game_state['dice_rolled'] else "No")
+        # Status of the last command; controls stay locked until the game answers it
+        busy = command_status_section(game_manager, game_state, enabled=live)
         
         st.markdown("---")
         
@@ -227,47 +146,45 @@ def main():
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            if st.button("🎲 Roll Dice", type="primary"):
+            if st.button("🎲 Roll Dice", type="primary", disabled=busy):
                 send_command(game_manager, "roll_dice")
-                st.success("Dice roll command sent!")
         
         with col2:
-            if st.button("⏭️ Next Turn"):
+            if st.button("⏭️ Next Turn", disabled=busy):
                 send_command(game_manager, "next_turn")
-                st.success("Next turn command sent!")
         
         with col3:
-            if st.button("🔄 Reset Game"):
+            if st.button("🔄 Reset Game", disabled=busy):
                 send_command(game_manager, "reset_game")
-                st.success("Reset command sent!")
         
-        # Auto-refresh
-        if st.checkbox("🔄 Auto-refresh (5s)"):
-            time.sleep(5)
-            st.rerun()
+        # Live updates
+        st.checkbox("🔄 Live updates", value=True, key="auto_refresh_control")
     else:
         st.title(f"👥 Team {team_name.split()[-1]}")
         st.info(f"🌐 **Team {team_name.split()[-1]} Cloud Access**")
 
+def render_game_status(game_state, version):
+    """Current player, game phase and dice status"""
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Current Player", f"Team {game_state['current_player'] + 1}")
+    
+    with col2:
+        st.metric("Game Phase", game_state['game_phase'].title())
+    
+    with col3:
+        st.metric("Dice Rolled", "Yes" if game_state['dice_rolled'] else "No")
+
 def send_command(game_manager, command):
     """Send a command from the control center"""
-    commands = game_manager.load_control_commands()
-    commands[datetime.now().isoformat()] = {
-        "command": command,
-        "timestamp": datetime.now().isoformat(),
-        "source": "control_center"
-    }
-    game_manager.save_control_commands(commands)
+    remember_command(game_manager.send_control_command(command), command)
+    st.rerun()
 
 def send_player_action(game_manager, team_id, action):
     """Send a player action"""
-    actions = game_manager.load_player_actions()
-    actions[team_id] = {
-        "action": action,
-        "timestamp": datetime.now().isoformat(),
-        "team_id": team_id
-    }
-    game_manager.save_player_actions(actions)
+    remember_command(game_manager.send_player_action(team_id, action), action)
+    st.rerun()
 
 if __name__ == "__main__":
     main()
@@ -3,11 +3,14 @@ import json
 import time
 import threading
 import queue
-import os
 import hashlib
-from datetime import datetime
 import subprocess
 import sys
+from game_state_manager import GameStateManager, delivery_order
+from streamlit_state import (
+    command_status_section, live_section, message_tail, portfolio_view, remember_command,
+    render_command_metrics, team_names, team_view
+)
 
 # Password configuration
 TEAM_PASSWORDS = {
@@ -19,80 +22,6 @@ TEAM_PASSWORDS = {
     "Control Center": "admin_2024"
 }
 
-# Game state management
-class GameStateManager:
-    def __init__(self):
-        self.game_state_file = "game_state.json"
-        self.player_actions_file = "player_actions.json"
-        self.control_commands_file = "control_commands.json"
-        self.init_files()
-    
-    def init_files(self):
-        """Initialize the JSON files for game state and communication"""
-        if not os.path.exists(self.game_state_file):
-            self.save_game_state({
-                "current_player": 0,
-                "game_phase": "waiting",
-                "dice_rolled": False,
-                "current_position": 0,
-                "properties": {},
-                "teams": [
-                    {"id": "T1", "name": "Team 1", "color": "#D32F2F", "balance": 10000000, "pos": 0},
-                    {"id": "T2", "name": "Team 2", "color": "#1976D2", "balance": 10000000, "pos": 0},
-                    {"id": "T3", "name": "Team 3", "color": "#388E3C", "balance": 10000000, "pos": 0},
-                    {"id": "T4", "name": "Team 4", "color": "#F57C00", "balance": 10000000, "pos": 0},
-                    {"id": "T5", "name": "Team 5", "color": "#7B1FA2", "balance": 10000000, "pos": 0}
-                ],
-                "messages": [],
-                "pending_actions": {},
-                "game_log": []
-            })
-        
-        if not os.path.exists(self.player_actions_file):
-            self.save_player_actions({})
-        
-        if not os.path.exists(self.control_commands_file):
-            self.save_control_commands({})
-    
-    def save_game_state(self, state):
-        """Save game state to JSON file"""
-        with open(self.game_state_file, 'w') as f:
-            json.dump(state, f, indent=2)
-    
-    def load_game_state(self):
-        """Load game state from JSON file"""
-        try:
-            with open(self.game_state_file, 'r') as f:
-                return json.load(f)
-        except:
-            return None
-    
-    def save_player_actions(self, actions):
-        """Save player actions to JSON file"""
-        with open(self.player_actions_file, 'w') as f:
-            json.dump(actions, f, indent=2)
-    
-    def load_player_actions(self):
-        """Load player actions from JSON file"""
-        try:
-            with open(self.player_actions_file, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
-    
-    def save_control_commands(self, commands):
-        """Save control commands to JSON file"""
-        with open(self.control_commands_file, 'w') as f:
-            json.dump(commands, f, indent=2)
-    
-    def load_control_commands(self):
-        """Load control commands from JSON file"""
-        try:
-            with open(self.control_commands_file, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
-
 # Authentication functions
 def hash_password(password):
     """Hash a password for security"""
@@ -203,40 +132,20 @@ def control_center_page(game_manager):
     st.info("🛡️ **Admin Access**: You have full control over the game. Use responsibly!")
     
     # Load current game state
-    game_state = game_manager.load_game_state()
+    game_state, version = game_manager.load_game_state_versioned()
     if not game_state:
         st.error("Failed to load game state")
         return
     
-    # Game status overview
-    col1, col2, col3 = st.columns(3)
+    live = st.session_state.get("auto_refresh_control", True)
     
-    with col1:
-        st.metric("Current Player", f"Team {game_state['current_player'] + 1}")
-    
-    with col2:
-        st.metric("Game Phase", game_state['game_phase'].title())
-    
-    with col3:
-        st.metric("Dice Rolled", "Yes" if game_state['dice_rolled'] else "No")
+    # Game status and team overview refresh themselves while the page is open
+    live_section(game_manager, render_game_status, enabled=live)
     
     st.markdown("---")
     
-    # Team status
-    st.subheader("👥 Team Status")
-    teams_cols = st.columns(5)
-    
-    for i, team in enumerate(game_state['teams']):
-        with teams_cols[i]:
-            st.markdown(f"**{team['name']}**")
-            st.markdown(f"💰 ₹{team['balance']:,}")
-            st.markdown(f"📍 Position: {team['pos']}")
-            
-            # Highlight current player
-            if i == game_state['current_player']:
-                st.success("🎯 Current Turn")
-    
-    st.markdown("---")
+    # Status of the last command; controls stay locked until the game answers it
+    busy = command_status_section(game_manager, game_state, enabled=live)
     
     # Game controls
     st.subheader("🎮 Game Controls")
@@ -244,20 +153,17 @@ def control_center_page(game_manager):
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        if st.button("🎲 Roll Dice", type="primary"):
+        if st.button("🎲 Roll Dice", type="primary", disabled=busy):
             send_command(game_manager, "roll_dice")
-            st.success("Dice roll command sent!")
     
     with col2:
-        if st.button("⏭️ Next Turn"):
+        if st.button("⏭️ Next Turn", disabled=busy):
             send_command(game_manager, "next_turn")
-            st.success("Next turn command sent!")
     
     with col3:
-        if st.button("🔄 Reset Game"):
-            if st.button("⚠️ Confirm Reset", type="secondary"):
+        if st.button("🔄 Reset Game", disabled=busy):
+            if st.button("⚠️ Confirm Reset", type="secondary", disabled=busy):
                 send_command(game_manager, "reset_game")
-                st.success("Reset command sent!")
     
     # Property management
     st.subheader("🏠 Property Management")
@@ -265,14 +171,12 @@ def control_center_page(game_manager):
     col1, col2 = st.columns(2)
     
     with col1:
-        if st.button("🏠 Buy Property"):
+        if st.button("🏠 Buy Property", disabled=busy):
             send_command(game_manager, "buy_property")
-            st.success("Buy property command sent!")
     
     with col2:
-        if st.button("💰 Sell Property"):
+        if st.button("💰 Sell Property", disabled=busy):
             send_command(game_manager, "sell_property")
-            st.success("Sell property command sent!")
     
     # Special actions
     st.subheader("🎯 Special Actions")
@@ -280,53 +184,113 @@ def control_center_page(game_manager):
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        if st.button("🎲 Test Chance"):
+        if st.button("🎲 Test Chance", disabled=busy):
             send_command(game_manager, "test_chance")
-            st.success("Test chance command sent!")
     
     with col2:
-        if st.button("🔮 Test Mystery"):
+        if st.button("🔮 Test Mystery", disabled=busy):
             send_command(game_manager, "test_mystery")
-            st.success("Test mystery command sent!")
     
     with col3:
-        if st.button("🤝 Start Trading"):
+        if st.button("🤝 Start Trading", disabled=busy):
             send_command(game_manager, "start_trading")
-            st.success("Start trading command sent!")
     
+    # Batch commands
+    st.subheader("🧰 Batch Commands")
+    
+    with st.expander("Run several commands as one step"):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            start_team = st.selectbox("Start with", [t['name'] for t in game_state['teams']])
+            if st.button("🔄 Reset & Start", disabled=busy):
+                team_id = next(t['id'] for t in game_state['teams'] if t['name'] == start_team)
+                send_command_batch(game_manager, [
+                    {"command": "reset_game"},
+                    {"command": "set_current_player", "team_id": team_id}
+                ])
+        
+        with col2:
+            batch_text = st.text_area(
+                "Commands (JSON list)",
+                '[{"command": "set_balance", "team_id": "T1", "balance": 12000000}, {"command": "next_turn"}]'
+            )
+            if st.button("📦 Send Batch", disabled=busy):
+                try:
+                    send_command_batch(game_manager, json.loads(batch_text))
+                except ValueError as e:
+                    st.error(f"Invalid JSON: {e}")
+    
+    # Command metrics reported by the game
+    st.subheader("📈 Command Metrics")
+    live_section(game_manager, render_command_metrics, enabled=live)
+    
+    # Player actions and game log
+    live_section(game_manager, lambda state, version: render_game_activity(game_manager, state, version),
+                 enabled=live)
+    
+    # Manual game state update
+    st.subheader("🔧 Manual State Update")
+    
+    if st.button("🔄 Refresh Game State"):
+        st.rerun()
+    
+    # Live updates
+    st.checkbox("🔄 Live updates", value=True, key="auto_refresh_control")
+
+def render_game_status(game_state, version):
+    """Current player, game phase and every team's balance and position"""
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Current Player", f"Team {game_state['current_player'] + 1}")
+    
+    with col2:
+        st.metric("Game Phase", game_state['game_phase'].title())
+    
+    with col3:
+        st.metric("Dice Rolled", "Yes" if game_state['dice_rolled'] else "No")
+    
+    st.markdown("---")
+    
+    # Team status
+    st.subheader("👥 Team Status")
+    teams_cols = st.columns(5)
+    
+    for i, team in enumerate(game_state['teams']):
+        with teams_cols[i]:
+            st.markdown(f"**{team['name']}**")
+            st.markdown(f"💰 ₹{team['balance']:,}")
+            st.markdown(f"📍 Position: {team['pos']}")
+            
+            # Highlight current player
+            if i == game_state['current_player']:
+                st.success("🎯 Current Turn")
+
+def render_game_activity(game_manager, game_state, version):
+    """Pending player actions and the latest game log entries"""
     # Player actions monitoring
     st.subheader("📋 Player Actions")
     
     player_actions = game_manager.load_player_actions()
     
     if player_actions:
-        for team_id, action in player_actions.items():
-            team_name = next((t['name'] for t in game_state['teams'] if t['id'] == team_id), team_id)
-            st.info(f"**{team_name}**: {action}")
+        names = team_names(version, game_state)
+        for key, action in delivery_order(player_actions):
+            team_name = names.get(action.get('team_id', key), key)
+            st.info(f"**{team_name}**: {action.get('action')}")
     else:
         st.info("No pending player actions")
     
     # Game log
     st.subheader("📜 Game Log")
     
-    if game_state['game_log']:
-        for log_entry in reversed(game_state['game_log'][-10:]):  # Show last 10 entries
-            timestamp = log_entry.get('timestamp', '')
-            message = log_entry.get('message', '')
-            st.text(f"[{timestamp}] {message}")
+    log_lines = message_tail(version, game_state, 'game_log', 10)
+    if log_lines:
+        for line in log_lines:
+            st.text(line)
     else:
         st.info("No game log entries yet")
-    
-    # Manual game state update
-    st.subheader("🔧 Manual State Update")
-    
-    if st.button("🔄 Refresh Game State"):
-        st.rerun()
-    
-    # Auto-refresh
-    if st.checkbox("🔄 Auto-refresh (5s)"):
-        time.sleep(5)
-        st.rerun()
 
 def team_page(game_manager, team_number):
     st.title(f"👥 Team {team_number}")
@@ -335,30 +299,28 @@ def team_page(game_manager, team_number):
     st.info(f"🛡️ **Team {team_number} Access**: Only you and your team members can access this interface.")
     
     # Load current game state
-    game_state = game_manager.load_game_state()
+    game_state, version = game_manager.load_game_state_versioned()
     if not game_state:
         st.error("Failed to load game state")
         return
     
     team_id = f"T{team_number}"
-    team = next((t for t in game_state['teams'] if t['id'] == team_id), None)
+    team = team_view(version, game_state, team_id)
     
     if not team:
         st.error(f"Team {team_number} not found")
         return
     
-    # Team info
-    col1, col2, col3 = st.columns(3)
+    live = st.session_state.get("auto_refresh_team", True)
     
-    with col1:
-        st.metric("💰 Balance", f"₹{team['balance']:,}")
+    # Team info refreshes itself; the whole page reruns when the turn changes
+    live_section(game_manager, lambda state, version: render_team_status(state, version, team_number),
+                 enabled=live, page_state=game_state, rerun_when=lambda state: state['current_player'])
     
-    with col2:
-        st.metric("📍 Position", team['pos'])
+    is_current = game_state['current_player'] == (team_number - 1)
     
-    with col3:
-        is_current = game_state['current_player'] == (team_number - 1)
-        st.metric("🎯 Status", "Your Turn" if is_current else "Waiting")
+    # Status of the last action; buttons stay locked until the game answers it
+    busy = command_status_section(game_manager, game_state, enabled=live)
     
     # Current player actions
     if is_current:
@@ -370,14 +332,12 @@ def team_page(game_manager, team_number):
         col1, col2 = st.columns(2)
         
         with col1:
-            if st.button("🎲 Roll Dice", type="primary"):
+            if st.button("🎲 Roll Dice", type="primary", disabled=busy):
                 send_player_action(game_manager, team_id, "roll_dice")
-                st.success("Dice roll requested!")
         
         with col2:
-            if st.button("⏭️ End Turn"):
+            if st.button("⏭️ End Turn", disabled=busy):
                 send_player_action(game_manager, team_id, "end_turn")
-                st.success("End turn requested!")
         
         # Property actions
         st.subheader("🏠 Property Actions")
@@ -385,14 +345,12 @@ def team_page(game_manager, team_number):
         col1, col2 = st.columns(2)
         
         with col1:
-            if st.button("🏠 Buy Property"):
+            if st.button("🏠 Buy Property", disabled=busy):
                 send_player_action(game_manager, team_id, "buy_property")
-                st.success("Buy property requested!")
         
         with col2:
-            if st.button("💰 Sell Property"):
+            if st.button("💰 Sell Property", disabled=busy):
                 send_player_action(game_manager, team_id, "sell_property")
-                st.success("Sell property requested!")
         
         # Special actions
         st.subheader("🎯 Special Actions")
@@ -400,65 +358,97 @@ def team_page(game_manager, team_number):
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            if st.button("🎲 Take Chance"):
+            if st.button("🎲 Take Chance", disabled=busy):
                 send_player_action(game_manager, team_id, "take_chance")
-                st.success("Take chance requested!")
         
         with col2:
-            if st.button("🔮 Spin Mystery"):
+            if st.button("🔮 Spin Mystery", disabled=busy):
                 send_player_action(game_manager, team_id, "spin_mystery")
-                st.success("Spin mystery requested!")
         
         with col3:
-            if st.button("🤝 Start Trading"):
+            if st.button("🤝 Start Trading", disabled=busy):
                 send_player_action(game_manager, team_id, "start_trading")
-                st.success("Start trading requested!")
     
     else:
         st.info(f"⏳ Waiting for Team {game_state['current_player'] + 1}'s turn")
     
     # Team properties
-    st.subheader("🏠 Your Properties")
-    
-    # This would need to be implemented based on your game's property system
-    st.info("Property list will be implemented based on game state")
+    live_section(game_manager, lambda state, version: render_team_properties(state, version, team_id),
+                 enabled=live)
     
     # Game messages
+    live_section(game_manager, render_game_messages, enabled=live)
+    
+    # Live updates
+    st.checkbox("🔄 Live updates", value=True, key="auto_refresh_team")
+
+def render_team_status(game_state, version, team_number):
+    """Balance, position and turn status of one team"""
+    team = team_view(version, game_state, f"T{team_number}")
+    if not team:
+        st.error(f"Team {team_number} not found")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("💰 Balance", f"₹{team['balance']:,}")
+    
+    with col2:
+        st.metric("📍 Position", team['pos'])
+    
+    with col3:
+        is_current = game_state['current_player'] == (team_number - 1)
+        st.metric("🎯 Status", "Your Turn" if is_current else "Waiting")
+
+def render_team_properties(game_state, version, team_id):
+    """The team's property portfolio with its total, rent and sale value"""
+    st.subheader("🏠 Your Properties")
+    
+    portfolio = portfolio_view(version, game_state, team_id)
+    if portfolio['properties']:
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("💼 Total Value", f"₹{portfolio['total_value']:,}")
+        
+        with col2:
+            st.metric("🏷️ Rent Exposure", f"₹{portfolio['rent_exposure']:,}")
+        
+        with col3:
+            st.metric("💰 Sale Value", f"₹{portfolio['sale_value']:,}")
+        
+        for prop in portfolio['properties']:
+            st.markdown(f"🏠 **{prop['name']}** · ₹{prop['price']:,} · Rent ₹{prop['rent']:,} · "
+                        f"Sells for ₹{prop['sell_price']:,}")
+    else:
+        st.info("You don't own any properties yet")
+
+def render_game_messages(game_state, version):
+    """The latest game messages"""
     st.subheader("💬 Game Messages")
     
-    messages = game_state.get('messages', [])
+    messages = message_tail(version, game_state, 'messages', 5)
     if messages:
-        for message in reversed(messages[-5:]):  # Show last 5 messages
-            timestamp = message.get('timestamp', '')
-            text = message.get('message', '')
-            st.text(f"[{timestamp}] {text}")
+        for line in messages:
+            st.text(line)
     else:
         st.info("No messages yet")
-    
-    # Auto-refresh
-    if st.checkbox("🔄 Auto-refresh (3s)"):
-        time.sleep(3)
-        st.rerun()
 
 def send_command(game_manager, command):
     """Send a command from the control center"""
-    commands = game_manager.load_control_commands()
-    commands[datetime.now().isoformat()] = {
-        "command": command,
-        "timestamp": datetime.now().isoformat(),
-        "source": "control_center"
-    }
-    game_manager.save_control_commands(commands)
+    remember_command(game_manager.send_control_command(command), command)
+    st.rerun()
+
+def send_command_batch(game_manager, commands):
+    """Send an ordered list of commands that the game applies in one step"""
+    remember_command(game_manager.add_command_batch(commands), "batch")
+    st.rerun()
 
 def send_player_action(game_manager, team_id, action):
     """Send a player action"""
-    actions = game_manager.load_player_actions()
-    actions[team_id] = {
-        "action": action,
-        "timestamp": datetime.now().isoformat(),
-        "team_id": team_id
-    }
-    game_manager.save_player_actions(actions)
+    remember_command(game_manager.send_player_action(team_id, action), action)
+    st.rerun()
 
 if __name__ == "__main__":
     main()
@@ -7,7 +7,7 @@ Create these files in your project directory:
 
 #### **requirements.txt**
 ```
-streamlit>=1.28.0
+streamlit>=1.37.0
 pygame>=2.5.0
 ```
 
@@ -31,6 +31,11 @@ import json
 import time
 import os
 from datetime import datetime
+from game_state_manager import GameStateManager, delivery_order
+from streamlit_state import (
+    command_status_section, live_section, message_tail, portfolio_view, remember_command,
+    render_command_metrics, team_names, team_view
+)
 
 # Password configuration
 TEAM_PASSWORDS = {
@@ -42,80 +47,6 @@ TEAM_PASSWORDS = {
     "Control Center": "ferrari"
 }
 
-# Game state management
-class GameStateManager:
-    def __init__(self):
-        self.game_state_file = "game_state.json"
-        self.player_actions_file = "player_actions.json"
-        self.control_commands_file = "control_commands.json"
-        self.init_files()
-    
-    def init_files(self):
-        """Initialize the JSON files for game state and communication"""
-        if not os.path.exists(self.game_state_file):
-            self.save_game_state({
-                "current_player": 0,
-                "game_phase": "waiting",
-                "dice_rolled": False,
-                "current_position": 0,
-                "properties": {},
-                "teams": [
-                    {"id": "T1", "name": "Team 1", "color": "#D32F2F", "balance": 10000000, "pos": 0},
-                    {"id": "T2", "name": "Team 2", "color": "#1976D2", "balance": 10000000, "pos": 0},
-                    {"id": "T3", "name": "Team 3", "color": "#388E3C", "balance": 10000000, "pos": 0},
-                    {"id": "T4", "name": "Team 4", "color": "#F57C00", "balance": 10000000, "pos": 0},
-                    {"id": "T5", "name": "Team 5", "color": "#7B1FA2", "balance": 10000000, "pos": 0}
-                ],
-                "messages": [],
-                "pending_actions": {},
-                "game_log": []
-            })
-        
-        if not os.path.exists(self.player_actions_file):
-            self.save_player_actions({})
-        
-        if not os.path.exists(self.control_commands_file):
-            self.save_control_commands({})
-    
-    def save_game_state(self, state):
-        """Save game state to JSON file"""
-        with open(self.game_state_file, 'w') as f:
-            json.dump(state, f, indent=2)
-    
-    def load_game_state(self):
-        """Load game state from JSON file"""
-        try:
-            with open(self.game_state_file, 'r') as f:
-                return json.load(f)
-        except:
-            return None
-    
-    def save_player_actions(self, actions):
-        """Save player actions to JSON file"""
-        with open(self.player_actions_file, 'w') as f:
-            json.dump(actions, f, indent=2)
-    
-    def load_player_actions(self):
-        """Load player actions from JSON file"""
-        try:
-            with open(self.player_actions_file, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
-    
-    def save_control_commands(self, commands):
-        """Save control commands to JSON file"""
-        with open(self.control_commands_file, 'w') as f:
-            json.dump(commands, f, indent=2)
-    
-    def load_control_commands(self):
-        """Load control commands from JSON file"""
-        try:
-            with open(self.control_commands_file, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
-
 # Authentication functions
 def authenticate_user(team_name, password):
     """Authenticate a user with team name and password"""
@@ -210,40 +141,20 @@ def control_center_page(game_manager):
     st.info("🌐 **Public Control**: You can control the game from anywhere on the internet!")
     
     # Load current game state
-    game_state = game_manager.load_game_state()
+    game_state, version = game_manager.load_game_state_versioned()
     if not game_state:
         st.error("Failed to load game state")
         return
     
-    # Game status overview
-    col1, col2, col3 = st.columns(3)
+    live = st.session_state.get("auto_refresh_control", True)
     
-    with col1:
-        st.metric("Current Player", f"Team {game_state['current_player'] + 1}")
-    
-    with col2:
-        st.metric("Game Phase", game_state['game_phase'].title())
-    
-    with col3:
-        st.metric("Dice Rolled", "Yes" if game_state['dice_rolled'] else "No")
+    # Game status and team overview refresh themselves while the page is open
+    live_section(game_manager, render_game_status, enabled=live)
     
     st.markdown("---")
     
-    # Team status
-    st.subheader("👥 Team Status")
-    teams_cols = st.columns(5)
-    
-    for i, team in enumerate(game_state['teams']):
-        with teams_cols[i]:
-            st.markdown(f"**{team['name']}**")
-            st.markdown(f"💰 ₹{team['balance']:,}")
-            st.markdown(f"📍 Position: {team['pos']}")
-            
-            # Highlight current player
-            if i == game_state['current_player']:
-                st.success("🎯 Current Turn")
-    
-    st.markdown("---")
+    # Status of the last command; controls stay locked until the game answers it
+    busy = command_status_section(game_manager, game_state, enabled=live)
     
     # Game controls
     st.subheader("🎮 Game Controls")
@@ -251,20 +162,17 @@ def control_center_page(game_manager):
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        if st.button("🎲 Roll Dice", type="primary"):
+        if st.button("🎲 Roll Dice", type="primary", disabled=busy):
             send_command(game_manager, "roll_dice")
-            st.success("Dice roll command sent!")
     
     with col2:
-        if st.button("⏭️ Next Turn"):
+        if st.button("⏭️ Next Turn", disabled=busy):
             send_command(game_manager, "next_turn")
-            st.success("Next turn command sent!")
     
     with col3:
-        if st.button("🔄 Reset Game"):
-            if st.button("⚠️ Confirm Reset", type="secondary"):
+        if st.button("🔄 Reset Game", disabled=busy):
+            if st.button("⚠️ Confirm Reset", type="secondary", disabled=busy):
                 send_command(game_manager, "reset_game")
-                st.success("Reset command sent!")
     
     # Property management
     st.subheader("🏠 Property Management")
@@ -272,14 +180,12 @@ def control_center_page(game_manager):
     col1, col2 = st.columns(2)
     
     with col1:
-        if st.button("🏠 Buy Property"):
+        if st.button("🏠 Buy Property", disabled=busy):
             send_command(game_manager, "buy_property")
-            st.success("Buy property command sent!")
     
     with col2:
-        if st.button("💰 Sell Property"):
+        if st.button("💰 Sell Property", disabled=busy):
             send_command(game_manager, "sell_property")
-            st.success("Sell property command sent!")
     
     # Special actions
     st.subheader("🎯 Special Actions")
@@ -287,47 +193,81 @@ def control_center_page(game_manager):
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        if st.button("🎲 Test Chance"):
+        if st.button("🎲 Test Chance", disabled=busy):
             send_command(game_manager, "test_chance")
-            st.success("Test chance command sent!")
     
     with col2:
-        if st.button("🔮 Test Mystery"):
+        if st.button("🔮 Test Mystery", disabled=busy):
             send_command(game_manager, "test_mystery")
-            st.success("Test mystery command sent!")
     
     with col3:
-        if st.button("🤝 Start Trading"):
+        if st.button("🤝 Start Trading", disabled=busy):
             send_command(game_manager, "start_trading")
-            st.success("Start trading command sent!")
     
+    # Command metrics reported by the game
+    st.subheader("📈 Command Metrics")
+    live_section(game_manager, render_command_metrics, enabled=live)
+    
+    # Player actions and game log
+    live_section(game_manager, lambda state, version: render_game_activity(game_manager, state, version),
+                 enabled=live)
+    
+    # Live updates
+    st.checkbox("🔄 Live updates", value=True, key="auto_refresh_control")
+
+def render_game_status(game_state, version):
+    """Current player, game phase and every team's balance and position"""
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Current Player", f"Team {game_state['current_player'] + 1}")
+    
+    with col2:
+        st.metric("Game Phase", game_state['game_phase'].title())
+    
+    with col3:
+        st.metric("Dice Rolled", "Yes" if game_state['dice_rolled'] else "No")
+    
+    st.markdown("---")
+    
+    # Team status
+    st.subheader("👥 Team Status")
+    teams_cols = st.columns(5)
+    
+    for i, team in enumerate(game_state['teams']):
+        with teams_cols[i]:
+            st.markdown(f"**{team['name']}**")
+            st.markdown(f"💰 ₹{team['balance']:,}")
+            st.markdown(f"📍 Position: {team['pos']}")
+            
+            # Highlight current player
+            if i == game_state['current_player']:
+                st.success("🎯 Current Turn")
+
+def render_game_activity(game_manager, game_state, version):
+    """Pending player actions and the latest game log entries"""
     # Player actions monitoring
     st.subheader("📋 Player Actions")
     
     player_actions = game_manager.load_player_actions()
     
     if player_actions:
-        for team_id, action in player_actions.items():
-            team_name = next((t['name'] for t in game_state['teams'] if t['id'] == team_id), team_id)
-            st.info(f"**{team_name}**: {action}")
+        names = team_names(version, game_state)
+        for key, action in delivery_order(player_actions):
+            team_name = names.get(action.get('team_id', key), key)
+            st.info(f"**{team_name}**: {action.get('action')}")
     else:
         st.info("No pending player actions")
     
     # Game log
     st.subheader("📜 Game Log")
     
-    if game_state['game_log']:
-        for log_entry in reversed(game_state['game_log'][-10:]):  # Show last 10 entries
-            timestamp = log_entry.get('timestamp', '')
-            message = log_entry.get('message', '')
-            st.text(f"[{timestamp}] {message}")
+    log_lines = message_tail(version, game_state, 'game_log', 10)
+    if log_lines:
+        for line in log_lines:
+            st.text(line)
     else:
         st.info("No game log entries yet")
-    
-    # Auto-refresh
-    if st.checkbox("🔄 Auto-refresh (5s)"):
-        time.sleep(5)
-        st.rerun()
 
 def team_page(game_manager, team_number):
     st.title(f"👥 Team {team_number}")
@@ -336,30 +276,28 @@ def team_page(game_manager, team_number):
     st.info(f"🌐 **Team {team_number} Public Access**: Access your team from anywhere on the internet!")
     
     # Load current game state
-    game_state = game_manager.load_game_state()
+    game_state, version = game_manager.load_game_state_versioned()
     if not game_state:
         st.error("Failed to load game state")
         return
     
     team_id = f"T{team_number}"
-    team = next((t for t in game_state['teams'] if t['id'] == team_id), None)
+    team = team_view(version, game_state, team_id)
     
     if not team:
         st.error(f"Team {team_number} not found")
         return
     
-    # Team info
-    col1, col2, col3 = st.columns(3)
+    live = st.session_state.get("auto_refresh_team", True)
     
-    with col1:
-        st.metric("💰 Balance", f"₹{team['balance']:,}")
+    # Team info refreshes itself; the whole page reruns when the turn changes
+    live_section(game_manager, lambda state, version: render_team_status(state, version, team_number),
+                 enabled=live, page_state=game_state, rerun_when=lambda state: state['current_player'])
     
-    with col2:
-        st.metric("📍 Position", team['pos'])
+    is_current = game_state['current_player'] == (team_number - 1)
     
-    with col3:
-        is_current = game_state['current_player'] == (team_number - 1)
-        st.metric("🎯 Status", "Your Turn" if is_current else "Waiting")
+    # Status of the last action; buttons stay locked until the game answers it
+    busy = command_status_section(game_manager, game_state, enabled=live)
     
     # Current player actions
     if is_current:
@@ -371,14 +309,12 @@ def team_page(game_manager, team_number):
         col1, col2 = st.columns(2)
         
         with col1:
-            if st.button("🎲 Roll Dice", type="primary"):
+            if st.button("🎲 Roll Dice", type="primary", disabled=busy):
                 send_player_action(game_manager, team_id, "roll_dice")
-                st.success("Dice roll requested!")
         
         with col2:
-            if st.button("⏭️ End Turn"):
+            if st.button("⏭️ End Turn", disabled=busy):
                 send_player_action(game_manager, team_id, "end_turn")
-                st.success("End turn requested!")
         
         # Property actions
         st.subheader("🏠 Property Actions")
@@ -386,14 +322,12 @@ def team_page(game_manager, team_number):
         col1, col2 = st.columns(2)
         
         with col1:
-            if st.button("🏠 Buy Property"):
+            if st.button("🏠 Buy Property", disabled=busy):
                 send_player_action(game_manager, team_id, "buy_property")
-                st.success("Buy property requested!")
         
         with col2:
-            if st.button("💰 Sell Property"):
+            if st.button("💰 Sell Property", disabled=busy):
                 send_player_action(game_manager, team_id, "sell_property")
-                st.success("Sell property requested!")
         
         # Special actions
         st.subheader("🎯 Special Actions")
@@ -401,63 +335,92 @@ def team_page(game_manager, team_number):
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            if st.button("🎲 Take Chance"):
+            if st.button("🎲 Take Chance", disabled=busy):
                 send_player_action(game_manager, team_id, "take_chance")
-                st.success("Take chance requested!")
         
         with col2:
-            if st.button("🔮 Spin Mystery"):
+            if st.button("🔮 Spin Mystery", disabled=busy):
                 send_player_action(game_manager, team_id, "spin_mystery")
-                st.success("Spin mystery requested!")
         
         with col3:
-            if st.button("🤝 Start Trading"):
+            if st.button("🤝 Start Trading", disabled=busy):
                 send_player_action(game_manager, team_id, "start_trading")
-                st.success("Start trading requested!")
     
     else:
         st.info(f"⏳ Waiting for Team {game_state['current_player'] + 1}'s turn")
     
     # Team properties
-    st.subheader("🏠 Your Properties")
-    st.info("Property list will be implemented based on game state")
+    live_section(game_manager, lambda state, version: render_team_properties(state, version, team_id),
+                 enabled=live)
     
     # Game messages
+    live_section(game_manager, render_game_messages, enabled=live)
+    
+    # Live updates
+    st.checkbox("🔄 Live updates", value=True, key="auto_refresh_team")
+
+def render_team_status(game_state, version, team_number):
+    """Balance, position and turn status of one team"""
+    team = team_view(version, game_state, f"T{team_number}")
+    if not team:
+        st.error(f"Team {team_number} not found")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("💰 Balance", f"₹{team['balance']:,}")
+    
+    with col2:
+        st.metric("📍 Position", team['pos'])
+    
+    with col3:
+        is_current = game_state['current_player'] == (team_number - 1)
+        st.metric("🎯 Status", "Your Turn" if is_current else "Waiting")
+
+def render_team_properties(game_state, version, team_id):
+    """The team's property portfolio with its total, rent and sale value"""
+    st.subheader("🏠 Your Properties")
+    
+    portfolio = portfolio_view(version, game_state, team_id)
+    if portfolio['properties']:
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("💼 Total Value", f"₹{portfolio['total_value']:,}")
+        
+        with col2:
+            st.metric("🏷️ Rent Exposure", f"₹{portfolio['rent_exposure']:,}")
+        
+        with col3:
+            st.metric("💰 Sale Value", f"₹{portfolio['sale_value']:,}")
+        
+        for prop in portfolio['properties']:
+            st.markdown(f"🏠 **{prop['name']}** · ₹{prop['price']:,} · Rent ₹{prop['rent']:,} · "
+                        f"Sells for ₹{prop['sell_price']:,}")
+    else:
+        st.info("You don't own any properties yet")
+
+def render_game_messages(game_state, version):
+    """The latest game messages"""
     st.subheader("💬 Game Messages")
     
-    messages = game_state.get('messages', [])
+    messages = message_tail(version, game_state, 'messages', 5)
     if messages:
-        for message in reversed(messages[-5:]):  # Show last 5 messages
-            timestamp = message.get('timestamp', '')
-            text = message.get('message', '')
-            st.text(f"[{timestamp}] {text}")
+        for line in messages:
+            st.text(line)
     else:
         st.info("No messages yet")
-    
-    # Auto-refresh
-    if st.checkbox("🔄 Auto-refresh (3s)"):
-        time.sleep(3)
-        st.rerun()
 
 def send_command(game_manager, command):
     """Send a command from the control center"""
-    commands = game_manager.load_control_commands()
-    commands[datetime.now().isoformat()] = {
-        "command": command,
-        "timestamp": datetime.now().isoformat(),
-        "source": "control_center"
-    }
-    game_manager.save_control_commands(commands)
+    remember_command(game_manager.send_control_command(command), command)
+    st.rerun()
 
 def send_player_action(game_manager, team_id, action):
     """Send a player action"""
-    actions = game_manager.load_player_actions()
-    actions[team_id] = {
-        "action": action,
-        "timestamp": datetime.now().isoformat(),
-        "team_id": team_id
-    }
-    game_manager.save_player_actions(actions)
+    remember_command(game_manager.send_player_action(team_id, action), action)
+    st.rerun()
 
 if __name__ == "__main__":
     main()
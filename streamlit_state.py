@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Live Game State Sections for the Streamlit Pages
+Parts of a page that show game state (balances, current player, messages) are
+rendered as fragments that re-run on their own every LIVE_INTERVAL seconds
+instead of sleeping and re-running the whole script. A fragment run only costs
+a state version check while the game is idle, and the rest of the page (the
+action buttons) is only rebuilt when something it depends on changes.
+
+Views derived from the state (team lookups, portfolios, message tails)
+are memoized with st.cache_data keyed by the state version, so they are
+computed once per game update and shared by every session, no matter how
+often people click. When one server hosts several games (session_manager.py)
+the cache key is the version namespaced by game id (view_version()), since
+the storage versions of two games may coincide.
+
+Commands sent from a page carry an id; the game acknowledges each one in the
+exported state, and command_status_section() shows whether the last one was
+applied or rejected, keeping the page's controls locked until it is answered.
+
+trade_section() lets a team take part in the game's concurrent trades
+(trading_engine.py) from its page: bid, open a trade, close or cancel its own.
+"""
+
+import time
+
+import streamlit as st
+
+from board_svg import board_svg
+from trading_engine import AUCTION_INCREMENT, MIN_BID, MODES
+
+LIVE_INTERVAL = 1.0  # seconds between refreshes of an open tab
+VIEW_CACHE_ENTRIES = 512  # a few state versions' worth of views for every team of every hosted game
+COMMAND_TIMEOUT = 10.0   # seconds before controls unlock even if the game never answered
+
+
+def live_section(game_manager, render, enabled=True, page_state=None, rerun_when=None,
+                 rerun_if=None, interval=LIVE_INTERVAL):
+    """Render render(game_state, version) in a fragment that refreshes itself.
+
+    version is passed through view_version(), ready to key the cached views.
+
+    If rerun_when is given, the whole page reruns as soon as
+    rerun_when(game_state) differs from rerun_when(page_state), the state the
+    rest of the page was built from (e.g. whose turn it is). rerun_if(game_state)
+    returning True does the same.
+    """
+    def section():
+        game_state, version = game_manager.load_game_state_versioned()
+        if not game_state:
+            st.error("Failed to load game state")
+            return
+        if rerun_when is not None and page_state is not None and rerun_when(game_state) != rerun_when(page_state):
+            st.rerun()
+        if rerun_if is not None and rerun_if(game_state):
+            st.rerun()
+        render(game_state, view_version(game_manager, version))
+
+    st.fragment(section, run_every=interval if enabled else None)()
+
+
+def view_version(game_manager, version):
+    """Cache key for the views below: the state version, namespaced by game id when several games are hosted"""
+    namespace = getattr(game_manager, 'namespace', None)
+    return version if namespace is None else (namespace, version)
+
+
+# The state argument is left out of the cache key (leading underscore); the
+# version identifies it, so pass the state and version from the same load.
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES, show_spinner=False)
+def team_view(version, _game_state, team_id):
+    """The team dict with the given id (e.g. "T3"), or None"""
+    return next((t for t in _game_state.get('teams', []) if t['id'] == team_id), None)
+
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES, show_spinner=False)
+def team_names(version, _game_state):
+    """Team id -> team name"""
+    return {t['id']: t['name'] for t in _game_state.get('teams', [])}
+
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES, show_spinner=False)
+def portfolio_view(version, _game_state, team_id):
+    """A team's portfolio as exported by the game, with its property rows filled in.
+
+    Returns {"properties": [row, ...], "total_value", "rent_exposure",
+    "sale_value"}; each row is the property_table entry plus its board index.
+    """
+    table = _game_state.get('property_table', {})
+    portfolio = _game_state.get('portfolios', {}).get(team_id, {})
+    return {
+        "properties": [dict(table.get(str(index), {}), index=index) for index in portfolio.get('properties', [])],
+        "total_value": portfolio.get('total_value', 0),
+        "rent_exposure": portfolio.get('rent_exposure', 0),
+        "sale_value": portfolio.get('sale_value', 0),
+    }
+
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES, show_spinner=False)
+def message_tail(version, _game_state, key, count):
+    """The last count entries of a message list as "[timestamp] message" lines, newest first"""
+    entries = _game_state.get(key, [])[-count:]
+    return [f"[{entry.get('timestamp', '')}] {entry.get('message', '')}" for entry in reversed(entries)]
+
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES, show_spinner=False)
+def board_view(version, _game_state):
+    """The board drawn from the state as an SVG document (board_svg.py)"""
+    return board_svg(_game_state)
+
+
+def render_board(game_state, version):
+    """Crisp vector board: tiles, owners, tokens and balances"""
+    st.markdown(f'<div style="max-width: 640px; margin: auto">{board_view(version, game_state)}</div>',
+                unsafe_allow_html=True)
+
+
+def remember_command(command_id, command):
+    """Track a command sent from this session so its acknowledgement can be shown"""
+    st.session_state['last_command'] = {"id": command_id, "command": command, "sent_at": time.time()}
+
+
+def pending_command(game_state):
+    """This session's last command if the game has not answered it yet, else None"""
+    last = st.session_state.get('last_command')
+    if not last or last['id'] in game_state.get('command_acks', {}):
+        return None
+    if time.time() - last['sent_at'] > COMMAND_TIMEOUT:
+        return None
+    return last
+
+
+def render_command_status(game_state, version):
+    """Queued / applied / rejected status of this session's last command"""
+    last = st.session_state.get('last_command')
+    if not last:
+        return
+    label = last['command'].replace('_', ' ').title()
+    ack = game_state.get('command_acks', {}).get(last['id'])
+    if ack is None:
+        if pending_command(game_state):
+            st.info(f"⏳ {label}: queued, waiting for the game")
+        else:
+            st.warning(f"⌛ {label}: no answer from the game - is it running?")
+    elif ack['status'] == 'applied':
+        latency = f" in {ack['latency_ms']:.0f} ms" if 'latency_ms' in ack else ""
+        st.success(f"✅ {label}: applied{latency}")
+    else:
+        st.error(f"❌ {label}: rejected - {ack.get('reason')}")
+
+
+def command_status_section(game_manager, game_state, enabled=True):
+    """Live status of the last command; returns True while the page's controls should stay locked"""
+    busy = pending_command(game_state) is not None
+    live_section(game_manager, render_command_status, enabled=enabled,
+                 rerun_if=lambda state: busy and pending_command(state) is None)
+    return busy
+
+
+def render_command_metrics(game_state, version):
+    """Command counts and end-to-end latency reported by the game"""
+    metrics = game_state.get('command_metrics', {})
+    latency = metrics.get('latency_ms', {})
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("✅ Applied", metrics.get('applied', 0))
+    
+    with col2:
+        st.metric("❌ Rejected", metrics.get('rejected', 0))
+    
+    with col3:
+        st.metric("⏱️ Latency p50", f"{latency['p50']:.0f} ms" if latency else "-")
+    
+    with col4:
+        st.metric("⏱️ Latency p95", f"{latency['p95']:.0f} ms" if latency else "-")
+
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES, show_spinner=False)
+def trades_view(version, _game_state, team_id):
+    """Open trades with property and seller names, and whether team_id sells or has bid"""
+    table = _game_state.get('property_table', {})
+    names = team_names(version, _game_state)
+    return [dict(trade, name=table.get(str(trade['property']), {}).get('name', f"Property {trade['property']}"),
+                 seller_name=names.get(trade['seller'], trade['seller']), selling=trade['seller'] == team_id,
+                 has_bid=team_id in trade['bidders'])
+            for trade in _game_state.get('trades', [])]
+
+
+def open_trade_ids(game_state):
+    """Ids of the open trades (the trade controls are rebuilt when they change)"""
+    return [trade['trade_id'] for trade in game_state.get('trades', [])]
+
+
+def render_trades(game_state, version, team_id):
+    """Open trades with their time left, and this team's escrowed money"""
+    trades = trades_view(version, game_state, team_id)
+    held = game_state.get('escrow', {}).get(team_id, 0)
+    if held:
+        st.caption(f"🔒 ₹{held:,} held in your bids")
+    if not trades:
+        st.info("No open trades")
+    for trade in trades:
+        left = max(0, int(trade['deadline'] - time.time()))
+        if trade['mode'] == 'auction':
+            high = f"high bid ₹{trade['high_bid']:,}" if trade['high_bidder'] else "no bids yet"
+        else:
+            high = f"{len(trade['bidders'])} sealed bids"
+        st.markdown(f"🤝 **{trade['name']}** from {trade['seller_name']} · {trade['mode']} · {high} · ⏱️ {left}s")
+
+
+def trade_section(game_manager, game_state, version, team_id, send, busy=False, enabled=True):
+    """Trades a team can join from its page; send(action, **fields) queues a player action.
+
+    game_state and version are the page's load; the controls are rebuilt when trades open or close.
+    """
+    st.subheader("🤝 Trades")
+    live_section(game_manager, lambda state, version: render_trades(state, version, team_id), enabled=enabled,
+                 page_state=game_state, rerun_when=open_trade_ids)
+    
+    version = view_version(game_manager, version)
+    for trade in trades_view(version, game_state, team_id):
+        key = trade['trade_id']
+        if trade['selling']:
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button(f"✅ Close {trade['name']} now", key=f"close-{key}", disabled=busy):
+                    send("close_trade", trade_id=key)
+            with col2:
+                if st.button(f"✖️ Cancel {trade['name']}", key=f"cancel-{key}", disabled=busy):
+                    send("cancel_trade", trade_id=key)
+            continue
+        minimum = max(MIN_BID, trade['reserve'])
+        if trade['mode'] == 'auction' and trade['high_bidder']:
+            minimum = max(minimum, trade['high_bid'] + AUCTION_INCREMENT)
+        amount = st.number_input(f"Bid for {trade['name']} (₹)", min_value=minimum, value=minimum,
+                                 step=AUCTION_INCREMENT, key=f"bid-{key}")
+        label = "🔁 Revise sealed bid" if trade['has_bid'] else "💸 Place bid"
+        if st.button(label, key=f"place-{key}", disabled=busy):
+            send("bid", trade_id=key, amount=int(amount))
+    
+    owned = [prop for prop in portfolio_view(version, game_state, team_id)['properties']
+             if prop['index'] not in {trade['property'] for trade in game_state.get('trades', [])}]
+    if owned:
+        with st.expander("🏷️ Put a property up for trade"):
+            prop = st.selectbox("Property", owned, format_func=lambda row: row['name'], key="trade-property")
+            mode = st.radio("Mode", MODES, horizontal=True, key="trade-mode")
+            reserve = st.number_input("Reserve (₹)", min_value=0, value=prop['sell_price'], step=AUCTION_INCREMENT,
+                                      key="trade-reserve")
+            if st.button("🤝 Open trade", disabled=busy):
+                send("open_trade", property=prop['index'], mode=mode, reserve=int(reserve))
@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+Delta Sync Daemon for the Cloud Copy of the Game Files
+Replaces the "git add, git commit, git push every 5 seconds" loop. The daemon
+watches the game's JSON files with cheap stat() calls, lets a burst of writes
+settle (but never holds a change longer than MAX_DELAY), and ships only what
+changed since the last sync, as JSON Patches (json_patch.py), through a
+pluggable transport:
+
+- HttpTransport: POSTs deltas to a SyncServer (`python sync_daemon.py serve`)
+  running next to the cloud app, which writes the files there. Each delta is
+  signed with an HMAC of the shared MONOPOLY_SYNC_SECRET; the server drops
+  unsigned ones and ones older than the last it applied
+- GitTransport:  force-pushes the orphan state branch (git_sync.py), one commit per burst
+
+SyncDaemon.metrics() reports how many syncs ran and how long changes waited
+(lag from the first write of a burst to the transport confirming it); the
+SyncServer reports the end-to-end lag it sees at /metrics.
+
+Dashboards elsewhere keep their own copy with StateFetcher
+(`python sync_daemon.py fetch http://host:port`): it polls /files/<name> with
+If-None-Match, so an unchanged file costs a bodiless 304, and asks for delta
+encoding (RFC 3229, A-IM), so a changed one usually arrives as a JSON Patch
+instead of the whole file.
+
+When the game keeps its state as a patch stream (MONOPOLY_BACKEND=stream), the
+daemon follows the stream rather than the game_state.json checkpoint.
+"""
+
+import hashlib
+import hmac
+import http.client
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from game_storage import file_version, read_json, write_json
+from git_sync import KEEP_COMMITS, STATE_BRANCH, GitStateSync
+from json_patch import PatchReplica, apply_patch, make_patch, stream_path
+
+# Only the game state goes from the laptop to the cloud. The command queues are
+# written on the cloud side and reach the game through the command channel;
+# shipping the laptop's copies would overwrite queued commands
+SYNC_FILES = ['game_state.json']
+DEFAULT_PORT = 8766
+POLL_INTERVAL = 0.05  # seconds between stat() checks of the watched files
+SETTLE_DELAY = 0.2    # ship once the files have been quiet this long...
+MAX_DELAY = 0.75      # ...or once the oldest unshipped change is this old
+RETRY_DELAY = 1.0     # seconds to wait after a failed push
+LAG_WINDOW = 200      # recent sync lags used for the metrics
+PATCH_HISTORY = 16    # versions per file the server can send deltas against
+FETCH_INTERVAL = 1.0  # seconds between StateFetcher polls
+DELTA_ENCODING = "json-patch"  # A-IM / IM token for RFC 6902 patch bodies
+SECRET_ENV = "MONOPOLY_SYNC_SECRET"  # shared between the daemon and the server
+SIGNATURE_HEADER = "X-Sync-Signature"
+
+
+def sign(secret, body):
+    """Hex HMAC-SHA256 of a request body"""
+    return hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+
+def apply_delta(files, delta):
+    """Apply a sync delta to {filename: data}; returns the new mapping"""
+    if "full" in delta:
+        return dict(delta["full"])
+    files = dict(files)
+    for name, patch in delta.get("files", {}).items():
+        files[name] = apply_patch(files.get(name), patch)
+    return files
+
+
+def _lag_stats(lags):
+    if not lags:
+        return {}
+    ordered = sorted(lags)
+    return {
+        "count": len(ordered),
+        "last": lags[-1],
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1]
+    }
+
+
+class HttpClient:
+    """One kept-alive HTTP connection to a SyncServer, reconnecting once if it dropped"""
+
+    def __init__(self, url, timeout=5.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or DEFAULT_PORT
+        self.base_path = parsed.path.rstrip('/')
+        self.timeout = timeout
+        self._conn = None
+
+    def request(self, method, path, body=None, headers=None):
+        """Return (status, response headers, body bytes)"""
+        for attempt in range(2):
+            try:
+                if self._conn is None:
+                    self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                self._conn.request(method, self.base_path + path, body, headers or {})
+                response = self._conn.getresponse()
+                return response.status, response.headers, response.read()
+            except (OSError, http.client.HTTPException):
+                self.close()
+                if attempt == 1:
+                    raise
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class HttpTransport:
+    """Sends signed deltas to a SyncServer over one kept-alive HTTP connection"""
+
+    def __init__(self, url, timeout=5.0, secret=None):
+        self.client = HttpClient(url, timeout)
+        self.secret = secret if secret is not None else os.environ.get(SECRET_ENV, "")
+
+    def _post(self, delta):
+        body = json.dumps(delta).encode('utf-8')
+        headers = {"Content-Type": "application/json", SIGNATURE_HEADER: sign(self.secret, body)}
+        status, _, _ = self.client.request("POST", "/deltas", body, headers)
+        if status == 403:
+            raise PermissionError(f"sync server refused the delta: set {SECRET_ENV} to the server's secret")
+        return status, len(body)
+
+    def push(self, delta, files):
+        """Ship a delta; returns the number of bytes sent"""
+        status, sent = self._post(delta)
+        if status == 409:
+            # The server lost track (restarted, or missed a delta): send everything
+            full = {key: value for key, value in delta.items() if key != "files"}
+            status, resent = self._post(dict(full, base=None, full=files))
+            sent += resent
+        if status != 200:
+            raise ConnectionError(f"sync server answered {status}")
+        return sent
+
+    def close(self):
+        self.client.close()
+
+
+class GitTransport:
+    """Pushes one commit per burst of changes, built without touching the checkout (git_sync.py)"""
+
+    def __init__(self, repo_dir=".", remote="origin", branch=STATE_BRANCH, keep=KEEP_COMMITS):
+        self.git = GitStateSync(repo_dir, remote, branch, keep)
+
+    def push(self, delta, files):
+        """Commit and push the files named in the delta; returns the bytes of JSON committed"""
+        names = sorted(delta.get("full") or delta.get("files", {}))
+        contents = {name: json.dumps(files[name], indent=2).encode('utf-8') for name in names if name in files}
+        if self.git.sync(contents, f'Sync game state #{delta["seq"]} - {datetime.now()}') is None:
+            return 0  # already committed as they are
+        return sum(len(content) for content in contents.values())
+
+    def close(self):
+        pass
+
+
+class SyncDaemon:
+    """Watches the game's JSON files and ships coalesced deltas through a transport"""
+
+    def __init__(self, transport, directory=".", files=None, settle=SETTLE_DELAY, max_delay=MAX_DELAY,
+                 poll_interval=POLL_INTERVAL):
+        self.transport = transport
+        self.directory = directory
+        self.files = list(files or SYNC_FILES)
+        self.settle = settle
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.seq = 0
+        self.shipped = {}   # filename -> data the transport last confirmed
+        self.versions = {}  # filename -> version token seen by the last poll
+        self.replicas = {}  # filename -> PatchReplica of its patch stream
+        self.first_change = None
+        self.last_change = None
+        self.retry_at = 0.0
+        self.lags = deque(maxlen=LAG_WINDOW)
+        self.stats = {"syncs": 0, "changes": 0, "bytes": 0, "errors": 0, "last_error": None}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _version(self, name):
+        version = file_version(stream_path(self._path(name)))
+        return version if version is not None else file_version(self._path(name))
+
+    def _read(self, name):
+        replica = self.replicas.get(name)
+        if replica is None:
+            replica = self.replicas[name] = PatchReplica(stream_path(self._path(name)))
+        data, version = replica.read()
+        return data if version is not None else read_json(self._path(name))
+
+    def poll(self):
+        """Note which watched files changed since the last poll; returns True if any did"""
+        changed = False
+        for name in self.files:
+            version = self._version(name)
+            if version != self.versions.get(name):
+                self.versions[name] = version
+                changed = True
+        if changed:
+            now = time.monotonic()
+            self.stats["changes"] += 1
+            if self.first_change is None:
+                self.first_change = now
+            self.last_change = now
+        return changed
+
+    def _due(self, now):
+        if self.first_change is None or now < self.retry_at:
+            return False
+        return now - self.last_change >= self.settle or now - self.first_change >= self.max_delay
+
+    def sync_once(self, force=False):
+        """Ship pending changes if the burst has settled (or force); returns True if a delta was sent"""
+        self.poll()
+        now = time.monotonic()
+        if not (force and self.first_change is not None) and not self._due(now):
+            return False
+
+        current = {}
+        for name in self.files:
+            data = self._read(name)
+            if data is not None:
+                current[name] = data
+        changes = {}
+        for name, data in current.items():
+            patch = make_patch(self.shipped[name], data) if name in self.shipped else \
+                [{"op": "replace", "path": "", "value": data}]
+            if patch:
+                changes[name] = patch
+        if not changes:
+            self.first_change = None  # rewritten with the same content
+            return False
+
+        changed_at = time.time() - (now - self.first_change)
+        delta = {"seq": self.seq + 1, "base": self.seq, "changed_at": changed_at, "sent_at": time.time()}
+        if self.seq == 0:
+            delta.update(base=None, full=current)
+        else:
+            delta["files"] = changes
+        try:
+            sent = self.transport.push(delta, current)
+        except Exception as e:
+            self.stats["errors"] += 1
+            self.stats["last_error"] = str(e)
+            self.retry_at = time.monotonic() + RETRY_DELAY
+            print(f"❌ Sync failed, retrying: {e}")
+            return False
+
+        self.seq += 1
+        self.shipped = current
+        self.stats["syncs"] += 1
+        self.stats["bytes"] += sent
+        self.lags.append(round((time.monotonic() - self.first_change) * 1000, 1))
+        self.first_change = None
+        return True
+
+    def run(self):
+        """Sync until stop() is called"""
+        while not self._stop.is_set():
+            self.sync_once()
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Run the daemon in a background thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="sync-daemon", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.transport.close()
+
+    def metrics(self):
+        """Sync counts, bytes shipped and lag (ms from first change to confirmed push)"""
+        return dict(self.stats, seq=self.seq, pending=self.first_change is not None,
+                    lag_ms=_lag_stats(self.lags))
+
+
+class _SyncRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive for the daemon's connection
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path.rstrip('/').split('/')[-1] != "deltas":
+            self._reply(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        if not hmac.compare_digest(self.headers.get(SIGNATURE_HEADER, ""), sign(self.server.secret, body)):
+            self._reply(403, {"error": "bad signature"})
+            return
+        try:
+            delta = json.loads(body)
+        except ValueError:
+            self._reply(400, {"error": "invalid JSON"})
+            return
+        if self.server.apply(delta):
+            self._reply(200, {"seq": delta["seq"]})
+        else:
+            self._reply(409, {"seq": self.server.seq})
+
+    def do_GET(self):
+        parts = urlparse(self.path).path.strip('/').split('/')
+        if parts[-1] == "state":
+            with self.server.lock:
+                self._reply(200, {"seq": self.server.seq, "files": self.server.files})
+        elif parts[-1] == "metrics":
+            self._reply(200, self.server.metrics())
+        elif len(parts) >= 2 and parts[-2] == "files":
+            self._send_file(parts[-1])
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def _send_file(self, name):
+        """Conditional GET: 304 if unchanged, 226 with a delta if the client's version is known, else 200"""
+        with self.server.lock:
+            history = list(self.server.history.get(name, ()))
+        if not history:
+            self._reply(404, {"error": "not found"})
+            return
+        etag, data, body = history[-1]
+        known = self.headers.get("If-None-Match")
+        status, headers = 200, {}
+        if known == etag:
+            status, body = 304, b""
+        elif known and DELTA_ENCODING in self.headers.get("A-IM", ""):
+            base = next((old for old_etag, old, _ in history if old_etag == known), None)
+            if base is not None:
+                delta = json.dumps(make_patch(base, data)).encode('utf-8')
+                if len(delta) < len(body):
+                    status, body, headers = 226, delta, {"IM": DELTA_ENCODING}
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if status != 304:
+            self.send_header("Content-Type", "application/json-patch+json" if status == 226 else "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # one line per delta would drown the console
+
+
+class SyncServer(ThreadingHTTPServer):
+    """Receives signed deltas from a SyncDaemon and writes the files into a directory.
+
+    Listens on this machine only unless given another host (e.g. "0.0.0.0").
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, directory=".", host="127.0.0.1", port=DEFAULT_PORT, secret=None):
+        secret = secret if secret is not None else os.environ.get(SECRET_ENV, "")
+        if not secret:
+            raise ValueError(f"the sync server needs a shared secret ({SECRET_ENV})")
+        super().__init__((host, port), _SyncRequestHandler)
+        self.directory = directory
+        self.secret = secret
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.sent_at = 0.0  # send time of the last delta applied; older ones are replays
+        self.files = {}
+        self.history = {}  # filename -> deque of (etag, data, JSON body), newest last
+        self.instance = uuid.uuid4().hex[:8]  # ETags from before a restart never match
+        self.lags = deque(maxlen=LAG_WINDOW)
+
+    def apply(self, delta):
+        """Apply a delta if it builds on what we have; False asks the daemon for a full snapshot"""
+        with self.lock:
+            if "full" not in delta and delta.get("base") != self.seq:
+                return False
+            if delta.get("sent_at", 0) < self.sent_at:
+                return False
+            files = apply_delta(self.files, delta)
+            changed = delta.get("full") or delta.get("files", {})
+            for name in changed:
+                filename = os.path.basename(name)
+                write_json(os.path.join(self.directory, filename), files[name], indent=2)
+                self.history.setdefault(filename, deque(maxlen=PATCH_HISTORY)).append(
+                    (f'"{self.instance}-{delta["seq"]}"', files[name], json.dumps(files[name]).encode('utf-8')))
+            self.files = files
+            self.seq = delta["seq"]
+            self.sent_at = delta.get("sent_at", 0)
+            # Machines' clocks may disagree a little; clamp at zero
+            self.lags.append(max(0.0, round((time.time() - delta.get("changed_at", time.time())) * 1000, 1)))
+            return True
+
+    def metrics(self):
+        with self.lock:
+            return {"seq": self.seq, "lag_ms": _lag_stats(self.lags)}
+
+
+class HttpFetchTransport:
+    """Conditional GETs of single files from a SyncServer"""
+
+    def __init__(self, url, timeout=5.0):
+        self.client = HttpClient(url, timeout)
+
+    def fetch(self, name, etag=None):
+        """Return (status, etag, body bytes): 304 unchanged, 226 a JSON Patch, 200 the file"""
+        headers = {"A-IM": DELTA_ENCODING}
+        if etag:
+            headers["If-None-Match"] = etag
+        status, response_headers, body = self.client.request("GET", f"/files/{name}", headers=headers)
+        if status == 226 and response_headers.get("IM") != DELTA_ENCODING:
+            raise ConnectionError(f"unexpected delta encoding {response_headers.get('IM')!r}")
+        return status, response_headers.get("ETag"), body
+
+    def close(self):
+        self.client.close()
+
+
+class StateFetcher:
+    """Keeps a copy of the synced files current by polling with conditional requests"""
+
+    def __init__(self, transport, files=None, directory=None):
+        self.transport = transport
+        self.files = list(files or SYNC_FILES)
+        self.directory = directory  # also write the files here when set
+        self.data = {}
+        self.etags = {}
+        self.stats = {"polls": 0, "not_modified": 0, "deltas": 0, "full": 0, "bytes": 0}
+
+    def poll(self):
+        """Fetch whatever changed since the last poll; returns the names that changed"""
+        changed = []
+        self.stats["polls"] += 1
+        for name in self.files:
+            etag = self.etags.get(name) if name in self.data else None
+            status, new_etag, body = self.transport.fetch(name, etag)
+            self.stats["bytes"] += len(body)
+            if status == 304:
+                self.stats["not_modified"] += 1
+                continue
+            if status == 226:
+                self.data[name] = apply_patch(self.data[name], json.loads(body))
+                self.stats["deltas"] += 1
+            elif status == 200:
+                self.data[name] = json.loads(body)
+                self.stats["full"] += 1
+            else:
+                continue  # not synced yet
+            self.etags[name] = new_etag
+            if self.directory is not None:
+                write_json(os.path.join(self.directory, name), self.data[name], indent=2)
+            changed.append(name)
+        return changed
+
+
+def main():
+    """Run the sync daemon (game laptop) or the sync server (cloud side)"""
+    if len(sys.argv) >= 2 and sys.argv[1] == "serve":
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PORT
+        directory = sys.argv[3] if len(sys.argv) > 3 else "."
+        host = sys.argv[4] if len(sys.argv) > 4 else "127.0.0.1"
+        secret = os.environ.get(SECRET_ENV) or secrets.token_urlsafe(16)
+        server = SyncServer(directory, host=host, port=port, secret=secret)
+        print(f"📥 Receiving game state deltas on {host}:{port} into {os.path.abspath(directory)}")
+        if not os.environ.get(SECRET_ENV):
+            print(f"🔑 The game laptop needs {SECRET_ENV}={secret}")
+        if host == "127.0.0.1":
+            print("ℹ️ Only this machine can connect; pass 0.0.0.0 as the host to accept the game laptop")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n🛑 Sync server stopped")
+        finally:
+            server.server_close()
+        return
+
+    if len(sys.argv) >= 3 and sys.argv[1] == "fetch":
+        fetcher = StateFetcher(HttpFetchTransport(sys.argv[2]), directory=sys.argv[3] if len(sys.argv) > 3 else ".")
+        print(f"📡 Keeping the game files current from {sys.argv[2]} (Ctrl+C to stop)")
+        try:
+            while True:
+                try:
+                    fetcher.poll()
+                except (OSError, http.client.HTTPException) as e:
+                    print(f"❌ Fetch failed, retrying: {e}")
+                time.sleep(FETCH_INTERVAL)
+        except KeyboardInterrupt:
+            print(f"\n🛑 Fetch stopped: {fetcher.stats}")
+        return
+
+    if len(sys.argv) >= 3 and sys.argv[1] == "push":
+        transport = HttpTransport(sys.argv[2])
+    elif len(sys.argv) >= 2 and sys.argv[1] == "git":
+        transport = GitTransport(remote=sys.argv[2] if len(sys.argv) > 2 else "origin",
+                                 branch=sys.argv[3] if len(sys.argv) > 3 else STATE_BRANCH)
+    else:
+        print("Usage: python sync_daemon.py serve [port] [directory] [host]")
+        print("       python sync_daemon.py push http://cloud-host:port")
+        print("       python sync_daemon.py git [remote] [branch]")
+        print("       python sync_daemon.py fetch http://host:port [directory]")
+        return
+
+    daemon = SyncDaemon(transport)
+    daemon.start()
+    print("🔄 Syncing game files as they change (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(30)
+            metrics = daemon.metrics()
+            print(f"📊 {metrics['syncs']} syncs, {metrics['bytes']:,} bytes, lag {metrics['lag_ms']}")
+    except KeyboardInterrupt:
+        print("\n🛑 Sync daemon stopped")
+    finally:
+        daemon.stop()
+
+
+if __name__ == "__main__":
+    main()
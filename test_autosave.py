@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the crash-safe autosave and resume
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import benchmark_game
+from autosave import AutoSaver, load_autosave
+from main import AUTOSAVE_FILE, Game
+
+
+@pytest.fixture
+def workdir(tmp_path):
+    cwd = os.getcwd()
+    try:
+        yield tmp_path
+    finally:
+        os.chdir(cwd)
+
+
+def test_a_crashed_game_resumes_exactly(workdir):
+    game = benchmark_game.create_benchmark_game(str(workdir), autosave=True)
+    game.roll_dice()
+    while game.moving:
+        game._update()
+    game._set_owner(2, "T2")
+    game.skip_next_turn["T3"] = True
+    game._test_chance()
+    game.used_mysteries = game.mystery_cards[:2]
+    game.seen_commands["client-1"] = time.time()
+    game._update()
+    expected = game._autosave_state()
+    assert game.autosaver.flush()
+    # No close(): the process "crashes" here
+
+    resumed = Game(autosave_path=AUTOSAVE_FILE)
+    try:
+        state = resumed._autosave_state()
+        assert state.pop("streamlit_messages")[:-1] == expected.pop("streamlit_messages")
+        assert state == expected
+        assert resumed.streamlit_messages[-1]["message"] == "Game resumed after a restart"
+        assert resumed.chance_card is resumed.chance_cards[game.chance_cards.index(game.chance_card)]
+        assert resumed.used_mysteries[0] is resumed.mystery_cards[0]
+        assert resumed.teams[0].color == game.teams[0].color
+        assert "client-1" in resumed.seen_commands
+        assert game.autosaver.metrics()["journal_entries"] > 0
+    finally:
+        resumed.autosaver.close()
+        game.autosaver.close()
+        resumed.state_manager.close()
+        game.state_manager.close()
+
+
+def test_idle_frames_build_no_snapshot(workdir):
+    game = benchmark_game.create_benchmark_game(str(workdir), autosave=True)
+    try:
+        # No feedback message counting down either
+        game.chance_feedback = game.mystery_feedback = game.sell_property_feedback = None
+        game._update()
+        built = []
+        snapshot = game._autosave_state
+        game._autosave_state = lambda: built.append(1) or snapshot()
+        for _ in range(10):
+            game._update()
+        assert built == []
+
+        game._set_owner(2, "T2")
+        game._update()
+        assert built == [1]
+        assert game.autosaver.flush()
+        assert load_autosave(AUTOSAVE_FILE)["properties"][2]["owner"] == "T2"
+    finally:
+        game.autosaver.close()
+        game.state_manager.close()
+
+
+def test_submit_never_waits_for_the_disk(tmp_path):
+    path = str(tmp_path / "autosave.jsonl")
+    saver = AutoSaver(path, checkpoint_interval=3, interval=0)
+    write = saver.writer.write
+
+    def slow_write(state):
+        time.sleep(0.05)
+        return write(state)
+    saver.writer.write = slow_write
+
+    started = time.perf_counter()
+    for step in range(20):
+        saver.submit({"step": step, "teams": [{"id": "T1", "balance": step}]})
+    assert time.perf_counter() - started < 0.05
+    saver.close()
+
+    metrics = saver.metrics()
+    assert metrics["coalesced"] > 0
+    assert metrics["writes"] + metrics["coalesced"] == 20
+    assert load_autosave(path) == {"step": 19, "teams": [{"id": "T1", "balance": 19}]}
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Smoke test for the performance benchmark suite
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import benchmark_game
+from main import Game
+
+
+def test_every_draw_routine_is_benchmarked():
+    """Each Game._draw_* routine should have a benchmark calling it"""
+    import inspect
+    sources = "".join(inspect.getsource(fn) for _, fn in benchmark_game.BENCHMARKS.values())
+    draw_routines = [name for name in dir(Game) if name.startswith("_draw_")]
+    missing = [name for name in draw_routines if f"game.{name}(" not in sources]
+    assert not missing, f"Draw routines without a benchmark: {missing}"
+
+
+def test_benchmarks_run_and_compare():
+    """All benchmarks should run headless and feed the baseline comparison"""
+    results = benchmark_game.run_benchmarks(min_time=0)
+    assert set(results["benchmarks"]) == set(benchmark_game.BENCHMARKS)
+    for stats in results["benchmarks"].values():
+        assert stats["rounds"] >= 5
+        assert stats["min"] <= stats["median"]
+
+    slower = {"benchmarks": {name: dict(stats, median=stats["median"] * 2)
+                             for name, stats in results["benchmarks"].items()}}
+    assert benchmark_game.compare_results(results, results) == []
+    assert len(benchmark_game.compare_results(slower, results)) == len(results["benchmarks"])
+
+
+def test_codec_report_covers_every_payload_and_format():
+    """Each serialized payload should round-trip through every format, binary being the smallest"""
+    rows = benchmark_game.run_codec_report(min_time=0)
+    assert {row["payload"] for row in rows} == {"streamlit_state", "history_entry", "event_log"}
+    assert all(row["roundtrip"] for row in rows)
+    for payload in ("streamlit_state", "history_entry", "event_log"):
+        sizes = {row["codec"]: row["bytes"] for row in rows if row["payload"] == payload}
+        assert sizes["binary"] == min(sizes.values())
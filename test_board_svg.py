@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for the SVG board view
+"""
+import sys
+import os
+import copy
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import benchmark_game
+from board_svg import SPECIAL_TILES, BoardSvg, board_svg, tile_positions
+
+
+@pytest.fixture
+def state(tmp_path):
+    """The exported state of a populated game"""
+    cwd = os.getcwd()
+    game = None
+    try:
+        game = benchmark_game.create_benchmark_game(str(tmp_path))
+        game.save_streamlit_state()
+        yield game.state_manager.load_game_state()
+    finally:
+        if game is not None:
+            game.state_manager.close()
+        os.chdir(cwd)
+
+
+def test_board_matches_the_game_layout():
+    import main
+    assert len(tile_positions(0, 0, 700, 700)) == 24
+    assert tile_positions(100, 50, 700, 700)[0] == (150, 700)
+    chance = [i for i, name in SPECIAL_TILES.items() if name == "Chance"]
+    mystery = [i for i, name in SPECIAL_TILES.items() if name == "Mystery"]
+    assert chance == main.CHANCE_TILES and mystery == main.MYSTERY_TILES
+
+
+def test_only_changed_elements_are_rerendered(state):
+    board = BoardSvg()
+    svg, changes = board.update(state, version=1)
+    assert svg == board_svg(state) and svg.startswith("<svg")
+    assert len(changes) == 2 * 24 + 2 * len(state["teams"])  # everything is new
+    assert f'>{state["property_table"]["3"]["name"].split()[0]} ' in svg
+    assert board.update(state, version=1) == (svg, {})
+
+    moved = copy.deepcopy(state)
+    moved["teams"][0]["pos"] = 5
+    moved["teams"][0]["balance"] -= 500_000
+    svg, changes = board.update(moved, version=2)
+    assert set(changes) == {"token-T1", "balance-T1"}
+    assert sum(len(element) for element in changes.values()) < 500
+    assert changes["token-T1"] in svg
+
+    fewer = copy.deepcopy(moved)
+    fewer["teams"].pop()
+    _, changes = board.update(fewer, version=3)
+    removed = moved["teams"][-1]["id"]
+    assert changes[f"token-{removed}"] == changes[f"balance-{removed}"] == ""
+    owned = {f"owner-{i}" for i, prop in fewer["properties"].items() if prop.get("owner") == removed}
+    assert set(changes) == owned | {f"token-{removed}", f"balance-{removed}"}
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming board frames to remote viewers
+"""
+import sys
+import os
+import random
+import subprocess
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pygame
+
+from frame_replica import FrameReplica
+from frame_stream import FrameStreamer, changed_regions, _tile_rects
+
+
+def test_changed_tiles_merge_into_few_regions():
+    rects = _tile_rects(4 * 32, 3 * 32, 32)
+    changed = [True, True, False, False,
+               True, True, False, True,
+               False, False, False, True]
+    regions = changed_regions(rects, changed, 4)
+    assert sorted(tuple(r) for r in regions) == [(0, 0, 64, 64), (96, 32, 32, 64)]
+
+
+def test_only_changed_regions_are_streamed(tmp_path):
+    path = str(tmp_path / "board_frames.jsonl")
+    streamer = FrameStreamer(path, max_fps=4, width=200, fmt="png")
+    replica = FrameReplica(path, fmt="png")
+    screen = pygame.Surface((400, 300))
+    rng = random.Random(7)
+    for _ in range(300):  # something board-like to compress
+        screen.fill([rng.randrange(256) for _ in range(3)],
+                    pygame.Rect(rng.randrange(400), rng.randrange(300), rng.randrange(5, 60), rng.randrange(5, 60)))
+
+    assert streamer.capture(screen, now=0)
+    keyframe_bytes = streamer.stats["bytes"]
+    assert not streamer.capture(screen, now=1)   # nothing changed: nothing written
+    screen.fill((200, 0, 0), pygame.Rect(10, 10, 30, 20))
+    assert not streamer.capture(screen, now=1.1)  # over the frame-rate cap: not even looked at
+    assert streamer.capture(screen, now=2)
+
+    assert streamer.stats == dict(streamer.stats, captures=3, unchanged=1, keyframes=1, regions=1)
+    assert streamer.stats["bytes"] - keyframe_bytes < keyframe_bytes / 4
+    frame, seq = replica.read()
+    assert seq == 2
+    expected = pygame.transform.smoothscale(screen, (200, 150))
+    assert frame.tobytes() == pygame.image.tobytes(expected, "RGB")
+
+    # Most of the screen changed: a keyframe replaces the stream
+    screen.fill((0, 0, 200))
+    assert streamer.capture(screen, now=3)
+    assert streamer.stats["keyframes"] == 2
+    frame, seq = replica.read()
+    assert seq == 3 and frame.getpixel((100, 75)) == (0, 0, 200)
+    image, _ = replica.read_image()
+    assert image.startswith(b"\x89PNG")
+
+
+def test_viewers_do_not_need_pygame():
+    # streamlit_mobile.py runs on Streamlit Cloud, where pygame isn't installed
+    code = "import sys, frame_replica; sys.exit('pygame' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__))).returncode == 0
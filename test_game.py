@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Tests for the Game logic that runs without a window
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import benchmark_game
+
+
+@pytest.fixture
+def game(tmp_path):
+    """A populated Game working in its own temporary directory"""
+    cwd = os.getcwd()
+    game = None
+    try:
+        game = benchmark_game.create_benchmark_game(str(tmp_path))
+        yield game
+    finally:
+        if game is not None:
+            game.state_manager.close()
+        os.chdir(cwd)
+
+
+def test_exported_state_carries_portfolios(game):
+    """The game sums each team's portfolio once when it exports the state"""
+    game.save_streamlit_state()
+    state = game.state_manager.load_game_state()
+
+    portfolio = state["portfolios"]["T1"]
+    assert portfolio["properties"] == [1, 3, 21]
+    assert portfolio["total_value"] == 3_000_000 + 2_500_000 + 2_000_000
+    assert portfolio["rent_exposure"] == 1_500_000
+    assert portfolio["sale_value"] == sum(game._sell_price(i) for i in (1, 3, 21))
+    assert state["property_table"]["3"]["sell_price"] == game._sell_price(3)
+
+
+def test_command_batch_is_applied_in_one_step(game):
+    batch_id = game.state_manager.add_command_batch([
+        {"command": "reset_game"},
+        {"command": "set_balance", "team_id": "T2", "balance": 12_000_000},
+        {"command": "set_current_player", "team_id": "T3"},
+    ])
+    game.check_streamlit_commands()
+
+    assert game.state_manager.command_ack(batch_id)["status"] == "applied"
+    assert game.teams[1].balance == 12_000_000
+    assert game.current_idx == 2
+    assert all(prop["owner"] is None for prop in game.properties)
+    assert len(game.game_history) == 1  # undo reverts the whole batch
+    messages = [m["message"] for m in game.state_manager.load_game_state()["messages"]]
+    assert messages[-3:] == ["Control Center: Reset game", "Control Center: Set Team 2 balance to ₹12,000,000",
+                             "Control Center: Turn set to Team 3"]
+
+
+def test_batches_keep_the_undo_history_bounded(game):
+    for _ in range(game.max_history_size):
+        game._save_state()
+    for balance in range(5):
+        game.state_manager.add_command_batch([{"command": "set_balance", "team_id": "T2", "balance": balance}])
+        game.check_streamlit_commands()
+        assert len(game.game_history) == game.max_history_size
+    game._undo_state()
+    assert game.teams[1].balance == 3  # the last batch is undone as one step
+
+
+def test_rejected_batch_leaves_the_game_untouched(game):
+    balances = [team.balance for team in game.teams]
+    owners = [prop["owner"] for prop in game.properties]
+    batch_id = game.state_manager.add_command_batch([
+        {"command": "set_balance", "team_id": "T1", "balance": 1},
+        {"command": "set_current_player", "team_id": "T9"},
+    ])
+    game.check_streamlit_commands()
+
+    ack = game.state_manager.command_ack(batch_id)
+    assert ack["status"] == "rejected" and "T9" in ack["reason"]
+    assert [team.balance for team in game.teams] == balances
+    assert [prop["owner"] for prop in game.properties] == owners
+    messages = [m["message"] for m in game.state_manager.load_game_state()["messages"]]
+    assert not any("balance" in message for message in messages)  # the rolled-back step left no trace
+    assert messages[-1].startswith("Control Center: Batch rejected")
+
+
+def test_commands_are_acknowledged_with_latency(game):
+    game.current_idx = 0
+    manager = game.state_manager
+    applied = manager.send_control_command("set_balance", team_id="T2", balance=5_000_000)
+    wrong_team = manager.send_player_action("T3", "roll_dice")
+    game.check_streamlit_commands()
+    game.check_streamlit_player_actions()
+
+    assert manager.command_ack(applied)["status"] == "applied"
+    ack = manager.command_ack(wrong_team)
+    assert ack["status"] == "rejected" and "turn" in ack["reason"]
+    assert ack["latency_ms"] >= 0
+
+    metrics = manager.command_metrics()
+    assert (metrics["applied"], metrics["rejected"]) == (1, 1)
+    assert metrics["latency_ms"]["count"] == 2
+
+
+def test_queued_commands_apply_once_in_send_order(game):
+    game.current_idx = 0
+    manager = game.state_manager
+    # A fast double click queues both actions instead of overwriting the first
+    manager.send_player_action("T1", "end_turn")
+    manager.send_player_action("T2", "end_turn")
+    # A client retrying after a failed read resends with the same key
+    for attempt in range(3):
+        manager.send_control_command("next_turn", idempotency_key="retry-1")
+    for balance in (1_000_000, 2_000_000, 3_000_000):
+        manager.send_control_command("set_balance", team_id="T4", balance=balance)
+    game.check_streamlit_player_actions()
+    game.check_streamlit_commands()
+
+    assert game.current_idx == 3
+    assert game.teams[3].balance == 3_000_000
+    assert manager.command_metrics()["duplicates"] == 2
+
+
+def test_teams_trade_concurrently_from_streamlit(game):
+    manager = game.state_manager
+    game.current_idx = 0
+    opened = manager.send_player_action("T2", "open_trade", property=5, mode="sealed", reserve=1_000_000)
+    manager.send_player_action("T3", "open_trade", property=9, mode="auction")
+    not_owned = manager.send_player_action("T4", "open_trade", property=1)
+    game.check_streamlit_player_actions()
+    assert manager.command_ack(opened)["status"] == "applied"
+    assert "doesn't own" in manager.command_ack(not_owned)["reason"]
+
+    trades = {trade["property"]: trade["trade_id"] for trade in manager.load_game_state()["trades"]}
+    for team_id, amount in (("T1", 2_000_000), ("T3", 2_500_000), ("T4", 1_500_000), ("T5", 2_500_000)):
+        manager.send_player_action(team_id, "bid", trade_id=trades[5], amount=amount)
+    manager.send_player_action("T1", "bid", trade_id=trades[9], amount=1_000_000)
+    game.check_streamlit_player_actions()
+    game._update_trades()
+
+    # Every other team bid on the sealed trade: the earliest of the two highest bids wins
+    assert game.properties[5]["owner"] == "T3"
+    assert [team.balance for team in game.teams] == [9_000_000, 12_500_000, 7_500_000, 10_000_000, 10_000_000]
+    state = manager.load_game_state()
+    assert [trade["property"] for trade in state["trades"]] == [9]
+    assert state["escrow"] == {"T1": 1_000_000}
+
+    cancelled = manager.send_control_command("cancel_trade", trade_id=trades[9])
+    game.check_streamlit_commands()
+    assert manager.command_ack(cancelled)["status"] == "applied"
+    assert game.teams[0].balance == 10_000_000
+    game._undo_state()
+    assert game.teams[0].balance == 9_000_000 and game.trading.escrow() == {"T1": 1_000_000}
+
+
+def test_landing_on_an_owned_property_pays_rent(game):
+    # T1 owns 1, 3 and 21; T2 owns 5, 7 and 23
+    game.current_idx = 2
+    team = game.teams[2]
+    team.pos = 20
+    game.to_pos_idx, game.from_pos_idx = 21, 20
+    game.moving, game.move_steps, game.move_progress = True, 1, 0.99
+    game._update()
+    assert team.pos == 21 and team.balance == 9_500_000
+    assert game.teams[0].balance == 10_500_000
+
+    # T1's orange group (1, 3, 5) is complete once T2 sells it 5
+    game._set_owner(5, "T1")
+    assert game.rent.rent_for(3, "T3") == ("T1", 1_000_000)
+
+    game.mystery_card = next(card for card in game.mystery_cards if card["type"] == "no_rent")
+    game._apply_mystery()
+    for _ in game.teams:  # round the table back to T3
+        game.next_turn()
+    assert game.current_idx == 2
+    team.pos = 0
+    game.mystery_card = next(card for card in game.mystery_cards if card.get("steps") == 3)
+    game._apply_mystery()
+    assert team.pos == 3 and team.balance == 9_500_000  # waived
+
+    game._undo_state()
+    assert game.rent.waivers == {"T3": "active"} and game.rent.index.owner(5) == "T1"
+
+
+def test_ownership_index_follows_buy_sell_trade_and_undo(game):
+    def scanned():
+        return {i: prop["owner"] for i, prop in enumerate(game.properties) if prop["owner"] is not None}
+
+    game.current_idx = 1
+    game.teams[1].pos = 17
+    game._set_owner(17, None)
+    game.buy_current()
+    assert game.ownership.properties_of("T2") == [5, 7, 17, 23]
+    assert game.ownership.owner_team(17) is game.teams[1]
+
+    game._sell_property(5)
+    game.trading_property, game.trading_seller, game.trading_offers = 7, 1, {"T4": 1_000_000}
+    game._choose_trading_buyer("T4")
+    assert game.ownership.owners == scanned()
+    assert [p["index"] for p in game._get_owned_properties("T4")] == [7, 13, 15]
+
+    for _ in range(3):
+        game._undo_state()
+        assert game.ownership.owners == scanned()
+    assert game.ownership.properties_of("T2") == [5, 7, 23]
+    assert game.ownership.team_index == {team.team_id: i for i, team in enumerate(game.teams)}
+
+
+def test_turn_set_from_the_control_center_updates_rent_waivers(game):
+    game.current_idx = 0
+    game.rent.waive_next_turn("T3")
+    manager = game.state_manager
+    manager.send_control_command("set_current_player", team_id="T3")
+    game.check_streamlit_commands()
+    assert game.current_idx == 2 and game.rent.waivers == {"T3": "active"}
+
+    manager.send_control_command("set_current_player", team_id="T3")  # already T3's turn: nothing changes
+    manager.send_control_command("set_current_player", team_id="T4")
+    game.check_streamlit_commands()
+    assert game.rent.waivers == {}
+
+
+def test_undo_and_rolled_back_batches_restore_trades_with_the_balances(game):
+    def money():
+        return sum(team.balance for team in game.teams) + sum(game.trading.escrow().values())
+
+    manager = game.state_manager
+    total = money()
+    manager.send_player_action("T2", "open_trade", property=5)
+    game.check_streamlit_player_actions()
+    trade_id = next(iter(game.trading.trades))
+
+    batch = manager.add_command_batch([
+        {"command": "bid", "team_id": "T1", "trade_id": trade_id, "amount": 2_000_000},
+        {"command": "set_current_player", "team_id": "T9"},
+    ])
+    game.check_streamlit_commands()
+    assert manager.command_ack(batch)["status"] == "rejected"
+    assert game.teams[0].balance == 10_000_000 and game.trading.escrow() == {} and money() == total
+
+    manager.send_player_action("T1", "bid", trade_id=trade_id, amount=2_000_000)
+    game.check_streamlit_player_actions()
+    assert game.trading.escrow() == {"T1": 2_000_000} and money() == total
+    game._undo_state()  # back to before the trade was opened
+    assert game.trading.trades == {} and game.teams[0].balance == 10_000_000 and money() == total
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared GameStateManager and its storage backends
+"""
+import sys
+import os
+import json
+import socket
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import game_state_manager
+from game_state_manager import (BackendServer, FileBackend, GameSnapshot, GameStateManager,
+                                SocketBackend)
+
+
+def test_reads_are_cached_until_the_state_changes(tmp_path, monkeypatch):
+    manager = GameStateManager(FileBackend(str(tmp_path)))
+    reads = []
+    original = FileBackend.read_state
+    monkeypatch.setattr(FileBackend, "read_state", lambda self: reads.append(1) or original(self))
+
+    first = manager.load_game_state()
+    assert manager.load_game_state() is first
+    assert len(reads) == 1
+
+    state = dict(first, current_player=3)
+    manager.save_game_state(state)
+    assert manager.load_game_state()["current_player"] == 3
+    assert len(reads) == 2
+
+
+def test_player_actions_are_reread_only_when_they_change(tmp_path, monkeypatch):
+    manager = GameStateManager(FileBackend(str(tmp_path)), shared_snapshot=False)
+    reads = []
+    original = FileBackend.read_player_actions
+    monkeypatch.setattr(FileBackend, "read_player_actions", lambda self: reads.append(1) or original(self))
+
+    assert manager.load_player_actions() == {}
+    assert manager.load_player_actions() == {}
+    assert len(reads) == 1  # a live page polling every second parses the file once
+
+    manager.send_player_action("T2", "roll_dice")
+    assert [a["action"] for a in manager.load_player_actions().values()] == ["roll_dice"]
+    manager.drain_player_actions()
+    assert manager.load_player_actions() == {}
+    assert len(reads) == 3
+
+
+def test_snapshot_is_typed():
+    snapshot = GameSnapshot.from_state(game_state_manager.DEFAULT_GAME_STATE, version=(1, 2, 3))
+    assert snapshot.current_team.id == "T1"
+    assert snapshot.team("T4").balance == 10_000_000
+    assert snapshot.team("T9") is None
+
+
+def test_socket_backend_round_trip(tmp_path):
+    server = BackendServer(FileBackend(str(tmp_path)), host="127.0.0.1", port=0, token="s3cret")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = server.server_address
+        client = GameStateManager(SocketBackend(host, port, token="s3cret"))
+        client.add_control_command("k1", {"command": "roll_dice"})
+        client.set_player_action("T2", {"action": "end_turn"})
+
+        local = GameStateManager(FileBackend(str(tmp_path)), init_files=False)
+        assert local.drain_control_commands() == {"k1": {"command": "roll_dice"}}
+        assert client.drain_player_actions() == {"T2": {"action": "end_turn"}}
+
+        assert client.load_snapshot().current_player == 0
+        version = client.state_version()
+        assert client.load_game_state_versioned()[1] == version
+        client.backend.close()
+
+        stranger = SocketBackend(host, port, token="guess")
+        with pytest.raises(PermissionError):
+            stranger.add_control_command("k2", {"command": "reset_game"})
+        assert local.load_control_commands() == {}
+    finally:
+        server.shutdown()
+        server.server_close()
+    with pytest.raises(ValueError):
+        BackendServer(FileBackend(str(tmp_path)), port=0, token="")
+
+
+def test_drains_are_not_resent_after_a_lost_reply():
+    listener = socket.create_server(("127.0.0.1", 0))
+    requests = []
+
+    def drop_replies():
+        # Take each request and hang up without answering, like a dropped connection
+        for _ in range(3):
+            conn, _ = listener.accept()
+            with conn, conn.makefile('r') as reader:
+                requests.append(json.loads(reader.readline())["op"])
+
+    thread = threading.Thread(target=drop_replies, daemon=True)
+    thread.start()
+    client = SocketBackend(*listener.getsockname(), token="s3cret")
+    with pytest.raises(ConnectionError):
+        client.drain_player_actions()
+    with pytest.raises(ConnectionError):
+        client.read_control_commands()
+    thread.join(timeout=5)
+    listener.close()
+    assert requests == ["drain_player_actions", "read_control_commands", "read_control_commands"]
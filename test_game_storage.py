@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared JSON storage used by the game and Streamlit clients
+"""
+import sys
+import os
+import multiprocessing
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from game_storage import (VersionConflict, create_json, drain_json, read_json,
+                          read_json_versioned, update_json, write_json)
+
+CLIENTS = 6
+COMMANDS_PER_CLIENT = 40
+
+
+def _send_commands(path, client):
+    """Simulate one Streamlit client pressing buttons as fast as it can"""
+    for i in range(COMMANDS_PER_CLIENT):
+        def add(commands, key=f"{client}-{i}"):
+            commands[key] = {"command": "roll_dice", "source": client}
+        update_json(path, add)
+
+
+def test_concurrent_clients_do_not_drop_commands(tmp_path):
+    """Six writers plus a draining game must see every command exactly once"""
+    path = str(tmp_path / "control_commands.json")
+    create_json(path, {})
+
+    ctx = multiprocessing.get_context("spawn")
+    clients = [ctx.Process(target=_send_commands, args=(path, f"c{n}")) for n in range(CLIENTS)]
+    for p in clients:
+        p.start()
+
+    received = {}
+    while any(p.is_alive() for p in clients):
+        received.update(drain_json(path))
+    for p in clients:
+        p.join()
+        assert p.exitcode == 0
+    received.update(drain_json(path))
+
+    assert len(received) == CLIENTS * COMMANDS_PER_CLIENT
+    assert read_json(path) == {}
+
+
+def test_compare_and_swap_rejects_stale_writes(tmp_path):
+    """A write based on an old version must not overwrite a newer one"""
+    path = str(tmp_path / "game_state.json")
+    assert create_json(path, {"current_player": 0})
+    assert not create_json(path, {"current_player": 4})
+
+    state, version = read_json_versioned(path)
+    write_json(path, {"current_player": 1}, expected_version=version)
+
+    with pytest.raises(VersionConflict):
+        write_json(path, {"current_player": 2}, expected_version=version)
+    assert read_json(path) == {"current_player": 1}
+
+
+def test_missing_or_corrupt_files_return_default(tmp_path):
+    path = str(tmp_path / "player_actions.json")
+    assert read_json(path, {}) == {}
+    with open(path, 'w') as f:
+        f.write('{"T1": ')
+    assert read_json(path, {}) == {}
+
+
+def test_update_moves_a_corrupt_file_aside(tmp_path):
+    path = str(tmp_path / "control_commands.json")
+    with open(path, 'w') as f:
+        f.write('{"k1": {"command": "roll_')
+    update_json(path, lambda commands: commands.update(k2={"command": "next_turn"}))
+    assert read_json(path) == {"k2": {"command": "next_turn"}}
+    aside, = [name for name in os.listdir(tmp_path) if ".corrupt-" in name]
+    assert (tmp_path / aside).read_text() == '{"k1": {"command": "roll_'
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Tests for the working-tree-free git sync
+"""
+import sys
+import os
+import subprocess
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import game_state_manager
+import git_sync
+from game_state_manager import GameStateManager, GitBranchBackend
+from git_sync import GitStateSync, fetch_state, find_git, sync_files
+
+
+def _git(*args, cwd):
+    return subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+def test_git_is_resolved_without_spawning_processes(monkeypatch):
+    def no_processes(*args, **kwargs):
+        raise AssertionError("spawned a process to find git")
+    monkeypatch.setattr(git_sync.subprocess, "run", no_processes)
+    find_git.cache_clear()
+    path = find_git()
+    assert path and os.path.isfile(path)
+    assert find_git() is path
+
+
+def test_state_branch_keeps_a_bounded_history_and_leaves_main_alone(tmp_path):
+    remote, checkout = tmp_path / "remote.git", tmp_path / "checkout"
+    _git('init', '--bare', '-b', 'main', str(remote), cwd=tmp_path)
+    _git('init', '-b', 'main', str(checkout), cwd=tmp_path)
+    _git('config', 'user.email', 'game@example.com', cwd=checkout)
+    _git('config', 'user.name', 'Game', cwd=checkout)
+    (checkout / "docs").mkdir()
+    (checkout / "docs" / "rules.md").write_text("# Rules\n")
+    (checkout / "README.md").write_text("# Monopoly\n")
+    (checkout / "game_state.json").write_text('{"current_player": 0}\n')
+    _git('add', '.', cwd=checkout)
+    _git('commit', '-m', 'Initial commit', cwd=checkout)
+    _git('remote', 'add', 'origin', str(remote), cwd=checkout)
+    _git('push', '-u', 'origin', 'main', cwd=checkout)
+
+    (checkout / "game_state.json").write_text('{"current_player": 2}\n')
+    status = _git('status', '--porcelain', cwd=checkout)
+    head = _git('rev-parse', 'HEAD', cwd=checkout)
+    main = _git('rev-parse', 'main', cwd=remote)
+
+    sync = GitStateSync(str(checkout), keep=3)
+    for player in range(5):
+        commit = sync.sync({"game_state.json": b'{"current_player": %d}\n' % player}, f"Player {player}")
+    assert sync.sync({"game_state.json": b'{"current_player": 4}\n'}, "Player 4") is None
+
+    assert _git('rev-parse', 'game-state', cwd=remote).strip() == commit
+    assert _git('log', '--format=%s', 'game-state', cwd=remote).splitlines() == ["Player 4", "Player 3", "Player 2"]
+    assert _git('ls-tree', '--name-only', 'game-state', cwd=remote).split() == ["game_state.json"]
+    assert _git('rev-parse', 'main', cwd=remote) == main
+    _git('fsck', '--strict', cwd=remote)
+
+    assert _git('status', '--porcelain', cwd=checkout) == status
+    assert _git('rev-parse', 'HEAD', cwd=checkout) == head
+
+    # A cloud client starting from scratch fetches one commit, not the game's history
+    cloud = tmp_path / "cloud"
+    _git('init', str(cloud), cwd=tmp_path)
+    _git('remote', 'add', 'origin', str(remote), cwd=cloud)
+    written = fetch_state(["game_state.json", "player_actions.json"], directory=str(cloud), repo_dir=str(cloud))
+    assert written == ["game_state.json"]
+    assert (cloud / "game_state.json").read_text().count('"current_player": 4') == 1
+    assert _git('rev-list', '--count', 'origin/game-state', cwd=cloud).strip() == "1"
+
+
+def test_repeated_syncs_only_spawn_the_push(tmp_path, monkeypatch):
+    remote, checkout = tmp_path / "remote.git", tmp_path / "checkout"
+    _git('init', '--bare', '-b', 'main', str(remote), cwd=tmp_path)
+    _git('init', '-b', 'main', str(checkout), cwd=tmp_path)
+    _git('remote', 'add', 'origin', str(remote), cwd=checkout)
+    state = checkout / "game_state.json"
+    state.write_text('{"current_player": 0}\n')
+    first = sync_files(["game_state.json"], "Player 0", repo_dir=str(checkout))
+
+    calls = []
+    run = subprocess.run
+    def counting_run(args, *rest, **kwargs):
+        calls.append(args[1])
+        return run(args, *rest, **kwargs)
+    monkeypatch.setattr(git_sync.subprocess, "run", counting_run)
+    for player in (1, 2):
+        state.write_text('{"current_player": %d}\n' % player)
+        commit = sync_files(["game_state.json"], f"Player {player}", repo_dir=str(checkout))
+    assert sync_files(["game_state.json"], "Player 2", repo_dir=str(checkout)) is None
+    assert calls == ["push", "push"]
+    assert commit != first and _git('rev-parse', 'game-state', cwd=remote).strip() == commit
+
+
+def test_cloud_pages_fetch_the_state_only_when_the_branch_moves(tmp_path, monkeypatch):
+    remote, cloud = tmp_path / "remote.git", tmp_path / "cloud"
+    _git('init', '--bare', '-b', 'main', str(remote), cwd=tmp_path)
+    _git('init', '-b', 'main', str(cloud), cwd=tmp_path)
+    _git('remote', 'add', 'origin', str(remote), cwd=cloud)
+    laptop = GitStateSync(str(cloud))  # any repository can push to the same remote
+    laptop.sync({"game_state.json": b'{"current_player": 1}\n'}, "Player 1")
+
+    fetches = []
+    fetch = game_state_manager.fetch_state
+    monkeypatch.setattr(game_state_manager, "fetch_state", lambda *args: fetches.append(args) or fetch(*args))
+    manager = GameStateManager(GitBranchBackend(str(cloud), interval=0), shared_snapshot=False)
+    assert manager.load_game_state_versioned()[0]["current_player"] == 1
+    assert manager.load_game_state_versioned()[0]["current_player"] == 1
+    assert len(fetches) == 1  # the head didn't move: nothing fetched again
+
+    laptop.sync({"game_state.json": b'{"current_player": 2}\n'}, "Player 2")
+    assert manager.load_game_state_versioned()[0]["current_player"] == 2
+    assert len(fetches) == 2
+    assert manager.backend.head == _git('rev-parse', 'game-state', cwd=remote).strip()
+
+
+def test_objects_of_earlier_syncs_are_pruned(tmp_path):
+    remote, checkout = tmp_path / "remote.git", tmp_path / "checkout"
+    _git('init', '--bare', '-b', 'main', str(remote), cwd=tmp_path)
+    _git('init', '-b', 'main', str(checkout), cwd=tmp_path)
+    _git('remote', 'add', 'origin', str(remote), cwd=checkout)
+    sync = GitStateSync(str(checkout), prune_interval=5)
+    sync.prune_expire = "now"
+
+    def loose_objects():
+        return int(_git('count-objects', cwd=checkout).split()[0])
+
+    for player in range(12):
+        sync.sync({"game_state.json": b'{"current_player": %d}\n' % player, "rules.json": b'{}\n'}, f"Player {player}")
+    assert loose_objects() == 4 + 2 * 3  # the head's four objects and the two syncs since the last prune
+    commit = sync.sync({"game_state.json": b'{"current_player": 99}\n'}, "Player 99")  # rules.json unchanged
+    _git('fsck', '--strict', cwd=remote)
+    assert _git('show', f'{commit}:rules.json', cwd=remote) == "{}\n"
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for JSON Patch diffs and the keyframed game state stream
+"""
+import sys
+import os
+import copy
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from game_state_manager import DEFAULT_GAME_STATE, FileBackend, GameStateManager
+from json_patch import PatchError, PatchReplica, PatchStreamWriter, apply_patch, make_patch, stream_path
+
+
+def _game_state():
+    state = copy.deepcopy(DEFAULT_GAME_STATE)
+    state["property_table"] = {str(i): {"name": f"Property {i}", "price": 1_000_000 + i * 20_000,
+                                        "rent": 100_000 + i * 2_000, "sell_price": 500_000 + i * 10_000}
+                               for i in range(40)}
+    state["messages"] = [{"timestamp": f"2024-01-01T10:{i:02d}:00", "message": f"Team {i % 5 + 1} rolled {i % 11 + 2}"}
+                         for i in range(50)]
+    return state
+
+
+def _next_turn(state, turn):
+    """What one move does to the state: a balance, a position, the player and the message window"""
+    state = copy.deepcopy(state)
+    team = state["teams"][turn % 5]
+    team["balance"] -= 120_000
+    team["pos"] = (team["pos"] + 7) % 40
+    state["current_player"] = (turn + 1) % 5
+    state["messages"] = state["messages"][1:] + [{"timestamp": f"2024-01-01T11:{turn:02d}:00",
+                                                  "message": f"{team['name']} paid rent"}]
+    return state
+
+
+def test_rfc6902_operations():
+    doc = {"foo": ["bar", "baz"], "a/b": 1, "m~n": 2}
+    patched = apply_patch(doc, [
+        {"op": "add", "path": "/foo/1", "value": "qux"},
+        {"op": "remove", "path": "/a~1b"},
+        {"op": "replace", "path": "/m~0n", "value": 3},
+        {"op": "copy", "from": "/foo/0", "path": "/first"},
+        {"op": "move", "from": "/first", "path": "/foo/-"},
+        {"op": "test", "path": "/foo", "value": ["bar", "qux", "baz", "bar"]},
+    ])
+    assert patched == {"foo": ["bar", "qux", "baz", "bar"], "m~n": 3}
+    assert doc == {"foo": ["bar", "baz"], "a/b": 1, "m~n": 2}  # untouched
+
+    for bad in ([{"op": "test", "path": "/a~1b", "value": True}],
+                [{"op": "remove", "path": "/missing"}],
+                [{"op": "add", "path": "/foo/5", "value": 1}],
+                [{"op": "replace", "path": "/foo/01", "value": 1}],
+                [{"op": "move", "from": "/foo", "path": "/foo/0"}]):
+        with pytest.raises(PatchError):
+            apply_patch(doc, bad)
+
+
+def test_patches_roundtrip_and_are_an_order_of_magnitude_smaller():
+    state = _game_state()
+    for turn in range(20):
+        new_state = _next_turn(state, turn)
+        patch = make_patch(state, new_state)
+        assert apply_patch(json.loads(json.dumps(state)), json.loads(json.dumps(patch))) == new_state
+        assert len(json.dumps(patch)) * 10 < len(json.dumps(new_state, indent=2))
+        state = new_state
+    assert make_patch(state, copy.deepcopy(state)) == []
+    assert apply_patch([1, 2, 3], make_patch([1, 2, 3], [0, 2, 3, 4])) == [0, 2, 3, 4]
+    assert make_patch(1, True) == [{"op": "replace", "path": "", "value": True}]
+
+
+def test_stream_replica_follows_patches_and_keyframes(tmp_path):
+    path = str(tmp_path / "game_state.patches.jsonl")
+    writer = PatchStreamWriter(path, keyframe_interval=5)
+    replica = PatchReplica(path)
+    assert replica.read() == (None, None)
+
+    state = _game_state()
+    writer.write(state)
+    for turn in range(12):
+        state = _next_turn(state, turn)
+        version = writer.write(state)
+        assert replica.read() == (state, version)
+    assert writer.stats["keyframes"] == 3
+    assert writer.stats["patches"] == 10
+
+    # A half-written line is left for the next read
+    with open(path, 'a') as f:
+        f.write('\n{"seq": 99, "pat')
+    assert replica.read()[0] == state
+
+
+def test_stream_backend_writes_a_fraction_of_the_bytes(tmp_path):
+    game = GameStateManager(FileBackend(str(tmp_path), stream=True), shared_snapshot=False)
+    page = GameStateManager(FileBackend(str(tmp_path)), init_files=False, shared_snapshot=False)
+    state = _game_state()
+    game.save_game_state(state)
+    turns = 40
+    for turn in range(turns):
+        state = _next_turn(state, turn)
+        game.save_game_state(state)
+        assert page.load_game_state() == state
+    writer = game.backend.stream_writer
+    assert writer.stats["bytes"] * 10 < len(json.dumps(state, indent=2)) * (turns + 1)
+    assert os.path.exists(stream_path(str(tmp_path / "game_state.json")))
+
+    # Saving without stream mode takes the plain file back
+    page.save_game_state(dict(state, current_player=4))
+    assert not os.path.exists(stream_path(str(tmp_path / "game_state.json")))
+    assert game.load_game_state()["current_player"] == 4
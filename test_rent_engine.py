@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for rent on landing and the ownership index
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rent_engine import RentEngine
+
+ORANGE, GREEN = (255, 140, 0), (34, 139, 34)
+PROPERTY_DATA = {
+    1: {"rent": 500_000, "color": ORANGE},
+    3: {"rent": 500_000, "color": ORANGE},
+    5: {"rent": 600_000, "color": ORANGE},
+    7: {"rent": 1_000_000, "color": GREEN},
+}
+
+
+def test_rent_grows_with_the_color_group():
+    engine = RentEngine(PROPERTY_DATA)
+    index = engine.index
+    assert engine.rent_for(1, "T2") == (None, 0)
+
+    index.set_owner(1, "T1")
+    assert engine.rent_for(1, "T2") == ("T1", 500_000)
+    assert engine.rent_for(1, "T1") == (None, 0)  # own property
+    index.set_owner(3, "T1")
+    assert engine.rent_for(1, "T2") == ("T1", 750_000)
+    index.set_owner(5, "T1")
+    assert index.has_group("T1", 3) and engine.rent_for(5, "T2") == ("T1", 1_200_000)
+
+    index.set_owner(5, "T2")  # traded away: the group is broken again
+    assert index.group_count("T1", 1) == 2 and not index.has_group("T1", 1)
+    assert index.properties_of("T1") == [1, 3] and index.properties_of("T2") == [5]
+    index.rebuild([{"owner": None}, {"owner": "T3"}] + [{"owner": None}] * 6)
+    assert index.owners == {1: "T3"} and index.group_count("T1", 1) == 0
+
+
+def test_no_rent_covers_the_next_turn_only():
+    engine = RentEngine(PROPERTY_DATA)
+    engine.index.set_owner(7, "T1")
+    engine.waive_next_turn("T2")
+    assert not engine.resolve(7, "T2")["waived"]  # the rest of this turn still pays
+    engine.turn_changed("T2", "T3")
+    engine.turn_changed("T3", "T2")
+    # 7 is the only green property here, so T1 holds the whole group
+    assert engine.resolve(7, "T2") == {"owner": "T1", "amount": 2_000_000, "waived": True}
+    engine.turn_changed("T2", "T3")
+    engine.turn_changed("T3", "T2")
+    assert not engine.resolve(7, "T2")["waived"]
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for hosting several headless games in one process
+"""
+import sys
+import os
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from game_state_manager import hosted_game_manager, list_games
+from session_manager import HOSTED_HISTORY_SIZE, SessionManager
+
+
+def test_games_are_isolated(tmp_path):
+    root = str(tmp_path / "games")
+    sessions = SessionManager(root, max_games=2)
+    try:
+        hall_a = sessions.create_game("hall-a")
+        sessions.create_game("hall-b")
+        assert sessions.create_game("hall-a") is hall_a
+        assert list_games(root) == ["hall-a", "hall-b"]
+        with pytest.raises(ValueError):
+            sessions.create_game("hall-c")
+        with pytest.raises(ValueError):
+            hosted_game_manager("../escape", root)
+
+        client_a = hosted_game_manager("hall-a", root)
+        client_b = hosted_game_manager("hall-b", root)
+        command_id = client_a.send_control_command("set_balance", team_id="T2", balance=12_345_678)
+        sessions.tick()
+
+        assert client_a.command_ack(command_id)["status"] == "applied"
+        assert client_a.load_game_state()["teams"][1]["balance"] == 12_345_678
+        assert client_b.load_game_state()["teams"][1]["balance"] == 10_000_000
+        assert client_b.command_ack(command_id) is None
+        assert sessions.metrics()["errors"] == 0
+        client_a.close()
+        client_b.close()
+    finally:
+        sessions.close()
+
+
+def test_twenty_games_fit_in_bounded_memory(tmp_path):
+    sessions = SessionManager(str(tmp_path / "games"), autosave=False)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for number in range(20):
+            sessions.create_game(f"game-{number:02d}")
+        for game in sessions.games.values():
+            for _ in range(HOSTED_HISTORY_SIZE * 2):
+                game._save_state()
+        for _ in range(30):
+            sessions.tick()
+        per_game = (tracemalloc.get_traced_memory()[0] - before) / 20
+        assert all(len(game.game_history) == HOSTED_HISTORY_SIZE for game in sessions.games.values())
+        assert sessions.metrics()["ticks"] == 30
+    finally:
+        tracemalloc.stop()
+        sessions.close()
+
+    assert per_game < 1024 * 1024
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared-memory game state snapshot
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import game_state_manager
+from game_state_manager import FileBackend, GameStateManager
+from game_storage import write_json
+from shm_snapshot import SnapshotReader, SnapshotWriter, snapshot_name
+
+
+def test_reader_sees_each_published_state_once(tmp_path):
+    writer = SnapshotWriter(snapshot_name(str(tmp_path)))
+    try:
+        reader = SnapshotReader(writer.name)
+        assert reader.read() == (None, None)
+
+        writer.publish({"current_player": 3}, [1, 2, 3])
+        seq, payload = reader.read()
+        assert payload == {"version": [1, 2, 3], "state": {"current_player": 3}}
+        assert reader.read(seq) == (seq, None)
+
+        # Too big for the segment: readers are told to use the regular storage
+        assert not writer.publish({"blob": "x" * writer.capacity}, [1, 2, 4])
+        assert reader.read(seq) == (None, None)
+        reader.close()
+    finally:
+        writer.close()
+
+
+def test_local_readers_use_the_game_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(game_state_manager, "SNAPSHOT_ATTACH_INTERVAL", 0)
+    game = GameStateManager(FileBackend(str(tmp_path)))
+    game.publish_shared_snapshot()
+    try:
+        game.save_game_state({"current_player": 1, "teams": []})
+        client = GameStateManager(FileBackend(str(tmp_path)))
+
+        def no_file_reads():
+            raise AssertionError("read game_state.json despite a current snapshot")
+        monkeypatch.setattr(client.backend, "read_state", no_file_reads)
+        assert client.load_game_state()["current_player"] == 1
+
+        game.save_game_state({"current_player": 2, "teams": []})
+        state, version = client.load_game_state_versioned()
+        assert state["current_player"] == 2
+        assert version == client.backend.state_version()
+        monkeypatch.undo()
+
+        # Someone bypasses the game and writes the file: fall back to storage
+        monkeypatch.setattr(game_state_manager, "SNAPSHOT_VERIFY_INTERVAL", 0)
+        write_json(os.path.join(str(tmp_path), "game_state.json"), {"current_player": 4, "teams": []})
+        assert client.load_game_state()["current_player"] == 4
+        client.close()
+    finally:
+        game.close()
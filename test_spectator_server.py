@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for the spectator fan-out server
+"""
+import sys
+import os
+import asyncio
+import copy
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import spectator_server
+from game_state_manager import DEFAULT_GAME_STATE, FileBackend, GameStateManager
+from spectator_server import Feed, SpectatorServer
+
+
+async def _read_event(reader, event="state"):
+    """The data of the next SSE event of this type (skipping comments, the retry line and other events)"""
+    while True:
+        block = await asyncio.wait_for(reader.readuntil(b"\n\n"), 5)
+        lines = block.decode('utf-8').splitlines()
+        if f"event: {event}" not in lines:
+            continue
+        for line in lines:
+            if line.startswith("data: "):
+                return json.loads(line[len("data: "):])
+
+
+async def _subscribe(port, path="/events"):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n".encode())
+    status = await reader.readline()
+    await reader.readuntil(b"\r\n\r\n")
+    return status, reader, writer
+
+
+def test_every_spectator_gets_each_change_from_one_feed(tmp_path):
+    game = GameStateManager(FileBackend(str(tmp_path)), shared_snapshot=False)
+
+    def manager_factory(game_id):
+        if game_id is not None:
+            raise ValueError(f"unknown game {game_id!r}")
+        return GameStateManager(FileBackend(str(tmp_path)), init_files=False, shared_snapshot=False)
+
+    async def scenario():
+        server = await SpectatorServer("127.0.0.1", 0, manager_factory=manager_factory).start()
+        try:
+            viewers = [await _subscribe(server.port) for _ in range(3)]
+            for status, reader, _ in viewers:
+                assert b"200" in status
+                assert (await _read_event(reader))["teams"][1]["balance"] == 10_000_000
+                assert (await _read_event(reader, "board"))["svg"].startswith("<svg")
+
+            state = copy.deepcopy(DEFAULT_GAME_STATE)
+            state["teams"][1]["balance"] = 7_500_000
+            state["properties"] = {"3": {"owner": "T2", "name": "Mumbai"}}
+            game.save_game_state(state)
+            for _, reader, _ in viewers:
+                view = await _read_event(reader)
+                assert view["teams"][1]["balance"] == 7_500_000
+                assert view["owners"] == {"3": "T2"}
+                changes = (await _read_event(reader, "board"))["changes"]
+                assert set(changes) == {"owner-3", "balance-T2"}
+
+            assert server.metrics()["feeds"] == {"None": 3}
+            assert server.metrics()["frames"] == 6
+            status, _, writer = await _subscribe(server.port, "/events?game=nope")
+            assert b"404" in status
+            for _, _, writer in viewers:
+                writer.close()
+        finally:
+            await server.close()
+
+    asyncio.run(scenario())
+
+
+class _SlowWriter:
+    """Stands in for a viewer's connection; drain() waits until the test lets it finish"""
+
+    def __init__(self):
+        self.frames = []
+        self.transport = self
+        self.aborted = False
+        self.ready = asyncio.Event()
+
+    def set_write_buffer_limits(self, high):
+        pass
+
+    def abort(self):
+        self.aborted = True
+
+    def write(self, data):
+        self.frames.append(data)
+
+    async def drain(self):
+        await self.ready.wait()
+        self.ready.clear()
+
+
+class _Manager:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_slow_spectators_skip_to_the_newest_view_and_are_dropped(monkeypatch):
+    monkeypatch.setattr(spectator_server, "SEND_TIMEOUT", 0.2)
+
+    async def scenario():
+        server = SpectatorServer()
+        feed = server.feeds[None] = Feed(manager=_Manager())
+        feed.publish({"step": 1})
+        writer = _SlowWriter()
+        viewer = asyncio.ensure_future(server._subscribe(writer, None))
+        await asyncio.sleep(0.05)  # headers and frame 1 are waiting to drain
+        for step in (2, 3, 4):
+            feed.publish({"step": step})
+        writer.ready.set()  # frame 1 done; frames 2 and 3 are skipped
+        await asyncio.wait_for(viewer, 2)  # frame 4 never drains: dropped
+        return server, writer, feed
+
+    server, writer, feed = asyncio.run(scenario())
+    events = [frame for frame in writer.frames if frame.startswith(b"event:")]
+    assert [json.loads(frame.split(b"data: ")[1]) for frame in events] == [{"step": 1}, {"step": 4}]
+    assert writer.aborted
+    assert server.metrics()["coalesced"] == 2
+    assert server.metrics()["dropped"] == 1
+    assert server.subscribers == 0
+    assert server.feeds == {} and feed.closed and feed.manager.closed  # its last viewer left
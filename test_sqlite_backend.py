@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite game state backend
+"""
+import sys
+import os
+import multiprocessing
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from game_state_manager import DEFAULT_GAME_STATE, GameStateManager, create_backend, delivery_order
+from game_storage import VersionConflict
+from sqlite_backend import SqliteBackend
+
+CLIENTS = 6
+COMMANDS_PER_CLIENT = 40
+
+
+def _send_commands(path, client):
+    """Simulate one Streamlit client pressing buttons as fast as it can"""
+    backend = SqliteBackend(path)
+    for i in range(COMMANDS_PER_CLIENT):
+        backend.add_control_command("2024-01-01T00:00:00", {"command": "roll_dice", "source": client, "n": i})
+    backend.close()
+
+
+def test_concurrent_clients_do_not_drop_commands(tmp_path):
+    """Six writers sharing one timestamp key plus a draining game see every command once"""
+    path = str(tmp_path / "game_state.db")
+    backend = SqliteBackend(path)
+
+    ctx = multiprocessing.get_context("spawn")
+    clients = [ctx.Process(target=_send_commands, args=(path, f"c{n}")) for n in range(CLIENTS)]
+    for p in clients:
+        p.start()
+
+    received = []
+    while any(p.is_alive() for p in clients):
+        received.extend(backend.drain_control_commands().values())
+    for p in clients:
+        p.join()
+        assert p.exitcode == 0
+    received.extend(backend.drain_control_commands().values())
+
+    assert len(received) == CLIENTS * COMMANDS_PER_CLIENT
+    assert len({(c["source"], c["n"]) for c in received}) == CLIENTS * COMMANDS_PER_CLIENT
+    assert backend.read_control_commands() == {}
+    assert len(backend.command_history("roll_dice", limit=1000)) == CLIENTS * COMMANDS_PER_CLIENT
+
+
+def test_state_versions_history_and_compare_and_swap(tmp_path):
+    manager = GameStateManager(create_backend(f"sqlite:{tmp_path / 'game_state.db'}"))
+    state, version = manager.load_game_state_versioned()
+    assert state == DEFAULT_GAME_STATE
+
+    manager.save_game_state(dict(state, current_player=1), expected_version=version)
+    with pytest.raises(VersionConflict):
+        manager.save_game_state(dict(state, current_player=2), expected_version=version)
+    assert manager.load_snapshot().current_player == 1
+
+    history = manager.backend.state_history()
+    assert [row[2] for row in history] == [1, 0]
+    assert manager.backend.load_state_at(history[-1][0]) == DEFAULT_GAME_STATE
+
+
+def test_state_history_is_bounded(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "game_state.db"), history_rows=3)
+    for player in range(10):
+        version = backend.write_state(dict(DEFAULT_GAME_STATE, current_player=player))
+    assert [row[2] for row in backend.state_history()] == [9, 8, 7]
+    assert backend.read_state() == (dict(DEFAULT_GAME_STATE, current_player=9), version)
+
+
+def test_connections_close_with_their_threads(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "game.db"))
+    for _ in range(20):  # like Streamlit reruns, each on a new thread
+        thread = threading.Thread(target=backend.state_version)
+        thread.start()
+        thread.join()
+    assert len([f for f in backend._finalizers if f.alive]) == 1  # only this thread's connection is open
+    backend.close()
+    assert backend._finalizers == set()
+
+
+def test_player_action_slots_and_events(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "game_state.db"))
+    backend.set_player_action("T1", {"action": "roll_dice"})
+    backend.set_player_action("T1", {"action": "buy_property"})
+    backend.set_player_action("T2", {"action": "end_turn"})
+    assert backend.drain_player_actions() == {"T1": {"action": "buy_property"}, "T2": {"action": "end_turn"}}
+    assert backend.drain_player_actions() == {}
+
+    backend.log_event("Team 1 rolled a 5", "2024-01-01T00:00:00")
+    backend.log_event("Team 1 bought Mumbai")
+    assert [row[2] for row in backend.events()] == ["Team 1 rolled a 5", "Team 1 bought Mumbai"]
+    assert [row[2] for row in backend.events(since_id=1)] == ["Team 1 bought Mumbai"]
+
+
+def test_queued_player_actions_keep_send_order(tmp_path):
+    manager = GameStateManager(create_backend(f"sqlite:{tmp_path / 'game_state.db'}"), shared_snapshot=False)
+    first = manager.send_player_action("T1", "roll_dice")
+    second = manager.send_player_action("T1", "buy_property")
+    manager.set_player_action("T2", {"action": "end_turn"})
+
+    assert [data.get("command_id") for key, data in delivery_order(manager.load_player_actions())] == \
+        [None, first, second]
+    version = manager.backend.player_actions_version()
+    drained = delivery_order(manager.drain_player_actions())
+    assert [data.get("command_id") for key, data in drained] == [None, first, second]
+    assert manager.backend.player_actions_version() != version
+    assert manager.load_player_actions() == {}
+    assert manager.drain_player_actions() == {}
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests for the pluggable state serialization formats
+"""
+import sys
+import os
+import json
+import sqlite3
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import state_codec
+from game_state_manager import DEFAULT_GAME_STATE
+from sqlite_backend import SqliteBackend
+from state_codec import MAGIC, dumps, loads
+
+
+def test_binary_format_roundtrips_like_json():
+    data = dict(DEFAULT_GAME_STATE,
+                property_table={str(i): {"name": f"Property {i}", "price": i * 20_000} for i in range(40)},
+                numbers=[0, 127, 128, -1, -33, 255, 65_535, -40_000, 2 ** 31, -2 ** 40, 2 ** 63, 0.5, -1e300],
+                text=["", "x" * 31, "ß" * 200, "₹" * 30_000],
+                flags={"on": True, "off": False, "unset": None, 3: "int key"},
+                rows=[{"a": 1, "b": [{"c": 1}, {"c": 2}]}, {"a": 2, "b": []}],
+                mixed=[{"a": 1}, {"b": 2}, [1, 2] * 20])
+    blob = dumps(data, "binary")
+    assert blob.startswith(MAGIC)
+    assert loads(blob) == json.loads(json.dumps(data))
+    assert len(blob) < len(dumps(data, "json"))
+
+    assert loads(dumps(data, "json")) == json.loads(json.dumps(data))
+    assert loads('{"text": true}') == {"text": True}
+    with pytest.raises(ValueError):
+        loads(blob[:-3])
+    with pytest.raises(ValueError):
+        dumps(data, "yaml")
+
+
+def test_sqlite_history_reads_rows_of_either_format(tmp_path, monkeypatch):
+    backend = SqliteBackend(str(tmp_path / "game.db"))
+    backend.init_files(DEFAULT_GAME_STATE)
+    monkeypatch.setattr(state_codec, "DEFAULT_FORMAT", "binary")
+    backend.write_state(dict(DEFAULT_GAME_STATE, current_player=3))
+    state, _ = backend.read_state()
+    assert state["current_player"] == 3
+    assert backend.load_state_at(1) == DEFAULT_GAME_STATE
+    backend.close()
+
+    kinds = sqlite3.connect(str(tmp_path / "game.db")).execute(
+        "SELECT typeof(state) FROM state_snapshots ORDER BY id").fetchall()
+    assert kinds == [("text",), ("blob",)]
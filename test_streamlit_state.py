@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Tests for the version-keyed state views used by the Streamlit pages
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from streamlit_state import message_tail, portfolio_view, team_view
+
+STATE = {
+    "teams": [{"id": "T1", "name": "Team 1"}, {"id": "T2", "name": "Team 2"}],
+    "property_table": {"3": {"name": "Mumbai", "price": 2_500_000}, "7": {"name": "Delhi", "price": 3_000_000}},
+    "portfolios": {"T1": {"properties": [3, 7], "total_value": 5_500_000, "rent_exposure": 1_500_000,
+                          "sale_value": 3_000_000}},
+    "messages": [{"timestamp": str(i), "message": f"m{i}"} for i in range(8)],
+}
+
+
+def test_views_are_derived_once_per_version():
+    assert team_view(("test", 1), STATE, "T2")["name"] == "Team 2"
+    portfolio = portfolio_view(("test", 1), STATE, "T1")
+    assert [p["name"] for p in portfolio["properties"]] == ["Mumbai", "Delhi"]
+    assert portfolio["sale_value"] == 3_000_000
+    assert message_tail(("test", 1), STATE, "messages", 2) == ["[7] m7", "[6] m6"]
+
+    # Same version: served from the cache without looking at the state again
+    assert portfolio_view(("test", 1), {}, "T1") == portfolio
+    # New version: recomputed
+    assert portfolio_view(("test", 2), {}, "T1")["properties"] == []
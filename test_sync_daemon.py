@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Tests for the delta sync daemon and its transports
+"""
+import sys
+import os
+import http.client
+import json
+import subprocess
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from game_storage import read_json, write_json
+from sync_daemon import (GitTransport, HttpFetchTransport, HttpTransport, StateFetcher, SyncDaemon, SyncServer,
+                         sign)
+
+SECRET = "s3cret"
+
+
+def _serve(directory):
+    server = SyncServer(str(directory), host="127.0.0.1", port=0, secret=SECRET)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_http_sync_ships_only_changed_keys(tmp_path):
+    local, cloud = tmp_path / "local", tmp_path / "cloud"
+    local.mkdir()
+    cloud.mkdir()
+    state = {"current_player": 0, "teams": [{"id": f"T{n}", "balance": 10_000_000} for n in range(5)],
+             "property_table": {str(i): {"name": f"Property {i}", "price": 1000 * i} for i in range(40)}}
+    write_json(str(local / "game_state.json"), state)
+
+    server = _serve(cloud)
+    transport = HttpTransport(f"http://127.0.0.1:{server.server_address[1]}", secret=SECRET)
+    daemon = SyncDaemon(transport, directory=str(local), files=["game_state.json"])
+    try:
+        assert daemon.sync_once(force=True)
+        first_bytes = daemon.metrics()["bytes"]
+
+        # A burst of writes goes out as one small delta
+        for player in (1, 2, 3):
+            write_json(str(local / "game_state.json"), dict(state, current_player=player))
+            daemon.poll()
+        assert daemon.sync_once(force=True)
+        assert read_json(str(cloud / "game_state.json"))["current_player"] == 3
+        metrics = daemon.metrics()
+        assert metrics["syncs"] == 2
+        assert metrics["bytes"] - first_bytes < first_bytes / 2
+        assert metrics["lag_ms"]["count"] == 2
+
+        # The cloud side restarted and lost track: the next sync resends everything
+        server.shutdown()
+        server.server_close()
+        server = _serve(cloud)
+        transport.client.port = server.server_address[1]
+        transport.close()
+        write_json(str(local / "game_state.json"), dict(state, current_player=4))
+        assert daemon.sync_once(force=True)
+        assert server.files["game_state.json"]["teams"] == state["teams"]
+        assert server.metrics()["seq"] == 3
+    finally:
+        daemon.stop()
+        server.shutdown()
+        server.server_close()
+
+
+def test_fetcher_downloads_only_what_changed(tmp_path):
+    cloud, dashboard = tmp_path / "cloud", tmp_path / "dashboard"
+    cloud.mkdir()
+    dashboard.mkdir()
+    state = {"current_player": 0, "teams": [{"id": f"T{n}", "balance": 10_000_000} for n in range(5)],
+             "property_table": {str(i): {"name": f"Property {i}", "price": 1000 * i} for i in range(40)}}
+    server = _serve(cloud)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    fetcher = StateFetcher(HttpFetchTransport(url), files=["game_state.json"], directory=str(dashboard))
+    try:
+        assert fetcher.poll() == []  # nothing synced yet
+        server.apply({"seq": 1, "full": {"game_state.json": state}})
+        assert fetcher.poll() == ["game_state.json"]
+        full_bytes = fetcher.stats["bytes"]
+
+        assert fetcher.poll() == []
+        assert fetcher.stats["not_modified"] == 1
+        assert fetcher.stats["bytes"] == full_bytes
+
+        server.apply({"seq": 2, "base": 1, "files": {"game_state.json": [{"op": "replace", "path": "/current_player", "value": 3}]}})
+        assert fetcher.poll() == ["game_state.json"]
+        assert fetcher.stats["deltas"] == 1
+        assert fetcher.stats["bytes"] - full_bytes < full_bytes / 4
+        assert read_json(str(dashboard / "game_state.json")) == dict(state, current_player=3)
+
+        # An etag from another server instance gets the whole file again
+        server.apply({"seq": 3, "base": 2, "files": {"game_state.json": [{"op": "replace", "path": "/current_player", "value": 4}]}})
+        fetcher.etags["game_state.json"] = '"restarted-2"'
+        assert fetcher.poll() == ["game_state.json"]
+        assert fetcher.stats["full"] == 2
+        assert fetcher.data["game_state.json"] == dict(state, current_player=4)
+    finally:
+        fetcher.transport.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_server_only_applies_fresh_signed_deltas(tmp_path):
+    server = _serve(tmp_path)
+
+    def post(delta, secret=SECRET):
+        body = json.dumps(delta).encode('utf-8')
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+        try:
+            conn.request("POST", "/deltas", body, {"X-Sync-Signature": sign(secret, body)})
+            return conn.getresponse().status
+        finally:
+            conn.close()
+
+    try:
+        old = {"seq": 1, "base": None, "sent_at": 100.0, "full": {"game_state.json": {"current_player": 1}}}
+        new = {"seq": 1, "base": None, "sent_at": 200.0, "full": {"game_state.json": {"current_player": 2}}}
+        assert post(old, secret="guess") == 403
+        assert not (tmp_path / "game_state.json").exists()
+        assert post(new) == 200
+        assert post(old) == 409  # a replayed older delta changes nothing
+        assert read_json(str(tmp_path / "game_state.json")) == {"current_player": 2}
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _git(*args, cwd):
+    return subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+def test_git_sync_pushes_each_burst_as_one_squashed_commit(tmp_path):
+    remote, checkout = tmp_path / "remote.git", tmp_path / "checkout"
+    _git('init', '--bare', '-b', 'main', str(remote), cwd=tmp_path)
+    _git('init', '-b', 'main', str(checkout), cwd=tmp_path)
+    _git('config', 'user.email', 'game@example.com', cwd=checkout)
+    _git('config', 'user.name', 'Game', cwd=checkout)
+    _git('remote', 'add', 'origin', str(remote), cwd=checkout)
+
+    daemon = SyncDaemon(GitTransport(str(checkout)), directory=str(checkout), files=["game_state.json"])
+    for burst in range(2):
+        for player in range(3):
+            write_json(str(checkout / "game_state.json"), {"current_player": player, "burst": burst})
+            daemon.poll()
+        assert daemon.sync_once(force=True)
+    assert not daemon.sync_once(force=True)  # nothing new
+
+    assert daemon.metrics()["syncs"] == 2
+    assert _git('rev-list', '--count', 'game-state', cwd=remote).strip() == "1"
+    assert '"burst": 1' in _git('show', 'game-state:game_state.json', cwd=remote)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for concurrent sealed-bid trades and auctions
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from main import Team
+from ownership import OwnershipIndex
+from trading_engine import AUCTION_EXTENSION, TradingEngine
+
+
+def _teams():
+    return [Team(f"T{n}", f"Team {n}", (0, 0, 0), 10_000_000, 0) for n in range(1, 5)]
+
+
+def test_sealed_bids_are_escrowed_and_resolve_deterministically():
+    teams = _teams()
+    engine = TradingEngine(teams, timeout=60)
+    trade = engine.open_trade("T1", 3, reserve=1_000_000, now=0)
+    other = engine.open_trade("T1", 5, now=0)
+    with pytest.raises(ValueError):
+        engine.open_trade("T1", 3, now=0)  # one trade per property
+    with pytest.raises(ValueError):
+        engine.bid(trade.trade_id, "T2", 900_000, now=1)  # below the reserve
+    with pytest.raises(ValueError):
+        engine.bid(trade.trade_id, "T1", 2_000_000, now=1)  # the seller
+
+    engine.bid(trade.trade_id, "T2", 3_000_000, now=1)
+    engine.bid(trade.trade_id, "T3", 2_000_000, now=2)
+    engine.bid(trade.trade_id, "T3", 3_000_000, now=3)  # revised: ties with T2 but came later
+    engine.bid(other.trade_id, "T2", 6_000_000, now=3)
+    with pytest.raises(ValueError):
+        engine.bid(other.trade_id, "T2", 7_500_000, now=3)  # T2's other bid is held
+    assert [team.balance for team in teams] == [10_000_000, 1_000_000, 7_000_000, 10_000_000]
+    assert engine.escrow() == {"T2": 9_000_000, "T3": 3_000_000}
+    assert engine.export()["trades"][0]["bidders"] == ["T2", "T3"]  # amounts stay sealed
+
+    assert engine.tick(lambda index: "T1", now=30) == []
+    engine.bid(trade.trade_id, "T4", 2_500_000, now=31)  # every other team has bid: resolves now
+    results = engine.tick(lambda index: "T1", now=31)
+    assert [(r["winner"], r["amount"], r["outcome"]) for r in results] == [("T2", 3_000_000, "sold")]
+    assert [team.balance for team in teams] == [13_000_000, 1_000_000, 10_000_000, 10_000_000]
+
+    # The seller lost the property elsewhere: nobody pays
+    results = engine.tick(lambda index: None, now=60)
+    assert results[0]["outcome"] == "withdrawn"
+    assert [team.balance for team in teams] == [13_000_000, 7_000_000, 10_000_000, 10_000_000]
+    assert engine.trades == {} and engine.escrow() == {}
+
+
+def test_auction_holds_only_the_high_bid_and_extends_the_deadline():
+    teams = _teams()
+    engine = TradingEngine(teams, timeout=60)
+    trade = engine.open_trade("T1", 3, mode="auction", now=0)
+    engine.bid(trade.trade_id, "T2", 1_000_000, now=10)
+    with pytest.raises(ValueError):
+        engine.bid(trade.trade_id, "T3", 1_050_000, now=11)  # must beat the high bid by the increment
+    engine.bid(trade.trade_id, "T3", 1_500_000, now=55)
+    assert teams[1].balance == 10_000_000 and teams[2].balance == 8_500_000
+    assert trade.deadline == 55 + AUCTION_EXTENSION
+    view = engine.export()["trades"][0]
+    assert (view["high_bidder"], view["high_bid"]) == ("T3", 1_500_000)
+
+    snapshot = engine.snapshot()
+    assert engine.tick(lambda index: "T1", now=61) == []
+    result, = engine.tick(lambda index: "T1", now=55 + AUCTION_EXTENSION)
+    assert (result["winner"], result["amount"]) == ("T3", 1_500_000)
+    assert teams[0].balance == 11_500_000
+
+    engine.restore(snapshot)
+    assert engine.escrow() == {"T3": 1_500_000}
+    engine.cancel(trade.trade_id)
+    assert engine.results[-1]["outcome"] == "cancelled" and teams[2].balance == 10_000_000
+
+
+def test_teams_are_found_through_the_shared_index():
+    teams = _teams()
+    index = OwnershipIndex({}, teams)
+    engine = TradingEngine(teams, timeout=60, index=index)
+    # A restored game renamed the team; the game re-indexes it
+    teams[1].team_id = "T9"
+    index.set_teams(teams)
+    trade = engine.open_trade("T1", 3, now=0)
+    engine.bid(trade.trade_id, "T9", 1_000_000, now=1)
+    assert teams[1].balance == 9_000_000
+    with pytest.raises(ValueError):
+        engine.bid(trade.trade_id, "T2", 1_000_000, now=1)
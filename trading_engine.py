@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Trading Engine: Concurrent Sealed-Bid Sales and Auctions
+The projector's trading modal sells one property at a time and stalls the
+table while it is open. The engine runs trades in the game core instead,
+next to the turns, and teams take part from their Streamlit pages:
+
+- a team opens a trade for a property it owns, as a sealed-bid sale (every
+  other team may place one hidden bid, which it can revise) or an open
+  auction (each bid must beat the highest one by AUCTION_INCREMENT and
+  pushes the deadline out to at least AUCTION_EXTENSION seconds)
+- money bid is held in escrow: it leaves the bidder's balance when the bid is
+  placed and comes back when the bid is beaten, revised, loses or the trade
+  is cancelled, so one team can bid in several trades without overspending
+- a trade resolves at its deadline, when every other team has bid (sealed)
+  or when the seller closes it; the highest bid wins, ties go to the earliest
+  bid. Resolution only depends on the bids and their order, never on timing.
+
+Several trades run at once (one per property). The engine keeps plain data
+so the game can include it in undo snapshots and the autosave.
+"""
+
+import time
+from dataclasses import asdict, dataclass, field
+
+from ownership import OwnershipIndex
+
+TRADE_TIMEOUT = 90.0        # seconds a trade stays open
+AUCTION_EXTENSION = 15.0    # an auction bid keeps the trade open at least this long
+AUCTION_INCREMENT = 100_000
+MIN_BID = 500_000
+MAX_OPEN_TRADES = 8
+MAX_RESULTS = 10            # resolved trades kept for the clients
+MODES = ("sealed", "auction")
+
+
+@dataclass
+class Trade:
+    trade_id: str
+    seller: str
+    property_index: int
+    mode: str
+    reserve: int
+    deadline: float
+    bids: dict = field(default_factory=dict)  # team_id -> [amount, bid sequence number]
+
+    def high_bid(self):
+        """(team_id, amount) of the winning bid so far, or (None, 0)"""
+        if not self.bids:
+            return None, 0
+        team_id, (amount, _) = max(self.bids.items(), key=lambda item: (item[1][0], -item[1][1]))
+        return team_id, amount
+
+
+class TradingEngine:
+    """Open trades, their escrowed bids and the recent results"""
+
+    def __init__(self, teams, timeout=TRADE_TIMEOUT, index=None):
+        self.teams = teams      # the game's Team objects; balances are debited and refunded in place
+        self.index = index if index is not None else OwnershipIndex({}, teams)  # finds them by id
+        self.timeout = timeout
+        self.reset()
+
+    def reset(self):
+        """Forget every trade without refunds (the game resets the balances itself)"""
+        self.trades = {}        # trade_id -> Trade
+        self.results = []
+        self.next_id = 1
+        self.next_bid = 1
+
+    def _team(self, team_id):
+        team = self.index.team(team_id)
+        if team is None:
+            raise ValueError(f"unknown team {team_id!r}")
+        return team
+
+    def _trade(self, trade_id):
+        trade = self.trades.get(trade_id)
+        if trade is None:
+            raise ValueError(f"no open trade {trade_id!r}")
+        return trade
+
+    def trade_for(self, property_index):
+        """The open trade selling this property, or None"""
+        return next((t for t in self.trades.values() if t.property_index == property_index), None)
+
+    def escrow(self):
+        """Money each team currently has held in bids"""
+        held = {}
+        for trade in self.trades.values():
+            for team_id, (amount, _) in trade.bids.items():
+                held[team_id] = held.get(team_id, 0) + amount
+        return held
+
+    def open_trade(self, seller, property_index, mode="sealed", reserve=0, now=None):
+        """Open a trade for a property the caller checked the seller owns; returns the Trade"""
+        now = time.time() if now is None else now
+        self._team(seller)
+        if mode not in MODES:
+            raise ValueError(f"unknown trade mode {mode!r}")
+        if not isinstance(reserve, int) or isinstance(reserve, bool) or reserve < 0:
+            raise ValueError(f"invalid reserve {reserve!r}")
+        if self.trade_for(property_index) is not None:
+            raise ValueError("this property is already up for trade")
+        if len(self.trades) >= MAX_OPEN_TRADES:
+            raise ValueError(f"{MAX_OPEN_TRADES} trades are already open")
+        trade = Trade(f"trade-{self.next_id}", seller, property_index, mode, reserve, now + self.timeout)
+        self.next_id += 1
+        self.trades[trade.trade_id] = trade
+        return trade
+
+    def bid(self, trade_id, team_id, amount, now=None):
+        """Place (or, in a sealed trade, revise) a bid and escrow its money"""
+        now = time.time() if now is None else now
+        trade = self._trade(trade_id)
+        team = self._team(team_id)
+        if team_id == trade.seller:
+            raise ValueError("sellers can't bid on their own trade")
+        if not isinstance(amount, int) or isinstance(amount, bool):
+            raise ValueError(f"invalid amount {amount!r}")
+        minimum = max(MIN_BID, trade.reserve)
+        if trade.mode == "auction" and trade.bids:
+            minimum = max(minimum, trade.high_bid()[1] + AUCTION_INCREMENT)
+        if amount < minimum:
+            raise ValueError(f"bid at least ₹{minimum:,}")
+        held = trade.bids.get(team_id, [0, 0])[0]
+        if amount > team.balance + held:
+            raise ValueError(f"{team.name} can't cover ₹{amount:,}")
+
+        if trade.mode == "auction":
+            # Only the highest bid is held; the team it beats gets its money back
+            for loser, (refund, _) in trade.bids.items():
+                self._team(loser).balance += refund
+            trade.bids = {}
+            trade.deadline = max(trade.deadline, now + AUCTION_EXTENSION)
+        else:
+            team.balance += held
+        team.balance -= amount
+        trade.bids[team_id] = [amount, self.next_bid]
+        self.next_bid += 1
+        return trade
+
+    def cancel(self, trade_id):
+        """Close a trade without a sale, refunding every bid"""
+        trade = self.trades.pop(trade_id, None)
+        if trade is None:
+            raise ValueError(f"no open trade {trade_id!r}")
+        for team_id, (amount, _) in trade.bids.items():
+            self._team(team_id).balance += amount
+        return self._record(trade, None, 0, "cancelled")
+
+    def close(self, trade_id, owner):
+        """Resolve a trade now; owner is the property's current owner (see tick)"""
+        trade = self.trades.pop(trade_id, None)
+        if trade is None:
+            raise ValueError(f"no open trade {trade_id!r}")
+        winner, amount = trade.high_bid()
+        if owner != trade.seller:
+            # Sold or reset elsewhere while the trade was open
+            winner, amount, outcome = None, 0, "withdrawn"
+        else:
+            outcome = "sold" if winner is not None else "no bids"
+        for team_id, (held, _) in trade.bids.items():
+            if team_id != winner:
+                self._team(team_id).balance += held
+        if winner is not None:
+            self._team(trade.seller).balance += amount
+        return self._record(trade, winner, amount, outcome)
+
+    def due(self, now=None):
+        """Ids of the trades to resolve: past their deadline, or sealed with a bid from every other team"""
+        now = time.time() if now is None else now
+        return [trade.trade_id for trade in self.trades.values()
+                if now >= trade.deadline
+                or (trade.mode == "sealed" and len(trade.bids) == len(self.teams) - 1)]
+
+    def tick(self, owner_of, now=None):
+        """Resolve every trade that is due, in the order they were opened; returns their results.
+
+        owner_of(property_index) gives the property's owner, so a property the
+        seller no longer holds is never handed over. The game transfers the
+        property of each "sold" result.
+        """
+        return [self.close(trade_id, owner_of(self.trades[trade_id].property_index)) for trade_id in self.due(now)]
+
+    def _record(self, trade, winner, amount, outcome):
+        result = {"trade_id": trade.trade_id, "property": trade.property_index, "seller": trade.seller,
+                  "winner": winner, "amount": amount, "outcome": outcome, "bids": len(trade.bids)}
+        self.results.append(result)
+        del self.results[:-MAX_RESULTS]
+        return result
+
+    def export(self):
+        """The trades as the clients see them; sealed bids only show who has bid"""
+        trades = []
+        for trade in self.trades.values():
+            view = {"trade_id": trade.trade_id, "seller": trade.seller, "property": trade.property_index,
+                    "mode": trade.mode, "reserve": trade.reserve, "deadline": trade.deadline,
+                    "bidders": sorted(trade.bids)}
+            if trade.mode == "auction":
+                view["high_bidder"], view["high_bid"] = trade.high_bid()
+            trades.append(view)
+        return {"trades": trades, "escrow": self.escrow(), "trade_results": list(self.results)}
+
+    def snapshot(self):
+        """A JSON-ready copy for undo and the autosave"""
+        return {"trades": [asdict(trade) for trade in self.trades.values()], "results": list(self.results),
+                "next_id": self.next_id, "next_bid": self.next_bid}
+
+    def restore(self, snapshot):
+        """Go back to a snapshot() copy"""
+        self.trades = {data["trade_id"]: Trade(**data) for data in snapshot["trades"]}
+        self.results = list(snapshot["results"])
+        self.next_id = snapshot["next_id"]
+        self.next_bid = snapshot["next_bid"]